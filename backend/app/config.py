@@ -7,14 +7,112 @@ class Settings(BaseSettings):
     openai_api_key: Optional[str] = None
     anthropic_api_key: Optional[str] = None
     
+    # Override API endpoints, e.g. for proxies or local stub servers
+    openai_base_url: Optional[str] = None
+    anthropic_base_url: Optional[str] = None
+    
     # Ollama
     ollama_base_url: str = "http://localhost:11434"
+    ollama_keep_alive: str = "30m"  # Keep models loaded so the prompt prefix stays cached
+    ollama_num_ctx: Optional[int] = None  # Fixed context size; changing it reloads the model
+    ollama_thinking_budget: int = 1024  # Reasoning tokens allowed per turn for thinking models
+    
+    # Mark stable prompt prefixes as cacheable where the provider supports it
+    prompt_caching: bool = True
+    
+    # Cache of complete responses keyed on provider, model, prompt and sampling settings
+    response_cache_enabled: bool = False
+    response_cache_dir: str = ".cache/responses"
+    response_cache_memory_entries: int = 512
+    response_cache_disk_max_bytes: int = 256 * 1024 * 1024
+    response_cache_replay_rate: float = 50.0  # Cached chunks replayed per second, 0 for no delay
+    
+    # Shared HTTP connection pool (used by every provider)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    http_connect_timeout: float = 5.0
+    http_first_byte_timeout: float = 180.0  # Covers cold model loads in Ollama
+    http_stream_idle_timeout: float = 60.0  # Max gap between streamed chunks
+    http_write_timeout: float = 30.0
+    http_pool_timeout: float = 30.0  # Max wait for a free connection
+    http2: bool = False  # Requires the optional 'h2' package
+    
+    # Provider health probing and model catalog caching
+    provider_health_interval: float = 15.0  # Seconds between background probes
+    provider_health_timeout: float = 2.0
+    circuit_failure_threshold: int = 3  # Consecutive failures before failing fast
+    circuit_reset_timeout: float = 30.0  # Seconds before an open circuit is retried
+    provider_models_ttl: float = 300.0  # Seconds before a model list is refreshed
+    
+    # What each model accepts: a bundled table, one probe per unknown model, and
+    # corrections learned from rejected requests, kept on disk between runs
+    capabilities_path: str = ".cache/model_capabilities.json"
+    capability_probe_enabled: bool = True
+    capability_probe_timeout: float = 30.0
+    
+    # Rate limits per provider, model and API key. Limits are learned from
+    # response headers; these only set them before the first response
+    rate_limit_enabled: bool = True
+    openai_rpm: Optional[float] = None
+    openai_tpm: Optional[float] = None
+    anthropic_rpm: Optional[float] = None
+    anthropic_tpm: Optional[float] = None
+    rate_limit_turn_deadline: float = 120.0  # Longest a turn waits for capacity and retries
+    rate_limit_max_retries: int = 6
+    rate_limit_backoff_base: float = 1.0
+    rate_limit_backoff_max: float = 30.0
     
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
     debug: bool = False
     
+    # WebSocket framing: merge streamed chunks for up to this long or this many bytes
+    ws_coalesce_ms: float = 25.0
+    ws_coalesce_bytes: int = 1024
+    
+    # Debate broadcast: events kept for reconnecting viewers, and per-viewer queue limits
+    hub_buffer_size: int = 8192
+    subscriber_queue_size: int = 256
+    slow_consumer_policy: str = "coalesce"  # coalesce, drop or disconnect
+    
+    # Debate persistence: "sqlite" survives restarts, "memory" does not
+    debate_store: str = "sqlite"
+    debate_store_path: str = ".cache/debates.db"
+    debate_store_flush_ms: float = 50.0  # Longest a write waits to be batched
+    debate_retention: float = 0  # Seconds before untouched debates are deleted, 0 keeps them
+    
+    # Debate sessions: idle ones are dropped from memory and reloaded from the store on next access
+    session_idle_ttl: float = 3600.0
+    session_completed_ttl: float = 900.0
+    session_max_count: int = 1000
+    session_max_bytes: int = 256 * 1024 * 1024
+    session_sweep_interval: float = 60.0
+    
+    # Tournaments: results files, debates run at once, requests at once per model
+    tournament_dir: str = "tournaments"
+    tournament_max_concurrency: int = 8
+    tournament_per_model_concurrency: int = 2
+    # A match stopped by rate limits is resumed this many times, after the delay, before it counts as failed
+    tournament_rate_limit_retries: int = 2
+    tournament_retry_delay: float = 30.0
+    
+    # Several uvicorn workers: debates are owned by one worker, others relay over Unix sockets
+    cluster_enabled: bool = False
+    cluster_dir: str = ".cache/cluster"
+    cluster_heartbeat_interval: float = 5.0
+    cluster_owner_timeout: float = 15.0  # A worker silent this long loses its debates
+    
+    # Replay provider: recorded debates served with their original chunk timing
+    replay_dir: str = "recordings"
+    replay_speed: float = 1.0  # 2 plays twice as fast, 0 without delays
+    replay_default_rate: float = 50.0  # Chunks per second for turns recorded without timing
+    record_chunk_timing: bool = True  # Keep each turn's chunk timing so it can be replayed
+    
+    # Metrics on /metrics: how often the event loop lag probe runs, 0 to turn it off
+    metrics_loop_lag_interval: float = 0.5
+    
     # CORS
     cors_origins: list[str] = ["http://localhost:5173", "http://localhost:3000"]
     
@@ -1,9 +1,19 @@
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import debate, providers
+from app.routers import debate, providers, tournament
+from app.providers.factory import ProviderFactory
+from app.providers.http import close_http_client
+from app.services.broadcast import hubs
+from app.services.cluster import cluster
+from app.services.health import health_prober
+from app.services.metrics import metrics, loop_lag_monitor
+from app.services.sessions import sessions
+from app.services.store import debate_store
+from app.services.tournament import tournaments
 
 # Configure logging
 logging.basicConfig(
@@ -11,10 +21,32 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    health_prober.start()
+    loop_lag_monitor.start()
+    sessions.start()
+    await cluster.start()
+    yield
+    await health_prober.stop()
+    await loop_lag_monitor.stop()
+    await sessions.stop()
+    await hubs.shutdown()
+    await tournaments.shutdown()
+    await cluster.stop()
+    # Anything still queued for the store is written before exit
+    await debate_store.close()
+    # Shut down providers before the pool they share
+    await ProviderFactory.close_all()
+    await close_http_client()
+
+
 app = FastAPI(
     title="AI Debater",
     description="An AI-powered debate platform where two models argue on topics",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -29,6 +61,7 @@ app.add_middleware(
 # Include routers
 app.include_router(providers.router, prefix="/api/providers", tags=["providers"])
 app.include_router(debate.router, prefix="/api/debate", tags=["debate"])
+app.include_router(tournament.router, prefix="/api/tournament", tags=["tournament"])
 
 
 @app.get("/")
@@ -38,4 +71,10 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    return {"status": "healthy", "sessions": sessions.stats()}
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Turn latency, throughput, errors and event loop lag in the Prometheus text format."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
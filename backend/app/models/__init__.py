@@ -1,4 +1,6 @@
-from app.models.debate import Message, DebateConfig, DebateState, DebateTurn, DebateStatus, DebateMode, DebateExport
-from app.models.providers import ProviderType, ModelInfo
+from app.models.debate import Message, DebateConfig, DebateState, DebateTurn, DebateStatus, DebateMode, DebateExport, ContextPolicy, HedgePolicy
+from app.models.providers import ProviderType, ModelInfo, ModelCapabilities, CacheHints, GenerationStats
+from app.models.transcript import TranscriptView
+from app.models.tournament import TournamentEntrant, TournamentSpec, TournamentProgress
 
-__all__ = ["Message", "DebateConfig", "DebateState", "DebateTurn", "DebateStatus", "DebateMode", "DebateExport", "ProviderType", "ModelInfo"]
+__all__ = ["Message", "DebateConfig", "DebateState", "DebateTurn", "DebateStatus", "DebateMode", "DebateExport", "ContextPolicy", "HedgePolicy", "ProviderType", "ModelInfo", "ModelCapabilities", "CacheHints", "GenerationStats", "TranscriptView", "TournamentEntrant", "TournamentSpec", "TournamentProgress"]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from enum import Enum
 from datetime import datetime
@@ -9,6 +9,14 @@ from app.models.providers import ProviderType
 class DebateMode(str, Enum):
     MANUAL = "manual"
     AUTO = "auto"
+    PARALLEL = "parallel"  # Both debaters answer each round at the same time
+
+
+class ContextPolicy(str, Enum):
+    FULL = "full"  # Send the whole transcript every turn
+    SLIDING_WINDOW = "sliding_window"  # Only the last context_window_turns turns
+    TOKEN_BUDGET = "token_budget"  # As many recent turns as fit in context_token_budget
+    ROLLING_SUMMARY = "rolling_summary"  # Recent turns verbatim, older ones summarized
 
 
 class DebateStatus(str, Enum):
@@ -23,12 +31,22 @@ class Message(BaseModel):
     content: str
 
 
+class HedgePolicy(BaseModel):
+    """Race a fallback backend against a debater's own when it is slow to start answering."""
+    after_seconds: float = 5.0  # Wait for the first chunk before starting the fallback
+    provider: Optional[ProviderType] = None  # None uses the debater's provider
+    model: Optional[str] = None  # None uses the debater's model
+
+
 class DebaterConfig(BaseModel):
     provider: ProviderType
     model: str
     position: str  # The stance/position this debater will argue for
     temperature: float = 0.7
     max_tokens: int = 350  # Token limit per turn
+    hedge: Optional[HedgePolicy] = None
+    thinking_budget: Optional[int] = None  # Reasoning tokens per turn; None follows the server setting
+    stream_thinking: bool = False  # Send reasoning to viewers as thinking_chunk events
 
 
 class DebateConfig(BaseModel):
@@ -38,6 +56,11 @@ class DebateConfig(BaseModel):
     mode: DebateMode = DebateMode.MANUAL
     max_turns: int = 10
     auto_delay_seconds: float = 2.0
+    context_policy: ContextPolicy = ContextPolicy.FULL
+    context_window_turns: int = Field(default=6, ge=1)  # Turns kept verbatim by sliding_window/rolling_summary
+    context_token_budget: int = Field(default=4000, ge=1)  # Prompt tokens allowed by token_budget
+    token_estimator: str = "chars"  # Name of a registered local token estimator
+    use_response_cache: Optional[bool] = None  # None follows the server setting
 
 
 class DebateTurn(BaseModel):
@@ -45,6 +68,10 @@ class DebateTurn(BaseModel):
     content: str
     timestamp: datetime
     turn_number: int
+    backend: Optional[str] = None  # "provider/model" that answered, recorded for hedged debaters
+    truncated: bool = False  # Cut short by stop or pause
+    # (seconds since the turn was requested, characters) per streamed chunk, for replay
+    chunk_timing: Optional[list[tuple[float, int]]] = None
 
 
 class DebateState(BaseModel):
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -6,6 +7,7 @@ class ProviderType(str, Enum):
     OPENAI = "openai"
     ANTHROPIC = "anthropic"
     OLLAMA = "ollama"
+    REPLAY = "replay"  # Recorded debates, no model
 
 
 class ModelInfo(BaseModel):
@@ -13,3 +15,27 @@ class ModelInfo(BaseModel):
     name: str
     provider: ProviderType
     description: str = ""
+
+
+class ModelCapabilities(BaseModel):
+    """What a model accepts, so each request is built right the first time."""
+    token_param: str = "max_tokens"  # Name of the output token limit parameter
+    temperature: bool = True  # Whether a temperature other than the default is accepted
+    context_window: Optional[int] = None  # Prompt plus output tokens, None if unknown
+    reasoning_overhead: Optional[int] = None  # Hidden reasoning tokens to allow for, None if unknown
+    source: str = "default"  # default, table, probe or learned
+
+
+class CacheHints(BaseModel):
+    """Tells a provider which part of the prompt is unchanged since the last request."""
+    prefix_messages: int = 0  # Leading chat messages identical to the previous request
+    session_id: Optional[str] = None  # Stable key for the conversation, e.g. debate and debater
+
+
+class GenerationStats(BaseModel):
+    """Usage reported by a provider for one response."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    thinking_tokens: int = 0  # Reasoning tokens, where the provider reports them apart
+    cached_tokens: int = 0
+    cache_hit: Optional[bool] = None  # None when the provider can't tell
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from app.models.debate import ContextPolicy
+from app.models.providers import ProviderType
+
+
+class TournamentEntrant(BaseModel):
+    """A model taking part in a tournament."""
+    provider: ProviderType
+    model: str
+    temperature: float = 0.7
+    max_tokens: int = 350
+
+
+class TournamentSpec(BaseModel):
+    """Every topic is debated by every pair of distinct entrants."""
+    name: str = Field(pattern=r"^[A-Za-z0-9_-]+$")  # Names the results file; rerunning a name resumes it
+    topics: list[str]
+    entrants: list[TournamentEntrant]
+    position_a: str = "For"
+    position_b: str = "Against"
+    both_sides: bool = True  # Also play each pairing with the sides swapped
+    repeats: int = 1
+    max_turns: int = 6
+    context_policy: ContextPolicy = ContextPolicy.FULL
+    max_concurrency: Optional[int] = None  # Debates at once; None follows the server setting
+    per_model_concurrency: Optional[int] = None  # Requests at once per provider/model
+    concurrency_overrides: dict[str, int] = {}  # "provider" or "provider/model" -> limit
+
+
+class TournamentProgress(BaseModel):
+    name: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0  # Already in the results file from an earlier run
+    running: int = 0
+    turns: int = 0
+    completion_tokens: int = 0
+    elapsed_seconds: float = 0.0
+    debates_per_minute: float = 0.0
+    tokens_per_second: float = 0.0
+    finished: bool = False
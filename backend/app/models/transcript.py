@@ -0,0 +1,67 @@
+from typing import Iterator, Literal, Optional
+
+from app.models.debate import Message
+
+
+class TranscriptView:
+    """
+    Append-only message history for one debater.
+
+    Messages are kept in the role/content dict format every provider sends,
+    so each turn only appends the newest message instead of rebuilding and
+    re-formatting the whole history. The lists returned by as_dicts() and
+    chat_dicts() are shared; callers must not mutate them.
+    """
+    
+    def __init__(self, system_prompt: str, chat: Optional[list[dict]] = None, context_note: str = ""):
+        """
+        Args:
+            system_prompt: The debater's fixed system prompt
+            chat: Initial user/assistant messages
+            context_note: Per-turn text sent after the system prompt, e.g. a summary
+        """
+        self.base_system_prompt = system_prompt
+        self.context_note = context_note
+        self.system_prompt = system_prompt + context_note
+        self._chat: list[dict] = chat if chat is not None else []
+        self._dicts: list[dict] = [{"role": "system", "content": self.system_prompt}, *self._chat]
+    
+    def append(self, role: Literal["user", "assistant"], content: str):
+        message = {"role": role, "content": content}
+        self._dicts.append(message)
+        self._chat.append(message)
+    
+    def window(self, start: int, context_note: str = "") -> "TranscriptView":
+        """A new view with chat messages from `start` on, leaving this one untouched."""
+        return TranscriptView(self.base_system_prompt, self._chat[start:], context_note)
+    
+    def as_dicts(self) -> list[dict]:
+        """All messages, system prompt first."""
+        return self._dicts
+    
+    def chat_dicts(self) -> list[dict]:
+        """Messages without the system prompt, for APIs that take it separately."""
+        return self._chat
+    
+    def prefix_ordered_dicts(self) -> list[dict]:
+        """
+        All messages with the fixed system prompt first and the context note
+        as a second system message, so prefix caches keyed on the leading
+        messages still match when only the note changes.
+        """
+        if not self.context_note:
+            return self._dicts
+        return [
+            {"role": "system", "content": self.base_system_prompt},
+            {"role": "system", "content": self.context_note.strip()},
+            *self._chat
+        ]
+    
+    def __iter__(self) -> Iterator[Message]:
+        return (Message(**m) for m in self._dicts)
+    
+    def __len__(self) -> int:
+        return len(self._dicts)
+    
+    def __getitem__(self, index: int) -> Message:
+        return Message(**self._dicts[index])
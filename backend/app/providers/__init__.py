@@ -2,6 +2,7 @@ from app.providers.base import BaseProvider
 from app.providers.openai import OpenAIProvider
 from app.providers.anthropic import AnthropicProvider
 from app.providers.ollama import OllamaProvider
+from app.providers.replay import ReplayProvider
 from app.providers.factory import ProviderFactory
 
-__all__ = ["BaseProvider", "OpenAIProvider", "AnthropicProvider", "OllamaProvider", "ProviderFactory"]
+__all__ = ["BaseProvider", "OpenAIProvider", "AnthropicProvider", "OllamaProvider", "ReplayProvider", "ProviderFactory"]
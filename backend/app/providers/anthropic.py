@@ -1,10 +1,16 @@
-from typing import AsyncGenerator
-from anthropic import AsyncAnthropic
+from typing import AsyncGenerator, Any, Optional
+from anthropic import AsyncAnthropic, BadRequestError
 
-from app.providers.base import BaseProvider
-from app.models import Message, ModelInfo, ProviderType
+from app.providers.base import BaseProvider, ProviderError
+from app.providers.capabilities import capability_registry
+from app.providers.http import get_http_client, build_timeout, iter_with_timeouts
+from app.models import Message, ModelInfo, ModelCapabilities, ProviderType, TranscriptView, CacheHints, GenerationStats
 from app.config import settings
 
+CACHE_CONTROL = {"type": "ephemeral"}
+# Older API versions only honour cache_control behind this beta flag
+PROMPT_CACHING_HEADERS = {"anthropic-beta": "prompt-caching-2024-07-31"}
+
 
 class AnthropicProvider(BaseProvider):
     """Anthropic Claude API provider implementation."""
@@ -12,7 +18,14 @@ class AnthropicProvider(BaseProvider):
     def __init__(self):
         self.client = None
         if settings.anthropic_api_key:
-            self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+            self.client = AsyncAnthropic(
+                api_key=settings.anthropic_api_key,
+                base_url=settings.anthropic_base_url,
+                http_client=get_http_client(),
+                timeout=build_timeout(),
+                # Retries are left to the rate limiter, which shares the wait fairly across debates
+                max_retries=0 if settings.rate_limit_enabled else 2
+            )
     
     def is_available(self) -> bool:
         return self.client is not None
@@ -21,44 +34,107 @@ class AnthropicProvider(BaseProvider):
         # Return empty list - let user type model name
         return []
     
+    @staticmethod
+    def _mark_cacheable(
+        messages: list[Message],
+        system_message: str,
+        chat_messages: list[dict],
+        cache_hints: CacheHints
+    ) -> tuple[list[dict], list[dict]]:
+        """Mark the system prompt and the transcript prefix as cache breakpoints."""
+        if isinstance(messages, TranscriptView) and messages.context_note:
+            # Keep the per-turn note out of the cached system block
+            system = [
+                {"type": "text", "text": messages.base_system_prompt, "cache_control": CACHE_CONTROL},
+                {"type": "text", "text": messages.context_note.strip()}
+            ]
+        else:
+            system = [{"type": "text", "text": system_message, "cache_control": CACHE_CONTROL}]
+        
+        # Read the cache up to the previous request's end and write it up to
+        # this one's, copying so the shared transcript is never modified
+        chat = list(chat_messages)
+        breakpoints = {len(chat) - 1}
+        if 0 < cache_hints.prefix_messages <= len(chat):
+            breakpoints.add(cache_hints.prefix_messages - 1)
+        for index in breakpoints:
+            message = chat[index]
+            chat[index] = {
+                "role": message["role"],
+                "content": [{"type": "text", "text": message["content"], "cache_control": CACHE_CONTROL}]
+            }
+        return system, chat
+    
+    @staticmethod
+    def _record_usage(stats: Optional[GenerationStats], usage: Any):
+        if stats is None or usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        created = getattr(usage, "cache_creation_input_tokens", None) or 0
+        # input_tokens only counts the uncached part of the prompt
+        stats.prompt_tokens = usage.input_tokens + cached + created
+        stats.completion_tokens = usage.output_tokens
+        stats.cached_tokens = cached
+        stats.cache_hit = cached > 0
+    
+    @staticmethod
+    def _sampling_params(capabilities: ModelCapabilities, temperature: float, max_tokens: int) -> dict:
+        params = {capabilities.token_param: max_tokens}
+        if capabilities.temperature:
+            params["temperature"] = temperature
+        return params
+    
     async def generate_response(
         self,
         messages: list[Message],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 350,
-        stream: bool = True
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
     ) -> AsyncGenerator[str, None]:
         if not self.is_available():
-            yield "Error: Anthropic API key not configured"
+            yield ProviderError("Error: Anthropic API key not configured")
             return
         
         # Anthropic requires system message to be separate
-        system_message = ""
-        chat_messages = []
+        system_message, chat_messages = self.split_system(messages)
         
-        for msg in messages:
-            if msg.role == "system":
-                system_message = msg.content
-            else:
-                chat_messages.append({"role": msg.role, "content": msg.content})
+        capabilities = await capability_registry.ensure("anthropic", model, self.probe_capabilities)
+        kwargs = {
+            "model": model,
+            "system": system_message,
+            "messages": chat_messages,
+            **self._sampling_params(capabilities, temperature, max_tokens)
+        }
+        if cache_hints is not None and chat_messages:
+            kwargs["system"], kwargs["messages"] = self._mark_cacheable(
+                messages, system_message, chat_messages, cache_hints
+            )
+            kwargs["extra_headers"] = PROMPT_CACHING_HEADERS
         
+        for attempt in range(2):
+            try:
+                async for text in self._send(kwargs, stream, stats):
+                    yield text
+                return
+            except BadRequestError as e:
+                # A rejected parameter fails the request before anything is streamed
+                if attempt or not await capability_registry.learn("anthropic", model, None, e.message):
+                    raise
+            kwargs = {k: v for k, v in kwargs.items() if k not in ("max_tokens", "temperature")}
+            kwargs.update(self._sampling_params(capability_registry.get("anthropic", model), temperature, max_tokens))
+    
+    async def _send(self, kwargs: dict, stream: bool, stats: Optional[GenerationStats]) -> AsyncGenerator[str, None]:
         if stream:
-            async with self.client.messages.stream(
-                model=model,
-                max_tokens=max_tokens,
-                system=system_message,
-                messages=chat_messages,
-                temperature=temperature
-            ) as response:
-                async for text in response.text_stream:
+            async with self.client.messages.stream(**kwargs) as response:
+                async for text in iter_with_timeouts(response.text_stream):
                     yield text
+                final_message = await response.get_final_message()
+                self._record_usage(stats, final_message.usage)
         else:
-            response = await self.client.messages.create(
-                model=model,
-                max_tokens=max_tokens,
-                system=system_message,
-                messages=chat_messages,
-                temperature=temperature
-            )
+            response = await self.client.messages.create(**kwargs)
+            self._record_usage(stats, response.usage)
             yield response.content[0].text
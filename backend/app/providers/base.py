@@ -1,7 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from app.models import Message, ModelInfo
+from app.models import Message, ModelInfo, ModelCapabilities, TranscriptView, CacheHints, GenerationStats
+
+
+class ThinkingChunk(str):
+    """Reasoning text a model streams before its answer; never part of the turn's content."""
+    pass
+
+
+class ProviderError(str):
+    """A failure a provider reports in place of an answer; shown as the turn's text but never cached."""
+    pass
 
 
 class BaseProvider(ABC):
@@ -14,7 +24,10 @@ class BaseProvider(ABC):
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 350,
-        stream: bool = True
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
     ) -> AsyncGenerator[str, None]:
         """
         Generate a response from the model.
@@ -25,12 +38,46 @@ class BaseProvider(ABC):
             temperature: Sampling temperature
             max_tokens: Maximum tokens per response
             stream: Whether to stream the response
+            cache_hints: Which part of the prompt is stable, for prefix caching
+            stats: Filled in with token usage and cache results when given
+            thinking_budget: Most reasoning tokens to allow, for providers that stream them
             
         Yields:
-            Response chunks if streaming, otherwise full response
+            Response chunks if streaming, otherwise full response. Reasoning
+            text, where the provider exposes it, comes as ThinkingChunk, and
+            failures reported as text come as ProviderError.
         """
         pass
     
+    @staticmethod
+    def format_messages(messages: list[Message], stable_prefix_first: bool = False) -> list[dict]:
+        """
+        Convert messages to role/content dicts, reusing a transcript's cached form.
+        
+        With stable_prefix_first, per-turn context notes are moved behind the
+        fixed system prompt so automatic prefix caches keep matching.
+        """
+        if isinstance(messages, TranscriptView):
+            if stable_prefix_first:
+                return messages.prefix_ordered_dicts()
+            return messages.as_dicts()
+        return [{"role": m.role, "content": m.content} for m in messages]
+    
+    @staticmethod
+    def split_system(messages: list[Message]) -> tuple[str, list[dict]]:
+        """Separate the system prompt from chat messages for APIs that take it apart."""
+        if isinstance(messages, TranscriptView):
+            return messages.system_prompt, messages.chat_dicts()
+        
+        system_message = ""
+        chat_messages = []
+        for msg in messages:
+            if msg.role == "system":
+                system_message = msg.content
+            else:
+                chat_messages.append({"role": msg.role, "content": msg.content})
+        return system_message, chat_messages
+    
     @abstractmethod
     async def list_models(self) -> list[ModelInfo]:
         """List available models for this provider."""
@@ -40,3 +87,24 @@ class BaseProvider(ABC):
     def is_available(self) -> bool:
         """Check if the provider is configured and available."""
         pass
+    
+    async def check_health(self) -> bool:
+        """
+        Probe the provider backend without blocking the event loop.
+        
+        Providers that only need local configuration fall back to is_available().
+        """
+        return self.is_available()
+    
+    async def probe_capabilities(self, model: str, capabilities: ModelCapabilities) -> ModelCapabilities:
+        """
+        Find out what a model accepts, starting from what is already known.
+        
+        Called once per model the bundled table doesn't cover. Providers that
+        can't ask their backend return the capabilities unchanged.
+        """
+        return capabilities
+    
+    async def close(self):
+        """Release provider resources. The shared HTTP pool is closed separately."""
+        pass
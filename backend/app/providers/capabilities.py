@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.config import settings
+from app.models import ModelCapabilities
+from app.services.metrics import RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Reasoning tokens allowed on top of the answer for models that think before replying
+DEFAULT_REASONING_OVERHEAD = 4096
+
+# Known model families per provider, matched on the longest prefix of the model name
+BUNDLED_CAPABILITIES: dict[str, list[tuple[str, dict]]] = {
+    "openai": [
+        ("gpt-3.5-turbo", {"context_window": 16385, "reasoning_overhead": 0}),
+        ("gpt-4", {"context_window": 8192, "reasoning_overhead": 0}),
+        ("gpt-4-turbo", {"context_window": 128000, "reasoning_overhead": 0}),
+        ("gpt-4o", {"token_param": "max_completion_tokens", "context_window": 128000, "reasoning_overhead": 0}),
+        ("gpt-4.1", {"token_param": "max_completion_tokens", "context_window": 1047576, "reasoning_overhead": 0}),
+        ("gpt-4.5", {"token_param": "max_completion_tokens", "context_window": 128000, "reasoning_overhead": 0}),
+        ("gpt-5", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 400000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+        ("gpt-5-chat", {"token_param": "max_completion_tokens", "context_window": 128000, "reasoning_overhead": 0}),
+        ("o1", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 200000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+        ("o1-mini", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 128000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+        ("o1-preview", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 128000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+        ("o3", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 200000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+        ("o4-mini", {
+            "token_param": "max_completion_tokens", "temperature": False,
+            "context_window": 200000, "reasoning_overhead": DEFAULT_REASONING_OVERHEAD,
+        }),
+    ],
+    "anthropic": [
+        ("claude", {"context_window": 200000, "reasoning_overhead": 0}),
+        ("claude-2", {"context_window": 100000, "reasoning_overhead": 0}),
+        ("claude-instant", {"context_window": 100000, "reasoning_overhead": 0}),
+    ],
+}
+
+TOKEN_PARAMS = ("max_tokens", "max_completion_tokens")
+
+_QUOTED_NAME = re.compile(r"['`\"](\w+)['`\"]")
+_CONTEXT_LIMIT = re.compile(r"maximum context length is (\d+)|> (\d+) maximum")
+
+
+def bundled_capabilities(provider: str, model: str) -> ModelCapabilities:
+    """Capabilities from the bundled table, or defaults for a model it doesn't know."""
+    name = model.lower()
+    best: Optional[tuple[str, dict]] = None
+    for prefix, fields in BUNDLED_CAPABILITIES.get(provider, []):
+        if name.startswith(prefix) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, fields)
+    if best is None:
+        return ModelCapabilities()
+    return ModelCapabilities(**best[1], source="table")
+
+
+def rejected_param(param: Optional[str], message: str) -> Optional[str]:
+    """The request parameter an API error complains about, if it names one we set."""
+    if param:
+        return param
+    for name in _QUOTED_NAME.findall(message):
+        if name in TOKEN_PARAMS or name == "temperature":
+            return name
+    if "temperature" in message:
+        return "temperature"
+    return None
+
+
+class CapabilityRegistry:
+    """
+    What each provider/model accepts, shared by all providers.
+
+    Lookups are a dictionary hit once a model has been seen. A model is
+    resolved from the bundled table first; models the table doesn't know
+    are probed once, and requests a model rejects with 400 correct the
+    entry. Probed and learned entries are kept on disk between runs.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or settings.capabilities_path)
+        self._known: dict[tuple[str, str], ModelCapabilities] = {}
+        self._loaded = False
+        self._probed: set[tuple[str, str]] = set()  # Probed this run, whether or not it worked
+        self._probes: dict[tuple[str, str], asyncio.Task] = {}
+    
+    def _read(self) -> dict[tuple[str, str], ModelCapabilities]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable model capabilities file {self.path}: {e}")
+            return {}
+        known = {}
+        for key, fields in data.items():
+            provider, _, model = key.partition("/")
+            known[(provider, model)] = ModelCapabilities.model_validate(fields)
+        return known
+    
+    def _write(self, data: dict[str, dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(temp, self.path)
+    
+    async def _load(self):
+        if self._loaded:
+            return
+        stored = await asyncio.to_thread(self._read)
+        self._loaded = True
+        for key, capabilities in stored.items():
+            # Entries probed or learned while the file was being read are newer
+            if key not in self._known or self._known[key].source in ("default", "table"):
+                self._known[key] = capabilities
+    
+    async def _save(self):
+        data = {
+            f"{provider}/{model}": capabilities.model_dump()
+            for (provider, model), capabilities in self._known.items()
+            if capabilities.source in ("probe", "learned")
+        }
+        try:
+            await asyncio.to_thread(self._write, data)
+        except OSError as e:
+            logger.warning(f"Could not save model capabilities to {self.path}: {e}")
+    
+    def get(self, provider: str, model: str) -> ModelCapabilities:
+        """Capabilities as currently known, without probing."""
+        key = (provider, model)
+        capabilities = self._known.get(key)
+        if capabilities is None:
+            capabilities = self._known[key] = bundled_capabilities(provider, model)
+        return capabilities
+    
+    async def set(self, provider: str, model: str, capabilities: ModelCapabilities):
+        self._known[(provider, model)] = capabilities
+        await self._save()
+    
+    async def ensure(
+        self,
+        provider: str,
+        model: str,
+        probe: Callable[[str, ModelCapabilities], Awaitable[ModelCapabilities]]
+    ) -> ModelCapabilities:
+        """
+        Capabilities for a model, probing it first if nothing is known about it.
+
+        Concurrent callers share one probe. A failed probe is not retried
+        until restart; requests then rely on learning from rejections.
+        """
+        key = (provider, model)
+        capabilities = self._known.get(key)
+        if self._loaded and capabilities is not None and (capabilities.source != "default" or key in self._probed):
+            return capabilities
+        
+        await self._load()
+        capabilities = self.get(provider, model)
+        if capabilities.source != "default" or key in self._probed or not settings.capability_probe_enabled:
+            return capabilities
+        
+        task = self._probes.get(key)
+        if task is None:
+            task = self._probes[key] = asyncio.create_task(self._probe(provider, model, probe))
+        # shield() so one cancelled turn doesn't cancel the shared probe
+        return await asyncio.shield(task)
+    
+    async def _probe(
+        self,
+        provider: str,
+        model: str,
+        probe: Callable[[str, ModelCapabilities], Awaitable[ModelCapabilities]]
+    ) -> ModelCapabilities:
+        key = (provider, model)
+        try:
+            probed = await asyncio.wait_for(
+                probe(model, self.get(provider, model)),
+                settings.capability_probe_timeout
+            )
+        except Exception as e:
+            logger.warning(f"Capability probe for {provider}/{model} failed: {e!r}")
+            return self.get(provider, model)
+        finally:
+            self._probed.add(key)
+            self._probes.pop(key, None)
+        probed = probed.model_copy(update={"source": "probe"})
+        logger.info(f"Probed {provider}/{model}: {probed.model_dump()}")
+        await self.set(provider, model, probed)
+        return probed
+    
+    async def learn(self, provider: str, model: str, param: Optional[str], message: str) -> bool:
+        """
+        Correct a model's entry from the error it rejected a request with.
+
+        Returns whether the request is worth retrying with the corrected
+        parameters; a context length error is recorded but not retryable.
+        """
+        current = self.get(provider, model)
+        update: dict = {}
+        rejected = rejected_param(param, message)
+        if rejected == current.token_param and rejected in TOKEN_PARAMS:
+            update["token_param"] = next(p for p in TOKEN_PARAMS if p != rejected)
+        elif rejected == "temperature" and current.temperature:
+            update["temperature"] = False
+        retryable = bool(update)
+        
+        limit = _CONTEXT_LIMIT.search(message)
+        if limit and int(limit.group(1) or limit.group(2)) != current.context_window:
+            update["context_window"] = int(limit.group(1) or limit.group(2))
+        if not update:
+            return False
+        
+        learned = current.model_copy(update={**update, "source": "learned"})
+        logger.warning(f"{provider}/{model} rejected a request, now using {update}: {message}")
+        await self.set(provider, model, learned)
+        if retryable:
+            RETRIES.inc(provider, model, "rejected_params")
+        return retryable
+
+
+capability_registry = CapabilityRegistry()
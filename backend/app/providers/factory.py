@@ -3,6 +3,9 @@ from app.providers.base import BaseProvider
 from app.providers.openai import OpenAIProvider
 from app.providers.anthropic import AnthropicProvider
 from app.providers.ollama import OllamaProvider
+from app.providers.ratelimit import RateLimitedProvider
+from app.providers.replay import ReplayProvider
+from app.config import settings
 
 
 class ProviderFactory:
@@ -15,12 +18,33 @@ class ProviderFactory:
         """Get or create a provider instance."""
         if provider_type not in cls._instances:
             if provider_type == ProviderType.OPENAI:
-                cls._instances[provider_type] = OpenAIProvider()
+                cls._instances[provider_type] = cls._rate_limited(
+                    OpenAIProvider(), provider_type, settings.openai_api_key
+                )
             elif provider_type == ProviderType.ANTHROPIC:
-                cls._instances[provider_type] = AnthropicProvider()
+                cls._instances[provider_type] = cls._rate_limited(
+                    AnthropicProvider(), provider_type, settings.anthropic_api_key
+                )
             elif provider_type == ProviderType.OLLAMA:
                 cls._instances[provider_type] = OllamaProvider()
+            elif provider_type == ProviderType.REPLAY:
+                cls._instances[provider_type] = ReplayProvider()
             else:
                 raise ValueError(f"Unknown provider type: {provider_type}")
         
         return cls._instances[provider_type]
+    
+    @staticmethod
+    def _rate_limited(provider: BaseProvider, provider_type: ProviderType, api_key: str) -> BaseProvider:
+        # Local Ollama has no rate limits; hosted APIs do
+        if not settings.rate_limit_enabled:
+            return provider
+        return RateLimitedProvider(provider, provider_type.value, api_key)
+    
+    @classmethod
+    async def close_all(cls):
+        """Close every provider instance and forget it."""
+        instances = list(cls._instances.values())
+        cls._instances.clear()
+        for provider in instances:
+            await provider.close()
@@ -0,0 +1,66 @@
+import time
+from enum import Enum
+from typing import Optional
+
+from app.config import settings
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """Circuit breaker tracking whether a provider backend is reachable."""
+    
+    def __init__(
+        self,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None
+    ):
+        self.failure_threshold = failure_threshold or settings.circuit_failure_threshold
+        self.reset_timeout = reset_timeout or settings.circuit_reset_timeout
+        self.last_ok: Optional[bool] = None  # Result of the last probe, None until the first
+        self.checked_at = 0.0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = CircuitState.CLOSED
+    
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            # Let the next probe or request through to test the backend
+            self._state = CircuitState.HALF_OPEN
+        return self._state
+    
+    def is_available(self) -> bool:
+        """Fail fast while the circuit is open or the last probe failed."""
+        if self.state == CircuitState.OPEN:
+            return False
+        return self.last_ok is not False
+    
+    def record_success(self, probe: bool = False):
+        if probe:
+            self.last_ok = True
+            self.checked_at = time.monotonic()
+        self._failures = 0
+        self._state = CircuitState.CLOSED
+    
+    def record_failure(self, probe: bool = False):
+        """
+        Count a failed call towards opening the circuit.
+
+        Only a failed probe marks the backend down at once; a request that
+        fails, e.g. on a read timeout, counts towards the threshold.
+        """
+        if probe:
+            self.last_ok = False
+            self.checked_at = time.monotonic()
+        self._failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
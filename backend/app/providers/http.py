@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Optional, TypeVar
+
+import httpx
+
+from app.config import settings
+from app.providers.ratelimit import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# One pooled client for the whole process. httpx keeps a separate pool per
+# origin internally, so Ollama, OpenAI and Anthropic can all share it.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_enabled() -> bool:
+    if not settings.http2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def build_timeout() -> httpx.Timeout:
+    """Build the per-phase timeout used for provider requests."""
+    # httpx applies the read timeout to every socket read, including the one
+    # that waits for the first byte, so it has to cover the longer of the two.
+    # The exact first-byte/idle split is enforced by iter_with_timeouts().
+    return httpx.Timeout(
+        connect=settings.http_connect_timeout,
+        read=max(settings.http_first_byte_timeout, settings.http_stream_idle_timeout),
+        write=settings.http_write_timeout,
+        pool=settings.http_pool_timeout,
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared pooled HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+            timeout=build_timeout(),
+            http2=_http2_enabled(),
+            event_hooks={"response": [rate_limiter.observe_response]} if settings.rate_limit_enabled else None,
+        )
+    return _client
+
+
+async def close_http_client():
+    """Close the shared client and all of its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _cancel_and_wait(task: asyncio.Task):
+    task.cancel()
+    # The stream can't be closed while the cancelled read is still unwinding
+    await asyncio.wait({task})
+    if not task.cancelled():
+        task.exception()
+
+
+async def iter_with_timeouts(
+    stream: AsyncIterator[T],
+    first_byte_timeout: Optional[float] = None,
+    idle_timeout: Optional[float] = None,
+) -> AsyncIterator[T]:
+    """
+    Re-yield items from a stream, enforcing first-byte and idle timeouts.
+
+    Args:
+        stream: Async iterator of response chunks
+        first_byte_timeout: Max wait for the first item (defaults to settings)
+        idle_timeout: Max wait between subsequent items (defaults to settings)
+    """
+    if first_byte_timeout is None:
+        first_byte_timeout = settings.http_first_byte_timeout
+    if idle_timeout is None:
+        idle_timeout = settings.http_stream_idle_timeout
+    
+    iterator = stream.__aiter__()
+    waiting_for_first = True
+    try:
+        while True:
+            timeout = first_byte_timeout if waiting_for_first else idle_timeout
+            # Not wait_for(): on Python < 3.12 it drops a cancellation that lands as the chunk arrives
+            next_item = asyncio.ensure_future(iterator.__anext__())
+            try:
+                await asyncio.wait({next_item}, timeout=timeout)
+            finally:
+                if not next_item.done():
+                    await _cancel_and_wait(next_item)
+            if next_item.cancelled():
+                phase = "first byte" if waiting_for_first else "next chunk"
+                raise httpx.ReadTimeout(f"Timed out after {timeout}s waiting for {phase}")
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                return
+            waiting_for_first = False
+            yield item
+    finally:
+        # Stopping early, e.g. on cancellation, must still release the response
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -1,9 +1,12 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Optional
 import httpx
 import json
 
-from app.providers.base import BaseProvider
-from app.models import Message, ModelInfo, ProviderType
+from app.providers.base import BaseProvider, ProviderError, ThinkingChunk
+from app.providers.capabilities import capability_registry
+from app.providers.health import ProviderHealth
+from app.providers.http import get_http_client, iter_with_timeouts
+from app.models import Message, ModelInfo, ModelCapabilities, ProviderType, CacheHints, GenerationStats
 from app.config import settings
 
 
@@ -12,38 +15,137 @@ class OllamaProvider(BaseProvider):
     
     def __init__(self):
         self.base_url = settings.ollama_base_url
-        self._available = None
+        self.health = ProviderHealth()
     
     def is_available(self) -> bool:
-        # Cache availability check
-        if self._available is None:
-            try:
-                response = httpx.get(f"{self.base_url}/api/tags", timeout=2.0)
-                self._available = response.status_code == 200
-            except Exception:
-                self._available = False
-        return self._available
+        # Answered from the last background probe, never from the network
+        return self.health.is_available()
+    
+    async def check_health(self) -> bool:
+        try:
+            response = await get_http_client().get(
+                f"{self.base_url}/api/tags",
+                timeout=settings.provider_health_timeout
+            )
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+        
+        if healthy:
+            self.health.record_success(probe=True)
+        else:
+            self.health.record_failure(probe=True)
+        return healthy
     
     async def list_models(self) -> list[ModelInfo]:
         if not self.is_available():
             return []
         
+        # Errors propagate so the catalog keeps serving the models it already has
+        response = await get_http_client().get(f"{self.base_url}/api/tags")
+        response.raise_for_status()
+        data = response.json()
+        
+        models = []
+        for model in data.get("models", []):
+            models.append(ModelInfo(
+                id=model["name"],
+                name=model["name"],
+                provider=ProviderType.OLLAMA,
+                description=f"Local model: {model.get('size', 'unknown size')}"
+            ))
+        return models
+    
+    async def probe_capabilities(self, model: str, capabilities: ModelCapabilities) -> ModelCapabilities:
+        """Read the model's context length and whether it thinks from /api/show."""
+        response = await get_http_client().post(f"{self.base_url}/api/show", json={"model": model})
+        response.raise_for_status()
+        data = response.json()
+        
+        update: dict = {"token_param": "num_predict"}
+        context = [v for k, v in data.get("model_info", {}).items() if k.endswith(".context_length")]
+        if context:
+            update["context_window"] = int(context[0])
+        if "capabilities" in data:
+            # Thinking models get settings.ollama_thinking_budget unless the debater sets one
+            update["reasoning_overhead"] = None if "thinking" in data["capabilities"] else 0
+        return capabilities.model_copy(update=update)
+    
+    @staticmethod
+    def _record_usage(
+        stats: Optional[GenerationStats],
+        data: Optional[dict],
+        formatted_messages: list[dict],
+        cache_hints: Optional[CacheHints],
+        thinking_tokens: int = 0,
+        content_tokens: Optional[int] = None
+    ):
+        if stats is None:
+            return
+        estimated = sum(len(m["content"]) for m in formatted_messages) // 4
+        # eval_count covers thinking and content alike
+        generated = data.get("eval_count", 0) if data is not None else 0
+        stats.thinking_tokens += thinking_tokens
+        stats.completion_tokens += content_tokens if content_tokens is not None else max(generated - thinking_tokens, 0)
+        if data is None:
+            # Stopped before Ollama's final message, so the prompt is only estimated
+            stats.prompt_tokens = max(stats.prompt_tokens, estimated)
+            return
+        # prompt_eval_count only counts prompt tokens that were not already in
+        # the KV cache, so compare it with a local estimate of the full prompt
+        evaluated = data.get("prompt_eval_count", 0)
+        stats.prompt_tokens = max(evaluated, estimated)
+        stats.cached_tokens = max(estimated - evaluated, 0)
+        if cache_hints is not None and cache_hints.prefix_messages:
+            stats.cache_hit = evaluated < estimated // 2
+    
+    async def _chat_stream(self, payload: dict) -> AsyncGenerator[dict, None]:
+        """Messages of a streamed /api/chat response, one per generated token."""
+        async with get_http_client().stream(
+            "POST",
+            f"{self.base_url}/api/chat",
+            json={**payload, "stream": True}
+        ) as response:
+            async for line in iter_with_timeouts(response.aiter_lines()):
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+    
+    async def _stream_budgeted(
+        self,
+        payload: dict,
+        max_tokens: int,
+        thinking_budget: int,
+        counts: dict[str, Any]
+    ) -> AsyncGenerator[str, None]:
+        """
+        Stream thinking and content, each stopped at its own budget.
+        
+        Ollama sends one token per message, so counting messages counts
+        tokens. Leaving the stream closes the connection, which makes
+        Ollama stop generating.
+        """
+        messages = self._chat_stream(payload)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"{self.base_url}/api/tags")
-                data = response.json()
-                
-                models = []
-                for model in data.get("models", []):
-                    models.append(ModelInfo(
-                        id=model["name"],
-                        name=model["name"],
-                        provider=ProviderType.OLLAMA,
-                        description=f"Local model: {model.get('size', 'unknown size')}"
-                    ))
-                return models
-        except Exception:
-            return []
+            async for data in messages:
+                if data.get("done"):
+                    counts["done"] = data
+                    break
+                message = data.get("message") or {}
+                if message.get("thinking"):
+                    counts["thinking"] += 1
+                    yield ThinkingChunk(message["thinking"])
+                    if counts["thinking"] >= thinking_budget:
+                        break
+                if message.get("content"):
+                    counts["content"] += 1
+                    yield message["content"]
+                    if counts["content"] >= max_tokens:
+                        break
+        finally:
+            await messages.aclose()
     
     async def generate_response(
         self,
@@ -51,64 +153,64 @@ class OllamaProvider(BaseProvider):
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 350,
-        stream: bool = True
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
     ) -> AsyncGenerator[str, None]:
         if not self.is_available():
-            yield "Error: Ollama not available. Make sure it's running locally."
+            yield ProviderError("Error: Ollama not available. Make sure it's running locally.")
             return
         
-        formatted_messages = [{"role": m.role, "content": m.content} for m in messages]
+        formatted_messages = self.format_messages(messages)
+        capabilities = await capability_registry.ensure("ollama", model, self.probe_capabilities)
+        if thinking_budget is None:
+            thinking_budget = capabilities.reasoning_overhead
+        if thinking_budget is None:
+            thinking_budget = settings.ollama_thinking_budget
         
-        # For thinking models, we don't limit tokens during generation
-        # as thinking tokens shouldn't count. We'll truncate the final content if needed.
-        # Use a high limit to allow thinking + response
-        effective_max_tokens = max_tokens * 10  # Allow room for thinking
+        # num_predict caps thinking and content together; the stream below
+        # enforces each budget on its own
+        options = {"num_predict": max_tokens + thinking_budget}
+        if capabilities.temperature:
+            options["temperature"] = temperature
+        if settings.ollama_num_ctx:
+            options["num_ctx"] = settings.ollama_num_ctx
+        payload = {
+            "model": model,
+            "messages": formatted_messages,
+            # Ollama reuses its KV cache for a matching prompt prefix as long
+            # as the model stays loaded with the same options
+            "keep_alive": settings.ollama_keep_alive,
+            "options": options
+        }
         
+        # If thinking uses up its budget before any answer, ask once more without thinking
+        attempts = [payload, {**payload, "think": False, "options": {**options, "num_predict": max_tokens}}]
+        if not thinking_budget:
+            # Models that can't think, or debaters that allow none, skip straight to the answer
+            attempts = attempts[1:]
+        answer: list[str] = []
         try:
-            async with httpx.AsyncClient() as client:
-                if stream:
-                    # For streaming, collect full response then extract content
-                    # because thinking models stream thinking first, then content
-                    full_response_data = []
-                    async with client.stream(
-                        "POST",
-                        f"{self.base_url}/api/chat",
-                        json={
-                            "model": model,
-                            "messages": formatted_messages,
-                            "stream": True,
-                            "options": {"temperature": temperature, "num_predict": effective_max_tokens}
-                        },
-                        timeout=180.0
-                    ) as response:
-                        async for line in response.aiter_lines():
-                            if line:
-                                try:
-                                    data = json.loads(line)
-                                    if "message" in data:
-                                        # Only yield content, not thinking
-                                        content = data["message"].get("content", "")
-                                        if content:
-                                            yield content
-                                except json.JSONDecodeError:
-                                    continue
-                else:
-                    response = await client.post(
-                        f"{self.base_url}/api/chat",
-                        json={
-                            "model": model,
-                            "messages": formatted_messages,
-                            "stream": False,
-                            "options": {"temperature": temperature, "num_predict": effective_max_tokens}
-                        },
-                        timeout=180.0
-                    )
-                    data = response.json()
-                    # Only return content field, not thinking
-                    content = data.get("message", {}).get("content", "")
-                    if content:
-                        yield content
-                    else:
-                        yield "[Model returned empty response]"
+            for attempt in attempts:
+                counts = {"thinking": 0, "content": 0, "done": None}
+                # Always streamed, so both budgets hold even when the caller wants one piece
+                async for chunk in self._stream_budgeted(attempt, max_tokens, thinking_budget, counts):
+                    if stream:
+                        yield chunk
+                    elif not isinstance(chunk, ThinkingChunk):
+                        answer.append(chunk)
+                self._record_usage(
+                    stats, counts["done"], formatted_messages, cache_hints, counts["thinking"], counts["content"]
+                )
+                if counts["content"] or counts["thinking"] < thinking_budget:
+                    break
+            if not stream:
+                yield "".join(answer) or "[Model returned empty response]"
+            self.health.record_success()
+        except httpx.TransportError as e:
+            # Connection-level failures count towards opening the circuit
+            self.health.record_failure()
+            yield ProviderError(f"Error calling Ollama: {str(e)}")
         except Exception as e:
-            yield f"Error calling Ollama: {str(e)}"
+            yield ProviderError(f"Error calling Ollama: {str(e)}")
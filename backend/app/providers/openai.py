@@ -1,10 +1,16 @@
-from typing import AsyncGenerator
-from openai import AsyncOpenAI
+from typing import AsyncGenerator, Any, Callable, Optional
+from openai import AsyncOpenAI, BadRequestError
 
-from app.providers.base import BaseProvider
-from app.models import Message, ModelInfo, ProviderType
+from app.providers.base import BaseProvider, ProviderError
+from app.providers.capabilities import capability_registry, DEFAULT_REASONING_OVERHEAD
+from app.providers.http import get_http_client, build_timeout, iter_with_timeouts
+from app.models import Message, ModelInfo, ModelCapabilities, ProviderType, CacheHints, GenerationStats
 from app.config import settings
 
+# Request parameters that depend on what the model accepts
+SAMPLING_PARAMS = ("max_tokens", "max_completion_tokens", "temperature")
+PROBE_MAX_TOKENS = 16
+
 
 class OpenAIProvider(BaseProvider):
     """OpenAI API provider implementation."""
@@ -12,7 +18,14 @@ class OpenAIProvider(BaseProvider):
     def __init__(self):
         self.client = None
         if settings.openai_api_key:
-            self.client = AsyncOpenAI(api_key=settings.openai_api_key)
+            self.client = AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                http_client=get_http_client(),
+                timeout=build_timeout(),
+                # Retries are left to the rate limiter, which shares the wait fairly across debates
+                max_retries=0 if settings.rate_limit_enabled else 2
+            )
     
     def is_available(self) -> bool:
         return self.client is not None
@@ -21,63 +34,124 @@ class OpenAIProvider(BaseProvider):
         # Return empty list - let user type model name
         return []
     
+    @staticmethod
+    def _record_usage(stats: Optional[GenerationStats], usage: Any):
+        if stats is None or usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) or 0
+        stats.prompt_tokens = usage.prompt_tokens
+        stats.completion_tokens = usage.completion_tokens
+        stats.cached_tokens = cached
+        stats.cache_hit = cached > 0
+    
+    @staticmethod
+    def _sampling_params(
+        capabilities: ModelCapabilities,
+        temperature: float,
+        max_tokens: int,
+        thinking_budget: Optional[int]
+    ) -> dict:
+        # Reasoning models spend hidden tokens from the same limit as the answer
+        overhead = thinking_budget if thinking_budget is not None else capabilities.reasoning_overhead or 0
+        params = {capabilities.token_param: max_tokens + overhead}
+        if capabilities.temperature:
+            params['temperature'] = temperature
+        return params
+    
+    async def _create(self, model: str, kwargs: dict, sampling: Callable[[ModelCapabilities], dict], retries: int = 1):
+        """Send a request; if the model rejects its parameters, learn from that and resend."""
+        while True:
+            try:
+                return await self.client.chat.completions.create(**kwargs)
+            except BadRequestError as e:
+                if retries <= 0 or not await capability_registry.learn("openai", model, e.param, e.message):
+                    raise
+            retries -= 1
+            kwargs = {k: v for k, v in kwargs.items() if k not in SAMPLING_PARAMS}
+            kwargs.update(sampling(capability_registry.get("openai", model)))
+    
+    async def probe_capabilities(self, model: str, capabilities: ModelCapabilities) -> ModelCapabilities:
+        """Send one tiny request, corrected until the model accepts it."""
+        if not self.is_available():
+            raise RuntimeError("OpenAI API key not configured")
+        
+        def sampling(capabilities: ModelCapabilities) -> dict:
+            return self._sampling_params(capabilities, 0.7, PROBE_MAX_TOKENS, 0)
+        
+        kwargs = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': 'Say hello.'}],
+            'stream': False,
+            **sampling(capabilities),
+        }
+        try:
+            response = await self._create(model, kwargs, sampling, retries=len(SAMPLING_PARAMS))
+            details = getattr(response.usage, 'completion_tokens_details', None)
+            reasoning = getattr(details, 'reasoning_tokens', None) or 0
+        except BadRequestError as e:
+            # Some reasoning models refuse to return a reply cut short while thinking
+            if 'reached' not in e.message:
+                raise
+            reasoning = PROBE_MAX_TOKENS
+        capabilities = capability_registry.get("openai", model)
+        if capabilities.reasoning_overhead is None:
+            # A model that reasons spends the tiny budget thinking
+            capabilities = capabilities.model_copy(
+                update={'reasoning_overhead': DEFAULT_REASONING_OVERHEAD if reasoning else 0}
+            )
+        return capabilities
+    
     async def generate_response(
         self,
         messages: list[Message],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 350,
-        stream: bool = True
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
     ) -> AsyncGenerator[str, None]:
         if not self.is_available():
-            yield "Error: OpenAI API key not configured"
+            yield ProviderError("Error: OpenAI API key not configured")
             return
         
-        formatted_messages = [{"role": m.role, "content": m.content} for m in messages]
+        # OpenAI caches prompt prefixes automatically, so keep everything that
+        # changes between turns behind the stable system prompt and history
+        formatted_messages = self.format_messages(messages, stable_prefix_first=cache_hints is not None)
         
-        model_lower = model.lower()
+        capabilities = await capability_registry.ensure("openai", model, self.probe_capabilities)
         
-        # Reasoning models (o1, o3, nano) use internal reasoning tokens
-        # They need much higher max_completion_tokens or none at all
-        is_reasoning_model = any(x in model_lower for x in ['o1', 'o3', 'nano'])
+        def sampling(capabilities: ModelCapabilities) -> dict:
+            return self._sampling_params(capabilities, temperature, max_tokens, thinking_budget)
         
-        # Use max_completion_tokens for newer models (gpt-4o, gpt-5, o1, o3, etc.)
-        uses_new_token_param = any(x in model_lower for x in ['gpt-4o', 'gpt-5', 'o1-', 'o3-', 'o1', 'o3'])
-        
-        # Some models don't support temperature parameter
-        no_temperature_models = any(x in model_lower for x in ['o1', 'o3', 'nano'])
-        
-        # Build kwargs dynamically
         kwargs = {
             'model': model,
             'messages': formatted_messages,
             'stream': stream,
+            **sampling(capabilities),
         }
         
-        # For reasoning models, either omit max_tokens or set very high
-        # The reasoning tokens count against the limit, so we need room for reasoning + output
-        if is_reasoning_model:
-            # For reasoning models, multiply by 10 to account for reasoning overhead
-            # or omit entirely for short prompts
-            if max_tokens < 500:
-                # Don't set a limit for small requests - let the model use what it needs
-                pass
-            else:
-                kwargs['max_completion_tokens'] = max_tokens * 10
-        elif uses_new_token_param:
-            kwargs['max_completion_tokens'] = max_tokens
-        else:
-            kwargs['max_tokens'] = max_tokens
-        
-        if not no_temperature_models:
-            kwargs['temperature'] = temperature
+        if cache_hints is not None and cache_hints.session_id:
+            # Routes requests of one conversation to the same cache
+            kwargs['extra_body'] = {'prompt_cache_key': cache_hints.session_id}
         
         if stream:
-            response = await self.client.chat.completions.create(**kwargs)
-            
-            async for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
+            if stats is not None:
+                # Usage arrives in a final chunk with no choices
+                kwargs['stream_options'] = {'include_usage': True}
+            response = await self._create(model, kwargs, sampling)
+            try:
+                async for chunk in iter_with_timeouts(response):
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+                    if getattr(chunk, 'usage', None) is not None:
+                        self._record_usage(stats, chunk.usage)
+            finally:
+                # Abort the upstream request when the turn is cancelled part way
+                await response.close()
         else:
-            response = await self.client.chat.completions.create(**kwargs)
+            response = await self._create(model, kwargs, sampling)
+            self._record_usage(stats, response.usage)
             yield response.choices[0].message.content
@@ -0,0 +1,436 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncGenerator, Optional
+
+import httpx
+
+from app.config import settings
+from app.models import Message, ModelInfo, ModelCapabilities, CacheHints, GenerationStats
+from app.providers.base import BaseProvider
+from app.services.metrics import QUEUE_WAIT, RETRIES
+
+logger = logging.getLogger(__name__)
+
+# The debate a request is made for; waiting requests are served round-robin across debates
+current_debate: ContextVar[Optional[str]] = ContextVar("current_debate", default=None)
+
+# Too many requests, and Anthropic's "overloaded"
+RETRYABLE_STATUS = {429, 529}
+
+# OpenAI reports reset times as durations like "6m0s" or "20ms"
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class RateLimitExceeded(Exception):
+    """A request could not be made within its turn's deadline."""
+    pass
+
+
+class QueuedNotice:
+    """
+    Yielded by a rate-limited provider, in place of a chunk, before it waits.
+
+    reason is "rate_limit" while waiting for capacity and "retry" after the
+    backend turned the request away.
+    """
+    
+    __slots__ = ("reason", "wait_seconds", "attempt")
+    
+    def __init__(self, reason: str, wait_seconds: float, attempt: int = 0):
+        self.reason = reason
+        self.wait_seconds = wait_seconds
+        self.attempt = attempt
+
+
+def key_id(api_key: Optional[str]) -> str:
+    """Short fingerprint of an API key, so limits are kept per key without holding the key."""
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_wait(value: Optional[str]) -> Optional[float]:
+    """Seconds from now given by a Retry-After or reset header, in any of the formats providers use."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        # Anthropic: RFC 3339 timestamp
+        at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            # Retry-After: HTTP date
+            at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return max((at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def retry_after(headers: Any) -> Optional[float]:
+    if headers is None:
+        return None
+    retry_ms = headers.get("retry-after-ms")
+    if retry_ms:
+        try:
+            return float(retry_ms) / 1000
+        except ValueError:
+            pass
+    return parse_wait(headers.get("retry-after"))
+
+
+def _header_number(headers: Any, *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+def estimate_tokens(messages: list[Message], max_tokens: int) -> int:
+    """Tokens a request may use against a tokens-per-minute limit: prompt at ~4 chars a token, plus the reply."""
+    prompt_chars = sum(len(m["content"]) for m in BaseProvider.format_messages(messages))
+    return prompt_chars // 4 + max_tokens
+
+
+class TokenBucket:
+    """Refills to per_minute over one minute. With no limit known, never makes anyone wait."""
+    
+    def __init__(self, per_minute: Optional[float] = None):
+        self.capacity = per_minute
+        self.level = per_minute or 0.0
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        if self.capacity is None:
+            return 0.0
+        self._refill(now)
+        # A request larger than the whole bucket waits for a full one
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) * 60 / self.capacity
+    
+    def take(self, amount: float, now: float):
+        if self.capacity is not None:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+    
+    def give_back(self, amount: float, now: float):
+        if self.capacity is not None:
+            self._refill(now)
+            self.level = min(self.capacity, self.level + amount)
+    
+    def observe(self, limit: Optional[float], remaining: Optional[float], now: float):
+        """Adopt the limit and remaining capacity a response reported."""
+        if limit is not None and limit > 0 and limit != self.capacity:
+            if self.capacity is None:
+                self.level = limit
+            self.capacity = limit
+        self._refill(now)
+        if remaining is not None and self.capacity is not None:
+            # Other clients using the same key count too, so only ever lower our estimate
+            self.level = min(self.level, remaining)
+
+
+class _Waiter:
+    __slots__ = ("debate_id", "tokens", "future")
+    
+    def __init__(self, debate_id: Optional[str], tokens: int, future: asyncio.Future):
+        self.debate_id = debate_id
+        self.tokens = tokens
+        self.future = future
+
+
+class RateLimit:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one provider, model and key.
+
+    Requests that can't go now queue per debate, and the queues are served
+    round-robin, so one busy debate can't hold back the others.
+    """
+    
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self._queues: OrderedDict[Optional[str], deque[_Waiter]] = OrderedDict()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+    
+    @property
+    def queued(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+    
+    def wait_time(self, tokens: int) -> float:
+        now = time.monotonic()
+        return max(
+            self.blocked_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+        )
+    
+    def _take(self, tokens: int):
+        now = time.monotonic()
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+    
+    def reserve(self, debate_id: Optional[str], tokens: int) -> Optional[_Waiter]:
+        """Take capacity for a request. Returns None if it may go now, otherwise its place in the queue."""
+        if not self._queues and self.wait_time(tokens) <= 0:
+            self._take(tokens)
+            return None
+        waiter = _Waiter(debate_id, tokens, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(debate_id, deque()).append(waiter)
+        self._dispatch()
+        return waiter
+    
+    async def wait(self, waiter: _Waiter, timeout: float):
+        """Wait for a queued request's turn, giving up its place after timeout seconds."""
+        try:
+            await asyncio.wait_for(waiter.future, max(timeout, 0))
+        except asyncio.TimeoutError:
+            raise RateLimitExceeded(f"No rate limit capacity within the turn deadline ({self.queued} requests queued)")
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            # A cancelled head of the queue must not hold up the ones behind it
+            self._dispatch()
+    
+    def _dispatch(self):
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._queues:
+            debate_id, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            if waiter.future.done():
+                queue.popleft()
+            else:
+                wait = self.wait_time(waiter.tokens)
+                if wait > 0:
+                    self._wakeup = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                    return
+                queue.popleft()
+                self._take(waiter.tokens)
+                waiter.future.set_result(None)
+            # Move this debate to the back of the rotation
+            del self._queues[debate_id]
+            if queue:
+                self._queues[debate_id] = queue
+    
+    def settle(self, reserved: int, used: int):
+        """Return the part of a request's token estimate it didn't use."""
+        if used > 0 and used < reserved:
+            self.tokens.give_back(reserved - used, time.monotonic())
+            if self._queues:
+                self._dispatch()
+    
+    def block(self, seconds: float):
+        """Hold every request for this key, e.g. after a 429 with Retry-After."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def observe(self, headers: Any):
+        """Adapt the buckets to the rate limit headers of a response."""
+        now = time.monotonic()
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            limit = _header_number(headers, f"x-ratelimit-limit-{kind}", f"anthropic-ratelimit-{kind}-limit")
+            remaining = _header_number(
+                headers, f"x-ratelimit-remaining-{kind}", f"anthropic-ratelimit-{kind}-remaining"
+            )
+            if limit is None and remaining is None:
+                continue
+            bucket.observe(limit, remaining, now)
+            if kind == "requests" and remaining is not None and remaining < 1:
+                reset = parse_wait(
+                    headers.get("x-ratelimit-reset-requests") or headers.get("anthropic-ratelimit-requests-reset")
+                )
+                if reset:
+                    self.block(reset)
+        if self._queues:
+            self._dispatch()
+
+
+class RateLimiter:
+    """Every RateLimit in the process, by provider, model and API key."""
+    
+    def __init__(self):
+        self._limits: dict[tuple[str, str, str], RateLimit] = {}
+    
+    def get(self, provider: str, model: str, key: str = "") -> RateLimit:
+        limit = self._limits.get((provider, model, key))
+        if limit is None:
+            limit = RateLimit(
+                getattr(settings, f"{provider}_rpm", None),
+                getattr(settings, f"{provider}_tpm", None)
+            )
+            self._limits[(provider, model, key)] = limit
+        return limit
+    
+    async def observe_response(self, response: httpx.Response):
+        """HTTP client response hook that feeds rate limit headers back into the buckets."""
+        headers = response.headers
+        if (
+            response.status_code not in RETRYABLE_STATUS
+            and "x-ratelimit-limit-requests" not in headers
+            and "anthropic-ratelimit-requests-limit" not in headers
+        ):
+            return
+        
+        request = response.request
+        if "x-api-key" in request.headers:
+            provider, api_key = "anthropic", request.headers["x-api-key"]
+        elif "authorization" in request.headers:
+            provider, api_key = "openai", request.headers["authorization"].removeprefix("Bearer ")
+        else:
+            return
+        try:
+            model = json.loads(request.content).get("model")
+        except (httpx.RequestNotRead, ValueError, AttributeError):
+            return
+        if model:
+            self.get(provider, model, key_id(api_key)).observe(headers)
+
+
+def failure_status(error: Exception) -> Optional[int]:
+    """HTTP status of a failed provider call, from SDK or httpx errors."""
+    status = getattr(error, "status_code", None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    ceiling = min(settings.rate_limit_backoff_max, settings.rate_limit_backoff_base * 2 ** (attempt - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class RateLimitedProvider(BaseProvider):
+    """
+    Wraps a provider so each request first takes capacity from its rate limits.
+
+    Requests turned away with 429 or overloaded are retried with jittered
+    backoff, honouring Retry-After, until the turn deadline. A request is
+    only retried before its first chunk, so nothing is ever streamed twice.
+    """
+    
+    def __init__(
+        self,
+        provider: BaseProvider,
+        name: str,
+        api_key: Optional[str] = None,
+        limiter: Optional[RateLimiter] = None
+    ):
+        self.provider = provider
+        self.name = name
+        self.key = key_id(api_key)
+        self.limiter = limiter or rate_limiter
+    
+    def is_available(self) -> bool:
+        return self.provider.is_available()
+    
+    async def list_models(self) -> list[ModelInfo]:
+        return await self.provider.list_models()
+    
+    async def check_health(self) -> bool:
+        return await self.provider.check_health()
+    
+    async def probe_capabilities(self, model: str, capabilities: ModelCapabilities) -> ModelCapabilities:
+        return await self.provider.probe_capabilities(model, capabilities)
+    
+    async def close(self):
+        await self.provider.close()
+    
+    async def generate_response(
+        self,
+        messages: list[Message],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 350,
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
+    ) -> AsyncGenerator[Any, None]:
+        limit = self.limiter.get(self.name, model, self.key)
+        tokens = estimate_tokens(messages, max_tokens)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.rate_limit_turn_deadline
+        attempt = 0
+        queue_wait = QUEUE_WAIT.labels(self.name, model)
+        
+        while True:
+            waiter = limit.reserve(current_debate.get(), tokens)
+            if waiter is not None:
+                # After a retry notice, the wait it announced needs no second one
+                if not waiter.future.done() and attempt == 0:
+                    yield QueuedNotice("rate_limit", limit.wait_time(tokens), attempt)
+                queued_at = loop.time()
+                await limit.wait(waiter, deadline - loop.time())
+                queue_wait.observe(loop.time() - queued_at)
+            else:
+                queue_wait.observe(0.0)
+            
+            started = False
+            try:
+                async for chunk in self.provider.generate_response(
+                    messages=messages,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=stream,
+                    cache_hints=cache_hints,
+                    stats=stats,
+                    thinking_budget=thinking_budget
+                ):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if started or failure_status(e) not in RETRYABLE_STATUS:
+                    raise
+                attempt += 1
+                response = getattr(e, "response", None)
+                hint = retry_after(response.headers) if response is not None else None
+                delay = max(hint or 0, backoff(attempt))
+                if attempt > settings.rate_limit_max_retries or loop.time() + delay > deadline:
+                    raise RateLimitExceeded(
+                        f"{self.name}/{model} is still rate limited after {attempt} attempts: {e}"
+                    ) from e
+                logger.info(f"{self.name}/{model} returned {failure_status(e)}, retrying in {delay:.1f}s")
+                limit.block(delay)
+                RETRIES.inc(self.name, model, "rate_limited")
+                yield QueuedNotice("retry", delay, attempt)
+                continue
+            
+            if stats is not None:
+                limit.settle(tokens, stats.prompt_tokens + stats.completion_tokens)
+            return
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import re
+import zlib
+from contextvars import ContextVar
+from pathlib import Path
+from typing import AsyncGenerator, Optional
+
+from app.providers.base import BaseProvider, ProviderError
+from app.providers.ratelimit import current_debate
+from app.models import Message, ModelInfo, ProviderType, CacheHints, GenerationStats, DebateTurn
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Splits turns recorded without chunk timing into word-sized chunks
+REPLAY_CHUNK = re.compile(r"\s*\S+")
+
+# Number of the turn a request is for, set by the orchestrator before each turn
+current_turn_number: ContextVar[Optional[int]] = ContextVar("current_turn_number", default=None)
+
+
+def turn_chunks(turn: DebateTurn) -> list[tuple[float, str]]:
+    """A recorded turn as (seconds since the turn was requested, text) per chunk."""
+    timing = turn.chunk_timing
+    if timing and sum(size for _, size in timing) == len(turn.content):
+        chunks = []
+        position = 0
+        for offset, size in timing:
+            chunks.append((offset, turn.content[position:position + size]))
+            position += size
+        return chunks
+    # Recorded before chunk timing was kept, or its content was replaced
+    rate = settings.replay_default_rate
+    return [
+        (index / rate if rate > 0 else 0.0, word)
+        for index, word in enumerate(REPLAY_CHUNK.findall(turn.content))
+    ]
+
+
+class Recording:
+    """The debates in one recording file: a debate export, or a load test report run with --record."""
+    
+    def __init__(self, path: Path, debates: list[list[DebateTurn]], topic: str = ""):
+        self.path = path
+        self.debates = debates
+        self.topic = topic
+    
+    @classmethod
+    def read(cls, path: Path) -> "Recording":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if "recordings" in data:
+            documents = data["recordings"]
+        else:
+            documents = [data]
+        debates = [
+            sorted((DebateTurn.model_validate(turn) for turn in document["turns"]), key=lambda t: t.turn_number)
+            for document in documents
+        ]
+        debates = [turns for turns in debates if turns]
+        if not debates:
+            raise ValueError("no recorded turns")
+        topic = (documents[0].get("config") or {}).get("topic", "")
+        return cls(path, debates, topic)
+    
+    def turn(self, number: int, debate: Optional[int] = None) -> DebateTurn:
+        """
+        The recorded turn with this number, wrapping around when a debate
+        runs longer than its recording. Without a debate index, live
+        debates are spread over the recorded ones by id.
+        """
+        if debate is None:
+            debate_id = current_debate.get()
+            debate = zlib.crc32(debate_id.encode()) if debate_id else 0
+        turns = self.debates[debate % len(self.debates)]
+        return turns[(number - 1) % len(turns)]
+
+
+class ReplayProvider(BaseProvider):
+    """
+    Serves turns from recorded debates instead of calling a model.
+
+    The model name is a recording file in replay_dir, optionally followed
+    by #<index> to pick one debate of a load test report. Chunks are
+    streamed on their recorded schedule divided by replay_speed.
+    """
+    
+    def __init__(self):
+        self.directory = Path(settings.replay_dir)
+        self._recordings: dict[Path, tuple[float, Recording]] = {}
+    
+    def is_available(self) -> bool:
+        return self.directory.is_dir()
+    
+    def _resolve(self, name: str) -> Optional[Path]:
+        root = self.directory.resolve()
+        for candidate in (name, f"{name}.json"):
+            path = (root / candidate).resolve()
+            # Model names come from clients; never read outside replay_dir
+            if path.is_relative_to(root) and path.is_file():
+                return path
+        return None
+    
+    def _load(self, path: Path) -> Recording:
+        mtime = path.stat().st_mtime
+        cached = self._recordings.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        recording = Recording.read(path)
+        self._recordings[path] = (mtime, recording)
+        return recording
+    
+    async def recording(self, model: str) -> tuple[Recording, Optional[int]]:
+        name, _, index = model.partition("#")
+        path = self._resolve(name)
+        if path is None:
+            raise FileNotFoundError(f"No recording named '{name}' in {self.directory}")
+        recording = await asyncio.to_thread(self._load, path)
+        return recording, int(index) if index else None
+    
+    def _list(self) -> list[ModelInfo]:
+        models = []
+        for path in sorted(self.directory.rglob("*.json")):
+            try:
+                recording = self._load(path.resolve())
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.debug(f"Skipping {path}, not a recording: {e}")
+                continue
+            name = path.relative_to(self.directory).as_posix()
+            debates = len(recording.debates)
+            models.append(ModelInfo(
+                id=name,
+                name=name,
+                provider=ProviderType.REPLAY,
+                description=f"Recorded: {recording.topic}" if debates == 1 else f"Recorded: {debates} debates"
+            ))
+        return models
+    
+    async def list_models(self) -> list[ModelInfo]:
+        if not self.is_available():
+            return []
+        return await asyncio.to_thread(self._list)
+    
+    async def generate_response(
+        self,
+        messages: list[Message],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 350,
+        stream: bool = True,
+        cache_hints: Optional[CacheHints] = None,
+        stats: Optional[GenerationStats] = None,
+        thinking_budget: Optional[int] = None
+    ) -> AsyncGenerator[str, None]:
+        try:
+            recording, debate = await self.recording(model)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            yield ProviderError(f"Error: Cannot replay '{model}': {e}")
+            return
+        
+        number = current_turn_number.get()
+        if number is None:
+            # Called outside a debate; the prompt's chat messages are close enough
+            number = max(sum(1 for m in self.format_messages(messages) if m["role"] != "system"), 1)
+        chunks = turn_chunks(recording.turn(number, debate))
+        
+        speed = settings.replay_speed
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        if not stream:
+            if speed > 0 and chunks:
+                await asyncio.sleep(chunks[-1][0] / speed)
+            yield "".join(text for _, text in chunks)
+            return
+        for offset, text in chunks:
+            # Scheduled from the start of the turn so sleep overshoot doesn't add up
+            if speed > 0:
+                delay = started + offset / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield text
@@ -1,43 +1,89 @@
-from datetime import datetime
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
+import asyncio
+import time
+from fastapi import APIRouter, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketState
 from app.models import DebateConfig, DebateState, DebateExport
+from app.services.archive import (
+    ArchiveError, ArchiveImport, COMPRESSION_MEDIA_TYPES, COMPRESSION_SUFFIXES, export_archive, get_compressor
+)
+from app.services.broadcast import hubs, SlowConsumerPolicy, Subscriber
+from app.services.cluster import cluster, OwnerUnreachable, RemoteHub
 from app.services.debate import DebateOrchestrator
+from app.services.metrics import WS_SEND
+from app.services.sessions import sessions
+from app.services.streaming import coalesce_events, get_encoder
 
 router = APIRouter()
 
-# Store active debates (in production, use Redis or similar)
-active_debates: dict[str, DebateOrchestrator] = {}
-
 
 @router.post("/start")
 async def start_debate(config: DebateConfig) -> DebateState:
     """Initialize a new debate session."""
     orchestrator = DebateOrchestrator(config)
-    debate_state = orchestrator.get_state()
-    active_debates[debate_state.id] = orchestrator
-    return debate_state
+    await sessions.add(orchestrator)
+    await cluster.claim(orchestrator.state.id)
+    return orchestrator.get_state()
+
+
+def _archive_response(debate_ids: list[str], compression: str, filename: str) -> StreamingResponse:
+    if get_compressor(compression) is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported compression: {compression}")
+    return StreamingResponse(
+        export_archive(sessions.store, debate_ids, compression),
+        media_type=COMPRESSION_MEDIA_TYPES[compression],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.ndjson{COMPRESSION_SUFFIXES[compression]}"'}
+    )
+
+
+@router.get("/archive")
+async def export_archive_bulk(ids: Optional[str] = None, compression: str = "none") -> StreamingResponse:
+    """Stream many debates, or all of them, as an NDJSON archive (compression: none, gzip or zstd)."""
+    debate_ids = ids.split(",") if ids else await sessions.store.debate_ids()
+    return _archive_response(debate_ids, compression, "debates")
+
+
+@router.post("/archive")
+async def import_archive_bulk(request: Request, compression: Optional[str] = None) -> dict:
+    """
+    Import an NDJSON archive as it is uploaded. Compression is detected
+    unless given. Debates already stored are skipped, so a failed upload
+    can be sent again.
+    """
+    archive_import = ArchiveImport(sessions.store)
+    try:
+        return await archive_import.run(request.stream(), compression)
+    except ArchiveError as e:
+        # Debates before the failing line are kept
+        raise HTTPException(status_code=400, detail={"error": str(e), **archive_import.result()})
+
+
+async def _control(debate_id: str, action: str) -> dict:
+    try:
+        return await cluster.control(debate_id, action)
+    except OwnerUnreachable as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
 
 @router.get("/{debate_id}")
 async def get_debate(debate_id: str) -> DebateState:
     """Get the current state of a debate."""
-    if debate_id not in active_debates:
-        return {"error": "Debate not found"}
-    return active_debates[debate_id].get_state()
+    return await _control(debate_id, "state")
 
 
 @router.get("/{debate_id}/export")
-async def export_debate(debate_id: str) -> DebateExport:
-    """Export a debate for saving."""
-    if debate_id not in active_debates:
+async def export_debate(debate_id: str, format: str = "json", compression: str = "none") -> DebateExport:
+    """Export a debate for saving, as a DebateExport or (format=ndjson) a one-debate archive."""
+    if format == "ndjson":
+        if await sessions.store.read_rows(debate_id) is None:
+            return {"error": "Debate not found"}
+        return _archive_response([debate_id], compression, debate_id)
+    exported = await sessions.store.export_json(debate_id)
+    if exported is None:
         return {"error": "Debate not found"}
-    
-    state = active_debates[debate_id].get_state()
-    return DebateExport(
-        config=state.config,
-        turns=state.turns,
-        exported_at=datetime.now()
-    )
+    # Already a serialized DebateExport, straight from the store
+    return Response(content=exported, media_type="application/json")
 
 
 @router.post("/import")
@@ -45,65 +91,101 @@ async def import_debate(debate_export: DebateExport) -> DebateState:
     """Import a previously saved debate."""
     orchestrator = DebateOrchestrator(debate_export.config)
     # Restore the turns
-    orchestrator.state.turns = debate_export.turns
-    orchestrator.state.current_turn = len(debate_export.turns)
-    if debate_export.turns:
-        last_debater = debate_export.turns[-1].debater
-        orchestrator.state.current_debater = "B" if last_debater == "A" else "A"
+    orchestrator.load_turns(debate_export.turns)
     
-    active_debates[orchestrator.state.id] = orchestrator
+    await sessions.add(orchestrator)
+    await cluster.claim(orchestrator.state.id)
     return orchestrator.get_state()
 
 
 @router.post("/{debate_id}/next-turn")
 async def trigger_next_turn(debate_id: str) -> dict:
     """Manually trigger the next turn in a debate."""
-    if debate_id not in active_debates:
-        return {"error": "Debate not found"}
-    
-    orchestrator = active_debates[debate_id]
-    return {"message": "Turn triggered", "current_debater": orchestrator.state.current_debater}
+    return await _control(debate_id, "next-turn")
 
 
 @router.post("/{debate_id}/pause")
 async def pause_debate(debate_id: str) -> DebateState:
     """Pause an auto-mode debate."""
-    if debate_id not in active_debates:
-        return {"error": "Debate not found"}
-    
-    active_debates[debate_id].pause()
-    return active_debates[debate_id].get_state()
+    return await _control(debate_id, "pause")
 
 
 @router.post("/{debate_id}/resume")
 async def resume_debate(debate_id: str) -> DebateState:
     """Resume a paused debate."""
-    if debate_id not in active_debates:
-        return {"error": "Debate not found"}
-    
-    active_debates[debate_id].resume()
-    return active_debates[debate_id].get_state()
+    return await _control(debate_id, "resume")
+
+
+async def _close_on_disconnect(websocket: WebSocket, subscriber: Subscriber):
+    """Notice a client going away even while no events are being sent."""
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+    except Exception:
+        pass
+    subscriber.close(discard=True)
 
 
 @router.websocket("/{debate_id}/ws")
-async def debate_websocket(websocket: WebSocket, debate_id: str):
-    """WebSocket endpoint for real-time debate streaming."""
+async def debate_websocket(
+    websocket: WebSocket,
+    debate_id: str,
+    since: int = 0,
+    encoding: str = "json",
+    coalesce_ms: Optional[float] = None,
+    coalesce_bytes: Optional[int] = None,
+    slow_policy: Optional[SlowConsumerPolicy] = None
+):
+    """
+    WebSocket endpoint for real-time debate streaming.
+    
+    Every viewer of a debate subscribes to the same run, which keeps going
+    in the background when viewers disconnect. Each event carries a "seq"
+    number; a client reconnecting with ?since=<seq> receives only the events
+    after it, or a "resync" snapshot if those have left the log. Clients may opt
+    into a compact encoding ("compact-json" or "msgpack"), tune how long
+    streamed chunks are merged, and choose what happens when they fall
+    behind (coalesce, drop or disconnect). With several workers, events of
+    a debate running on another worker are relayed from it.
+    """
     await websocket.accept()
     
-    if debate_id not in active_debates:
-        await websocket.send_json({"error": "Debate not found"})
-        await websocket.close()
+    encoder = get_encoder(encoding)
+    if encoder is None:
+        await websocket.send_json({"error": f"Unsupported encoding: {encoding}"})
+        await websocket.close(code=1003)
         return
     
-    orchestrator = active_debates[debate_id]
+    owner = await cluster.locate(debate_id)
+    if owner is not None:
+        # Another worker runs this debate; relay its events
+        hub = RemoteHub(owner, debate_id)
+    else:
+        orchestrator = await sessions.get(debate_id)
+        if orchestrator is None:
+            await websocket.send_json({"error": "Debate not found"})
+            await websocket.close()
+            return
+        hub = hubs.get_or_create(debate_id, orchestrator)
+    subscriber = hub.subscribe(since=since, policy=slow_policy)
+    watcher = asyncio.create_task(_close_on_disconnect(websocket, subscriber))
     
+    send_latency = WS_SEND.labels(encoding)
     try:
-        # Run the debate and stream responses
-        async for event in orchestrator.run_debate():
-            await websocket.send_json(event)
+        async for event in coalesce_events(subscriber, coalesce_ms, coalesce_bytes):
+            sent_at = time.perf_counter()
+            await encoder.send(websocket, event)
+            send_latency.observe(time.perf_counter() - sent_at)
+        if subscriber.close_reason:
+            await websocket.send_json({"type": "error", "error": subscriber.close_reason})
     except WebSocketDisconnect:
-        orchestrator.pause()
+        pass
     except Exception as e:
         await websocket.send_json({"error": str(e)})
     finally:
-        await websocket.close()
+        watcher.cancel()
+        hub.unsubscribe(subscriber)
+        if websocket.client_state != WebSocketState.DISCONNECTED:
+            await websocket.close()
@@ -1,6 +1,9 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
-from app.models import ProviderType, ModelInfo
+from app.models import ProviderType, ModelInfo, ModelCapabilities
+from app.providers.capabilities import capability_registry
 from app.providers.factory import ProviderFactory
+from app.services.catalog import model_catalog
 
 router = APIRouter()
 
@@ -15,23 +18,35 @@ async def list_providers() -> list[str]:
 async def list_models(provider: ProviderType) -> list[ModelInfo]:
     """List available models for a specific provider."""
     try:
-        provider_instance = ProviderFactory.get_provider(provider)
-        return await provider_instance.list_models()
+        return await model_catalog.get_models(provider)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{provider}/models/{model:path}/capabilities")
+async def get_model_capabilities(provider: ProviderType, model: str) -> ModelCapabilities:
+    """What a model accepts, probing it first if it has not been seen before."""
+    instance = ProviderFactory.get_provider(provider)
+    return await capability_registry.ensure(provider.value, model, instance.probe_capabilities)
+
+
+async def _provider_status(provider_type: ProviderType) -> dict:
+    try:
+        provider = ProviderFactory.get_provider(provider_type)
+        available = provider.is_available()
+        return {
+            "available": available,
+            "models": await model_catalog.get_models(provider_type) if available else []
+        }
+    except Exception:
+        return {"available": False, "models": []}
+
+
 @router.get("/available")
 async def list_available_providers() -> dict:
     """List providers with their availability status."""
-    availability = {}
-    for provider_type in ProviderType:
-        try:
-            provider = ProviderFactory.get_provider(provider_type)
-            availability[provider_type.value] = {
-                "available": provider.is_available(),
-                "models": await provider.list_models() if provider.is_available() else []
-            }
-        except Exception:
-            availability[provider_type.value] = {"available": False, "models": []}
-    return availability
+    # Availability comes from the background prober and models from the
+    # catalog cache, so this only waits on upstream for a cold catalog
+    provider_types = list(ProviderType)
+    statuses = await asyncio.gather(*(_provider_status(p) for p in provider_types))
+    return {p.value: status for p, status in zip(provider_types, statuses)}
@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+from app.models import TournamentSpec, TournamentProgress
+from app.services.tournament import tournaments
+
+router = APIRouter()
+
+
+@router.post("/start")
+async def start_tournament(spec: TournamentSpec) -> TournamentProgress:
+    """Start a tournament in the background, resuming it if its results file exists."""
+    runner = tournaments.start(spec)
+    return runner.progress
+
+
+@router.get("/{name}")
+async def get_tournament(name: str) -> TournamentProgress:
+    """Progress and throughput of a tournament."""
+    runner = tournaments.get(name)
+    if runner is None:
+        return {"error": "Tournament not found"}
+    return runner.progress
+
+
+@router.post("/{name}/cancel")
+async def cancel_tournament(name: str) -> dict:
+    """Stop a running tournament. Finished debates stay in its results file."""
+    if not await tournaments.cancel(name):
+        return {"error": "Tournament not running"}
+    return {"message": "Tournament cancelled"}
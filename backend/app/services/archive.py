@@ -0,0 +1,296 @@
+import json
+import uuid
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Iterator, Optional, Protocol
+
+from app.models import DebateConfig, DebateExport, DebateState, DebateStatus, DebateTurn
+from app.services.store import DebateStore, turn_dict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Debate archives are NDJSON: a header line, then each debate's line
+# followed by one line per turn, so neither side holds more than one
+# debate in memory
+ARCHIVE_FORMAT = "aivsai-debates"
+ARCHIVE_VERSION = 1
+
+COMPRESSION_MEDIA_TYPES = {
+    "none": "application/x-ndjson",
+    "gzip": "application/gzip",
+    "zstd": "application/zstd",
+}
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Imported turns are written out at least this often, bounding what the store queues
+IMPORT_FLUSH_TURNS = 1000
+MAX_LINE_BYTES = 16 * 1024 * 1024
+# Most decompressed bytes produced at once, however well the upload compresses
+DECOMPRESS_CHUNK = 1024 * 1024
+ZSTD_INPUT_CHUNK = 16 * 1024
+
+
+class ArchiveError(ValueError):
+    """An archive that can't be imported, with the line it failed on."""
+    
+    def __init__(self, message: str, line: int = 0):
+        super().__init__(f"Line {line}: {message}" if line else message)
+        self.line = line
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+    def flush(self) -> bytes: ...
+
+
+class Decompressor(Protocol):
+    def decompress(self, data: bytes) -> Iterator[bytes]: ...
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+    
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        yield data
+    
+    def flush(self) -> bytes:
+        return b""
+
+
+class _GzipDecompressor:
+    def __init__(self):
+        self._decompressor = zlib.decompressobj(31)
+    
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            yield self._decompressor.decompress(data, DECOMPRESS_CHUNK)
+            data = self._decompressor.unconsumed_tail
+
+
+class _ZstdCompressor:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor().compressobj()
+    
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdDecompressor:
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+    
+    def decompress(self, data: bytes) -> Iterator[bytes]:
+        # The zstd object has no output limit; feeding it small pieces bounds the output instead
+        for start in range(0, len(data), ZSTD_INPUT_CHUNK):
+            yield self._decompressor.decompress(data[start:start + ZSTD_INPUT_CHUNK])
+
+
+def get_compressor(name: str) -> Optional[Compressor]:
+    """
+    A streaming compressor for an archive, or None for unknown names and
+    for zstd when the optional package is not installed.
+    """
+    if name == "none":
+        return _Identity()
+    if name == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)
+    if name == "zstd" and zstandard is not None:
+        return _ZstdCompressor()
+    return None
+
+
+def get_decompressor(name: str) -> Optional[Decompressor]:
+    if name == "none":
+        return _Identity()
+    if name == "gzip":
+        return _GzipDecompressor()
+    if name == "zstd" and zstandard is not None:
+        return _ZstdDecompressor()
+    return None
+
+
+def sniff_compression(head: bytes) -> str:
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return "none"
+
+
+def _line(record: dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def debate_lines(debate_id: str, config_json: str, status: str, turns: list[tuple]) -> bytes:
+    """One debate's archive lines, splicing in its stored config JSON as is."""
+    head = f'{{"debate":{json.dumps(debate_id)},"status":{json.dumps(status)},"config":{config_json}}}\n'
+    return head.encode("utf-8") + b"".join(_line({"turn": turn_dict(*turn)}) for turn in turns)
+
+
+async def export_archive(
+    store: DebateStore,
+    debate_ids: list[str],
+    compression: str = "none"
+) -> AsyncIterator[bytes]:
+    """Stream the given debates as a compressed archive, reading one debate at a time."""
+    compressor = get_compressor(compression)
+    if compressor is None:
+        raise ArchiveError(f"Unsupported compression: {compression}")
+    header = {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION, "exported_at": datetime.now().isoformat()}
+    yield compressor.compress(_line(header))
+    for debate_id in debate_ids:
+        found = await store.read_rows(debate_id)
+        if found is None:
+            # Deleted since it was listed
+            continue
+        data = compressor.compress(debate_lines(debate_id, *found))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _lines(body: AsyncIterable[bytes], compression: Optional[str]) -> AsyncIterator[bytes]:
+    """Decompressed lines of a request body, without holding more than one line."""
+    decompressor = None
+    pending = b""
+    async for data in body:
+        if decompressor is None:
+            if not data:
+                continue
+            name = compression or sniff_compression(data)
+            decompressor = get_decompressor(name)
+            if decompressor is None:
+                raise ArchiveError(f"Unsupported compression: {name}")
+        pieces = decompressor.decompress(data)
+        while True:
+            try:
+                piece = next(pieces, None)
+            except Exception as e:
+                raise ArchiveError(f"Corrupt compressed data: {e}")
+            if piece is None:
+                break
+            *lines, pending = (pending + piece).split(b"\n")
+            if len(pending) > MAX_LINE_BYTES:
+                raise ArchiveError(f"A line is longer than {MAX_LINE_BYTES} bytes")
+            for line in lines:
+                yield line
+    if pending:
+        yield pending
+
+
+class ArchiveImport:
+    """
+    Writes the debates of an archive to the store as they are read.
+
+    Debates keep their ids, so an interrupted import can be sent again:
+    debates the store already has are skipped. A running debate is
+    imported as paused. Plain DebateExport documents, one per line, are
+    accepted as well and given new ids.
+    """
+    
+    def __init__(self, store: DebateStore):
+        self.store = store
+        self.imported = 0
+        self.skipped = 0
+        self.turns = 0
+        self._existing: set[str] = set()
+        self._debate_id: Optional[str] = None  # Debate the following turn lines belong to
+        self._skipping = False  # The current debate is already stored; ignore its turns
+        self._next_turn = 1
+        self._unflushed = 0
+    
+    def result(self) -> dict[str, int]:
+        return {"imported": self.imported, "skipped": self.skipped, "turns": self.turns}
+    
+    async def run(self, body: AsyncIterable[bytes], compression: Optional[str] = None) -> dict[str, int]:
+        self._existing = set(await self.store.debate_ids())
+        number = 0
+        header_seen = False
+        try:
+            async for line in _lines(body, compression):
+                number += 1
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not header_seen:
+                        self._check_header(record)
+                        header_seen = True
+                    else:
+                        await self._add(record)
+                except ArchiveError as e:
+                    raise ArchiveError(str(e), number)
+                except ValueError as e:
+                    # Malformed JSON or a record that fails validation
+                    raise ArchiveError(f"Invalid record: {e}", number)
+            if not header_seen:
+                raise ArchiveError("Empty archive")
+        finally:
+            await self.store.flush()
+        return self.result()
+    
+    @staticmethod
+    def _check_header(record: Any):
+        if not isinstance(record, dict) or record.get("format") != ARCHIVE_FORMAT:
+            raise ArchiveError(f"Not a {ARCHIVE_FORMAT} archive")
+        version = record.get("version")
+        if not isinstance(version, int) or version > ARCHIVE_VERSION:
+            raise ArchiveError(f"Unsupported archive version {version}; this server reads up to {ARCHIVE_VERSION}")
+    
+    async def _add(self, record: Any):
+        if not isinstance(record, dict):
+            raise ArchiveError("Expected a JSON object")
+        if "turn" in record:
+            if self._skipping:
+                return
+            if self._debate_id is None:
+                raise ArchiveError("Turn before any debate")
+            await self._append_turn(DebateTurn.model_validate(record["turn"]))
+        elif "debate" in record:
+            await self._start_debate(
+                str(record["debate"]),
+                DebateConfig.model_validate(record.get("config")),
+                DebateStatus(record.get("status", DebateStatus.IDLE.value))
+            )
+        elif "config" in record:
+            export = DebateExport.model_validate(record)
+            await self._start_debate(str(uuid.uuid4()), export.config, DebateStatus.IDLE)
+            if not self._skipping:
+                for turn in export.turns:
+                    await self._append_turn(turn)
+        else:
+            raise ArchiveError("Unknown record")
+    
+    async def _start_debate(self, debate_id: str, config: DebateConfig, status: DebateStatus):
+        self._skipping = debate_id in self._existing
+        if self._skipping:
+            self.skipped += 1
+            return
+        if status == DebateStatus.RUNNING:
+            # Nothing is running it here; resuming carries on from its last turn
+            status = DebateStatus.PAUSED
+        await self.store.save_debate(DebateState(id=debate_id, config=config, status=status))
+        self._existing.add(debate_id)
+        self._debate_id = debate_id
+        self._next_turn = 1
+        self.imported += 1
+    
+    async def _append_turn(self, turn: DebateTurn):
+        if turn.turn_number != self._next_turn:
+            raise ArchiveError(f"Expected turn {self._next_turn}, got {turn.turn_number}")
+        self._next_turn += 1
+        self.store.append_turn(self._debate_id, turn)
+        self.turns += 1
+        self._unflushed += 1
+        if self._unflushed >= IMPORT_FLUSH_TURNS:
+            self._unflushed = 0
+            await self.store.flush()
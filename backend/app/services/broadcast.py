@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from collections import deque
+from enum import Enum
+from typing import Any, Optional
+
+from app.config import settings
+from app.services.debate import DebateOrchestrator
+from app.services.streaming import merge_chunks, CHUNK_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(str, Enum):
+    COALESCE = "coalesce"  # Merge queued chunks into fewer, larger ones
+    DROP = "drop"  # Drop intermediate chunks; turn_completed still carries the full text
+    DISCONNECT = "disconnect"  # Close the subscriber
+
+
+class Subscriber:
+    """One viewer's bounded event queue, fed by a DebateHub."""
+    
+    def __init__(self, max_queue: int, policy: SlowConsumerPolicy):
+        self.max_queue = max_queue
+        self.policy = policy
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self._queue: deque[dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+    
+    def push(self, event: dict[str, Any]):
+        if self.closed:
+            return
+        if len(self._queue) >= self.max_queue and not self._make_room(event):
+            return
+        self._queue.append(event)
+        self._ready.set()
+    
+    def _make_room(self, event: dict[str, Any]) -> bool:
+        """Apply the slow-consumer policy. Returns whether the event should still be queued."""
+        if self.policy == SlowConsumerPolicy.COALESCE:
+            self._queue = deque(merge_chunks(list(self._queue)))
+            if len(self._queue) < self.max_queue:
+                return True
+        elif self.policy == SlowConsumerPolicy.DROP:
+            if event.get("type") in CHUNK_EVENTS:
+                return False
+            self._queue = deque(e for e in self._queue if e.get("type") not in CHUNK_EVENTS)
+            if len(self._queue) < self.max_queue:
+                return True
+        
+        logger.warning("Disconnecting slow debate subscriber")
+        self.close("Subscriber too slow", discard=True)
+        return False
+    
+    def preload(self, events: list[dict[str, Any]]):
+        """Queue a replay of missed events, merged so a long catch-up is never over the limit."""
+        self._queue.extend(merge_chunks(events))
+        if self._queue:
+            self._ready.set()
+    
+    def close(self, reason: Optional[str] = None, discard: bool = False):
+        """Stop receiving events. Queued events are still delivered unless discarded."""
+        self.closed = True
+        self.close_reason = reason
+        if discard:
+            self._queue.clear()
+        self._ready.set()
+    
+    async def get(self) -> Optional[dict[str, Any]]:
+        """Next event, or None once the subscriber is closed and drained."""
+        while not self._queue:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+    
+    def drain(self) -> list[dict[str, Any]]:
+        """Take every event queued right now without waiting."""
+        events = list(self._queue)
+        self._queue.clear()
+        return events
+
+
+class DebateHub:
+    """
+    Runs one debate and fans its events out to any number of subscribers.
+
+    A single background task drives the orchestrator, so extra viewers never
+    start extra runs, a slow viewer never stalls the provider stream, and a
+    viewer going away never pauses or restarts a turn. Every event gets a
+    sequence number and recent events are kept in a log, so a client that
+    reconnects with the last number it saw receives only what it missed.
+    """
+    
+    def __init__(self, orchestrator: DebateOrchestrator, buffer_size: Optional[int] = None):
+        self.orchestrator = orchestrator
+        self.log: deque[dict[str, Any]] = deque(maxlen=buffer_size or settings.hub_buffer_size)
+        self.last_seq = 0
+        self.subscribers: set[Subscriber] = set()
+        self._producer: Optional[asyncio.Task] = None
+        self.finished = False
+    
+    def start(self):
+        """Start the debate in the background if it is not already running."""
+        if self._producer is None and not self.finished:
+            self._producer = asyncio.create_task(self._produce())
+    
+    async def stop(self):
+        """Cancel the background run, e.g. on server shutdown."""
+        if self._producer is not None and not self._producer.done():
+            self._producer.cancel()
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                pass
+    
+    def _resync_event(self) -> dict[str, Any]:
+        """Snapshot for a client whose missed events are no longer in the log."""
+        return {
+            "type": "resync",
+            "state": self.orchestrator.get_state().model_dump(mode="json"),
+            "partial_turn": self.orchestrator.partial_turn(),
+            # Both turns of a parallel round; partial_turn is the first of them
+            "partial_turns": self.orchestrator.partial_turns(),
+            "seq": self.last_seq
+        }
+    
+    def subscribe(
+        self,
+        since: int = 0,
+        policy: Optional[SlowConsumerPolicy] = None,
+        max_queue: Optional[int] = None
+    ) -> Subscriber:
+        """
+        Add a viewer, replaying every logged event after sequence number `since`.
+
+        Args:
+            since: Last sequence number the client has seen, 0 for a new client
+            policy: What to do when the viewer falls behind
+            max_queue: Events the viewer may have queued before the policy applies
+        """
+        subscriber = Subscriber(
+            max_queue or settings.subscriber_queue_size,
+            policy or SlowConsumerPolicy(settings.slow_consumer_policy)
+        )
+        if since > self.last_seq:
+            # The client saw an earlier run of this debate, e.g. before it was reloaded
+            subscriber.preload([self._resync_event()])
+        elif since < self.last_seq:
+            first_seq = self.log[0]["seq"] if self.log else self.last_seq + 1
+            if first_seq > since + 1:
+                subscriber.preload([self._resync_event()])
+            else:
+                subscriber.preload([e for e in self.log if e["seq"] > since])
+        
+        if self.finished:
+            subscriber.close()
+            return subscriber
+        
+        self.subscribers.add(subscriber)
+        self.orchestrator.streaming = True
+        self.start()
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        subscriber.close()
+        if not self.subscribers:
+            # Nobody is watching; later turns arrive whole
+            self.orchestrator.streaming = False
+    
+    def publish(self, event: dict[str, Any]):
+        self.last_seq += 1
+        event["seq"] = self.last_seq
+        self.log.append(event)
+        for subscriber in list(self.subscribers):
+            subscriber.push(event)
+            if subscriber.closed:
+                self.subscribers.discard(subscriber)
+    
+    async def _produce(self):
+        try:
+            async for event in self.orchestrator.run_debate():
+                self.publish(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Debate {self.orchestrator.state.id} failed: {e}")
+            self.publish({"type": "error", "error": str(e)})
+        finally:
+            self.finished = True
+            for subscriber in list(self.subscribers):
+                subscriber.close()
+            self.subscribers.clear()
+
+
+class HubRegistry:
+    """One hub per debate id."""
+    
+    def __init__(self):
+        self._hubs: dict[str, DebateHub] = {}
+    
+    def get_or_create(self, debate_id: str, orchestrator: DebateOrchestrator) -> DebateHub:
+        hub = self._hubs.get(debate_id)
+        if hub is None or hub.orchestrator is not orchestrator:
+            hub = DebateHub(orchestrator)
+            self._hubs[debate_id] = hub
+        return hub
+    
+    def get(self, debate_id: str) -> Optional[DebateHub]:
+        return self._hubs.get(debate_id)
+    
+    def remove(self, debate_id: str):
+        self._hubs.pop(debate_id, None)
+    
+    async def shutdown(self):
+        """Stop every running debate."""
+        await asyncio.gather(*(hub.stop() for hub in self._hubs.values()))
+
+
+hubs = HubRegistry()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.config import settings
+from app.models import ProviderType, ModelInfo
+from app.providers.factory import ProviderFactory
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCatalog:
+    """
+    Cached model lists per provider.
+
+    Fresh entries are served straight from memory. Stale entries are still
+    served while a background refresh runs, and concurrent refreshes for the
+    same provider share a single upstream request.
+    """
+    
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl or settings.provider_models_ttl
+        self._models: dict[ProviderType, list[ModelInfo]] = {}
+        self._fetched_at: dict[ProviderType, float] = {}
+        self._inflight: dict[ProviderType, asyncio.Task] = {}
+    
+    async def _fetch(self, provider_type: ProviderType) -> list[ModelInfo]:
+        try:
+            provider = ProviderFactory.get_provider(provider_type)
+            models = await provider.list_models()
+        except Exception as e:
+            logger.warning(f"Failed to list models for {provider_type.value}: {e}")
+            # Keep serving whatever we had before
+            return self._models.get(provider_type, [])
+        self._models[provider_type] = models
+        self._fetched_at[provider_type] = time.monotonic()
+        return models
+    
+    def refresh(self, provider_type: ProviderType) -> asyncio.Task:
+        """Start a refresh, or join the one already in flight."""
+        task = self._inflight.get(provider_type)
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch(provider_type))
+            self._inflight[provider_type] = task
+            task.add_done_callback(lambda t: self._forget(provider_type, t))
+        return task
+    
+    def _forget(self, provider_type: ProviderType, task: asyncio.Task):
+        if self._inflight.get(provider_type) is task:
+            del self._inflight[provider_type]
+    
+    async def get_models(self, provider_type: ProviderType) -> list[ModelInfo]:
+        """Get models for a provider, only waiting on upstream for a cold cache."""
+        if provider_type not in self._models:
+            # shield() so one cancelled caller doesn't cancel the shared fetch
+            return await asyncio.shield(self.refresh(provider_type))
+        
+        if time.monotonic() - self._fetched_at.get(provider_type, 0.0) >= self.ttl:
+            self.refresh(provider_type)
+        return self._models[provider_type]
+    
+    def invalidate(self, provider_type: Optional[ProviderType] = None):
+        """Force the next lookup to hit upstream."""
+        if provider_type is None:
+            self._fetched_at.clear()
+        else:
+            self._fetched_at.pop(provider_type, None)
+
+
+model_catalog = ModelCatalog()
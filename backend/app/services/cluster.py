@@ -0,0 +1,357 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from app.config import settings
+from app.services.broadcast import hubs, SlowConsumerPolicy, Subscriber
+from app.services.sessions import sessions
+from app.services.streaming import get_encoder
+
+logger = logging.getLogger(__name__)
+
+# Events a relay may have queued before the owner starts merging chunks
+RELAY_QUEUE_SIZE = 4096
+
+_encode_event = get_encoder("json").encode
+
+
+class OwnerUnreachable(Exception):
+    """The worker running a debate can't be reached, and no other worker could take it over."""
+    pass
+
+
+async def control_debate(debate_id: str, action: str) -> dict[str, Any]:
+    """Apply a control action to a debate this worker runs."""
+    orchestrator = await sessions.get(debate_id)
+    if orchestrator is None:
+        return {"error": "Debate not found"}
+    
+    if action == "pause":
+        orchestrator.pause()
+    elif action == "resume":
+        orchestrator.resume()
+    elif action == "next-turn":
+        message = "Turn triggered" if orchestrator.trigger() else "Debate is not waiting for a turn"
+        return {"message": message, "current_debater": orchestrator.state.current_debater}
+    elif action != "state":
+        return {"error": f"Unknown action: {action}"}
+    return orchestrator.get_state().model_dump(mode="json")
+
+
+class OwnershipTable:
+    """
+    Which worker runs which debate, shared by every worker on the host.
+
+    Workers heartbeat a row with the address of their socket; a debate
+    whose owner stops heartbeating may be claimed by any other worker,
+    which then reloads it from the debate store.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            address TEXT NOT NULL,
+            heartbeat REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS owners (
+            debate_id TEXT PRIMARY KEY,
+            worker_id TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, path: Path, worker_id: str, address: str):
+        self.path = path
+        self.worker_id = worker_id
+        self.address = address
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+    
+    def _heartbeat(self):
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO workers (worker_id, address, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET address = excluded.address, heartbeat = excluded.heartbeat",
+                (self.worker_id, self.address, time.time())
+            )
+    
+    def _leave(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM owners WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+    
+    def _expire(self, worker_id: str):
+        with self._lock:
+            self._connect().execute("UPDATE workers SET heartbeat = 0 WHERE worker_id = ?", (worker_id,))
+    
+    def _claim(self, debate_id: str) -> tuple[str, str]:
+        """Take the debate unless a live worker owns it. Returns the owner and its address."""
+        alive_since = time.time() - settings.cluster_owner_timeout
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT w.worker_id, w.address, w.heartbeat FROM owners o "
+                    "LEFT JOIN workers w ON w.worker_id = o.worker_id WHERE o.debate_id = ?",
+                    (debate_id,)
+                ).fetchone()
+                if row is not None and row[0] is not None and row[2] >= alive_since:
+                    owner = (row[0], row[1])
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO owners (debate_id, worker_id) VALUES (?, ?)",
+                        (debate_id, self.worker_id)
+                    )
+                    owner = (self.worker_id, self.address)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return owner
+    
+    async def heartbeat(self):
+        await asyncio.to_thread(self._heartbeat)
+    
+    async def leave(self):
+        await asyncio.to_thread(self._leave)
+    
+    async def claim(self, debate_id: str) -> tuple[str, str]:
+        return await asyncio.to_thread(self._claim, debate_id)
+    
+    async def expire(self, worker_id: str):
+        """
+        Treat a worker as dead, so its debates can be claimed now rather
+        than after cluster_owner_timeout. A live worker's next heartbeat
+        undoes this.
+        """
+        await asyncio.to_thread(self._expire, worker_id)
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class RemoteHub:
+    """
+    Stand-in for a DebateHub whose debate runs on another worker.
+
+    Each subscriber gets its own connection to the owner's socket; events
+    arrive with the owner's sequence numbers, so ?since works across workers.
+    """
+    
+    def __init__(self, address: str, debate_id: str):
+        self.address = address
+        self.debate_id = debate_id
+        self._relays: dict[Subscriber, asyncio.Task] = {}
+    
+    def subscribe(
+        self,
+        since: int = 0,
+        policy: Optional[SlowConsumerPolicy] = None,
+        max_queue: Optional[int] = None
+    ) -> Subscriber:
+        subscriber = Subscriber(
+            max_queue or settings.subscriber_queue_size,
+            policy or SlowConsumerPolicy(settings.slow_consumer_policy)
+        )
+        self._relays[subscriber] = asyncio.create_task(self._relay(subscriber, since))
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.close()
+        relay = self._relays.pop(subscriber, None)
+        if relay is not None:
+            relay.cancel()
+    
+    async def _relay(self, subscriber: Subscriber, since: int):
+        writer = None
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.address, limit=2 ** 24)
+            request = {"op": "subscribe", "debate_id": self.debate_id, "since": since}
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            while line := await reader.readline():
+                subscriber.push(json.loads(line))
+            subscriber.close()
+        except asyncio.CancelledError:
+            raise
+        except (OSError, ValueError) as e:
+            logger.warning(f"Lost event relay for debate {self.debate_id}: {e}")
+            subscriber.close("Lost connection to the worker running this debate")
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+class ClusterNode:
+    """
+    Lets several uvicorn workers serve the same debates.
+
+    The worker that creates or first reloads a debate owns it and is the
+    only one running it. Other workers relay its events to their own
+    WebSocket viewers and forward control requests to it over the owner's
+    Unix socket. Disabled (the default), every call is local and free.
+    """
+    
+    def __init__(self, enabled: Optional[bool] = None, directory: Optional[str] = None):
+        self.enabled = settings.cluster_enabled if enabled is None else enabled
+        self.directory = Path(directory or settings.cluster_dir)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.address = str(self.directory / f"{self.worker_id}.sock")
+        self.owners = OwnershipTable(self.directory / "owners.db", self.worker_id, self.address)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        if not self.enabled:
+            return
+        if settings.debate_store != "sqlite":
+            logger.warning("Cluster mode needs the sqlite debate store; other workers cannot load these debates")
+        self.directory.mkdir(parents=True, exist_ok=True)
+        Path(self.address).unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.address, limit=2 ** 20)
+        await self.owners.heartbeat()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        logger.info(f"Cluster worker {self.worker_id} listening on {self.address}")
+    
+    async def stop(self):
+        if not self.enabled:
+            return
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            Path(self.address).unlink(missing_ok=True)
+        # Hand our debates to whichever worker is asked about them next
+        await self.owners.leave()
+        self.owners.close()
+    
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.cluster_heartbeat_interval)
+            try:
+                await self.owners.heartbeat()
+            except sqlite3.Error as e:
+                logger.warning(f"Cluster heartbeat failed: {e}")
+    
+    async def claim(self, debate_id: str):
+        """Record this worker as the owner of a debate it just created."""
+        if self.enabled:
+            await self.owners.claim(debate_id)
+    
+    async def _remote_owner(self, debate_id: str) -> Optional[tuple[str, str]]:
+        """Worker id and socket address of the worker running a debate, or None if it is this one."""
+        if not self.enabled or hubs.get(debate_id) is not None:
+            return None
+        worker_id, address = await self.owners.claim(debate_id)
+        return None if worker_id == self.worker_id else (worker_id, address)
+    
+    async def locate(self, debate_id: str) -> Optional[str]:
+        """
+        Socket address of the worker running a debate, or None if it is this one.
+
+        A debate without a live owner is claimed by this worker.
+        """
+        owner = await self._remote_owner(debate_id)
+        return None if owner is None else owner[1]
+    
+    async def control(self, debate_id: str, action: str) -> dict[str, Any]:
+        """
+        Run a control action on the debate's owner, wherever it is.
+
+        An owner that can't be reached is marked dead and the debate is
+        taken over here. Raises OwnerUnreachable if another worker claims
+        it first and can't be reached either.
+        """
+        for _ in range(2):
+            owner = await self._remote_owner(debate_id)
+            if owner is None:
+                return await control_debate(debate_id, action)
+            worker_id, address = owner
+            try:
+                return await self._send_control(address, debate_id, action)
+            except (OSError, ValueError) as e:
+                # Includes a refused connection and a stale socket file
+                logger.warning(f"Worker {worker_id} running debate {debate_id} is unreachable: {e}")
+                await self.owners.expire(worker_id)
+        raise OwnerUnreachable(f"The worker running debate {debate_id} is unreachable")
+    
+    @staticmethod
+    async def _send_control(address: str, debate_id: str, action: str) -> dict[str, Any]:
+        reader, writer = await asyncio.open_unix_connection(address)
+        try:
+            request = {"op": "control", "debate_id": debate_id, "action": action}
+            writer.write(json.dumps(request).encode("utf-8") + b"\n")
+            await writer.drain()
+            return json.loads(await reader.readline())
+        finally:
+            writer.close()
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = json.loads(await reader.readline())
+            if request.get("op") == "subscribe":
+                await self._serve_subscription(request, reader, writer)
+            elif request.get("op") == "control":
+                result = await control_debate(request["debate_id"], request["action"])
+                writer.write(json.dumps(result).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Bad cluster request: {e}")
+        finally:
+            writer.close()
+    
+    async def _serve_subscription(self, request: dict, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        orchestrator = await sessions.get(request["debate_id"])
+        if orchestrator is None:
+            writer.write(json.dumps({"type": "error", "error": "Debate not found"}).encode("utf-8") + b"\n")
+            return
+        
+        hub = hubs.get_or_create(request["debate_id"], orchestrator)
+        # The viewer's own worker applies its slow-consumer policy; here chunks are only merged
+        subscriber = hub.subscribe(
+            since=request.get("since", 0),
+            policy=SlowConsumerPolicy.COALESCE,
+            max_queue=RELAY_QUEUE_SIZE
+        )
+        
+        async def close_on_eof():
+            await reader.read()
+            subscriber.close(discard=True)
+        
+        watcher = asyncio.create_task(close_on_eof())
+        try:
+            while (event := await subscriber.get()) is not None:
+                writer.write(_encode_event(event).encode("utf-8") + b"\n")
+                for queued in subscriber.drain():
+                    writer.write(_encode_event(queued).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            watcher.cancel()
+            hub.unsubscribe(subscriber)
+
+
+cluster = ClusterNode()
@@ -0,0 +1,135 @@
+import bisect
+import logging
+import math
+import re
+from typing import Callable
+
+from app.models import DebateConfig, ContextPolicy, TranscriptView
+
+logger = logging.getLogger(__name__)
+
+TokenEstimator = Callable[[str], int]
+
+_token_estimators: dict[str, TokenEstimator] = {}
+
+SUMMARY_HEADER = "\n\nSummary of the earlier debate:\n"
+SUMMARY_MAX_CHARS = 2000  # Oldest summary lines are dropped beyond this
+SUMMARY_LINE_CHARS = 200
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def register_token_estimator(name: str, estimator: TokenEstimator):
+    """Register a local token estimator that DebateConfig.token_estimator can name."""
+    _token_estimators[name] = estimator
+
+
+def get_token_estimator(name: str) -> TokenEstimator:
+    if name not in _token_estimators:
+        logger.warning(f"Unknown token estimator '{name}', using 'chars'")
+        return _token_estimators["chars"]
+    return _token_estimators[name]
+
+
+# Roughly 4 characters per token for English text across the major tokenizers
+register_token_estimator("chars", lambda text: math.ceil(len(text) / 4))
+register_token_estimator("words", lambda text: math.ceil(len(text.split()) * 1.3))
+
+try:
+    import tiktoken
+    
+    _encoding = tiktoken.get_encoding("cl100k_base")
+    register_token_estimator("tiktoken", lambda text: len(_encoding.encode(text)))
+except ImportError:
+    pass
+
+
+def summarize_turn(content: str) -> str:
+    """Extractive one-line summary of a turn: its first sentence, capped in length."""
+    first = _SENTENCE_END.split(content.strip(), maxsplit=1)[0]
+    first = " ".join(first.split())
+    if len(first) > SUMMARY_LINE_CHARS:
+        first = first[:SUMMARY_LINE_CHARS - 3].rstrip() + "..."
+    return first
+
+
+class ContextWindow:
+    """
+    Chooses which part of one debater's transcript is sent each turn.
+
+    Token counts and summary lines are computed once per message as the
+    transcript grows, so selecting the window costs the same on turn 100
+    as on turn 2. Nothing here makes a network call.
+    """
+    
+    def __init__(self, config: DebateConfig, view: TranscriptView, preamble: int = 0):
+        """
+        Args:
+            config: Debate configuration holding the context policy
+            view: The debater's full transcript
+            preamble: Leading chat messages that are prompts rather than turns
+        """
+        self.config = config
+        self.view = view
+        self.preamble = preamble
+        self._estimate = get_token_estimator(config.token_estimator)
+        self._system_tokens = self._estimate(view.system_prompt)
+        # _prefix_tokens[i] is the token count of chat messages [0, i)
+        self._prefix_tokens: list[int] = [0]
+        self._summary_lines: list[str] = []
+        self._summary_chars = 0
+        self._summarized = preamble  # Chat messages folded into the summary
+    
+    def _count_new_messages(self):
+        chat = self.view.chat_dicts()
+        for message in chat[len(self._prefix_tokens) - 1:]:
+            self._prefix_tokens.append(self._prefix_tokens[-1] + self._estimate(message["content"]))
+    
+    def _align(self, start: int) -> int:
+        """Never let the window open on our own reply, providers expect a user message first."""
+        chat = self.view.chat_dicts()
+        if start < len(chat) - 1 and chat[start]["role"] == "assistant":
+            start += 1
+        return start
+    
+    def _budget_start(self) -> int:
+        total = self._prefix_tokens[-1]
+        allowed = max(self.config.context_token_budget - self._system_tokens, 0)
+        # Smallest start whose suffix fits in the budget, keeping at least the newest message
+        start = bisect.bisect_left(self._prefix_tokens, total - allowed)
+        return max(min(start, len(self._prefix_tokens) - 2), 0)
+    
+    def _fold_into_summary(self, start: int):
+        chat = self.view.chat_dicts()
+        for message in chat[self._summarized:start]:
+            speaker = "You" if message["role"] == "assistant" else "Your opponent"
+            line = f"- {speaker}: {summarize_turn(message['content'])}"
+            self._summary_lines.append(line)
+            self._summary_chars += len(line) + 1
+        self._summarized = max(self._summarized, start)
+        
+        while self._summary_chars > SUMMARY_MAX_CHARS and len(self._summary_lines) > 1:
+            self._summary_chars -= len(self._summary_lines.pop(0)) + 1
+    
+    def select(self) -> TranscriptView:
+        """The messages to send for the debater's next turn."""
+        policy = self.config.context_policy
+        if policy == ContextPolicy.FULL:
+            return self.view
+        
+        chat_length = len(self.view.chat_dicts())
+        if policy == ContextPolicy.TOKEN_BUDGET:
+            self._count_new_messages()
+            start = self._budget_start()
+        else:
+            start = max(chat_length - self.config.context_window_turns, 0)
+        start = self._align(start)
+        
+        if policy == ContextPolicy.ROLLING_SUMMARY:
+            self._fold_into_summary(start)
+            if self._summary_lines:
+                return self.view.window(start, SUMMARY_HEADER + "\n".join(self._summary_lines))
+        
+        if start == 0:
+            return self.view
+        return self.view.window(start)
@@ -1,17 +1,35 @@
 import uuid
 import asyncio
 import logging
-from typing import AsyncGenerator, Any
+from contextlib import aclosing
+from itertools import groupby
+from typing import AsyncGenerator, Any, Callable, Optional
 from datetime import datetime
 
+from app.config import settings
 from app.models import (
-    DebateConfig, DebateState, DebateTurn, Message,
-    DebateStatus, DebateMode
+    DebateConfig, DebateState, DebateTurn, TranscriptView,
+    DebateStatus, DebateMode, CacheHints, GenerationStats
 )
+from app.models.debate import DebaterConfig
+from app.providers.base import BaseProvider, ProviderError, ThinkingChunk
 from app.providers.factory import ProviderFactory
+from app.providers.ratelimit import QueuedNotice, RateLimitExceeded, current_debate
+from app.providers.replay import REPLAY_CHUNK, current_turn_number
+from app.services.context import ContextWindow
+from app.services.hedging import HedgedResponse
+from app.services.metrics import DebateMetrics, TurnTimer, ERRORS, RETRIES
+from app.services.response_cache import response_cache, make_cache_key
+from app.services.store import DebateStore
 
 logger = logging.getLogger(__name__)
 
+# Content of a turn that produced no text
+NO_RESPONSE = "[No response generated]"
+# Put on a generation's queue when its provider stream ends or is cancelled
+_DONE = object()
+_CANCELLED = object()
+
 
 class DebateOrchestrator:
     """Orchestrates the debate between two AI models."""
@@ -30,24 +48,147 @@ class DebateOrchestrator:
         # Initialize providers
         self.provider_a = ProviderFactory.get_provider(config.debater_a.provider)
         self.provider_b = ProviderFactory.get_provider(config.debater_b.provider)
+        # Applied to every provider a turn uses, hedge fallbacks included; see wrap_providers()
+        self._wrap_provider: Optional[Callable[[BaseProvider, DebaterConfig], BaseProvider]] = None
+        
+        # Per-debater message history, appended to once per completed turn
+        self._views = {"A": self._new_view("A"), "B": self._new_view("B")}
+        # An opening debater's view starts with the opening prompt rather than a turn
+        self._windows = {
+            debater: ContextWindow(config, self._views[debater], preamble=1 if self._opens(debater) else 0)
+            for debater in ("A", "B")
+        }
+        
+        # What each debater was sent last turn, to find the unchanged prefix
+        self._last_prompts: dict[str, tuple[str, dict, int]] = {}
+        self.prompt_cache_stats = {"hits": 0, "misses": 0, "cached_tokens": 0}
+        
+        self._use_response_cache = (
+            config.use_response_cache
+            if config.use_response_cache is not None
+            else settings.response_cache_enabled
+        )
+        self.response_cache_stats = {"hits": 0, "misses": 0}
+        # Latency and throughput of this debate's turns, sent with debate_completed
+        self.metrics = DebateMetrics()
+        
+        # Chunks of the turns being generated, by debater, for clients that join mid-turn
+        self._partials: dict[str, list[str]] = {}
+        
+        # Set by the session registry; receives status changes and completed turns
+        self.store: Optional[DebateStore] = None
+        # Whether turns are streamed chunk by chunk; off when nobody is watching
+        self.streaming = True
+        # Whether running out of rate limit pauses the debate. Runs nobody can
+        # resume, like tournament matches, stop instead and retry themselves
+        self.pause_on_rate_limit = True
+        
+        # Read the provider streams of the turns in progress, by debater; cancelled by stop and pause
+        self._generations: dict[str, asyncio.Task] = {}
         
         self._paused = False
         self._stopped = False
+        # Set whenever pause, resume, stop or a trigger changes what run_debate should do
+        self._control = asyncio.Event()
     
     def get_state(self) -> DebateState:
         return self.state
     
+    def wrap_providers(self, wrap: Callable[[BaseProvider, DebaterConfig], BaseProvider]):
+        """
+        Wrap both debaters' providers, and any hedge fallback a turn starts,
+        e.g. so their requests take concurrency slots first.
+        """
+        self._wrap_provider = wrap
+        self.provider_a = wrap(self.provider_a, self.config.debater_a)
+        self.provider_b = wrap(self.provider_b, self.config.debater_b)
+    
+    def is_generating(self) -> bool:
+        """Whether a provider stream is still being read, e.g. just after a pause."""
+        return any(not task.done() for task in self._generations.values())
+    
+    def partial_turns(self) -> list[dict[str, str]]:
+        """The text generated so far for each turn in progress."""
+        return [{"debater": debater, "content": "".join(chunks)} for debater, chunks in self._partials.items()]
+    
+    def partial_turn(self) -> Optional[dict[str, str]]:
+        """The text generated so far for the turn in progress, if any; the first one in a parallel round."""
+        partials = self.partial_turns()
+        return partials[0] if partials else None
+    
+    def _set_status(self, status: DebateStatus):
+        self.state.status = status
+        if self.store is not None:
+            self.store.set_status(self.state.id, status)
+    
     def pause(self):
         self._paused = True
-        self.state.status = DebateStatus.PAUSED
+        self._set_status(DebateStatus.PAUSED)
+        self._cancel_generation()
+        self._control.set()
     
     def resume(self):
         self._paused = False
-        self.state.status = DebateStatus.RUNNING
+        self._set_status(DebateStatus.RUNNING)
+        self._control.set()
     
     def stop(self):
         self._stopped = True
-        self.state.status = DebateStatus.COMPLETED
+        self._set_status(DebateStatus.COMPLETED)
+        self._cancel_generation()
+        self._control.set()
+    
+    def _cancel_generation(self, debater: Optional[str] = None):
+        """Abort the provider streams of the turns in progress, or one debater's, closing their upstream connections."""
+        for key, task in self._generations.items():
+            if (debater is None or key == debater) and not task.done():
+                task.cancel()
+    
+    def _start_generation(self, debater: str, source: AsyncGenerator[str, None]) -> asyncio.Queue:
+        """Read a provider stream in its own task, so it can be cancelled mid-chunk."""
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def pump():
+            try:
+                async for chunk in source:
+                    queue.put_nowait(chunk)
+                queue.put_nowait(_DONE)
+            except Exception as e:
+                queue.put_nowait(e)
+            finally:
+                await source.aclose()
+        
+        task = self._generations[debater] = asyncio.create_task(pump())
+        # Also covers a task cancelled before it started running
+        task.add_done_callback(lambda task: queue.put_nowait(_CANCELLED) if task.cancelled() else None)
+        return queue
+    
+    def trigger(self) -> bool:
+        """Start the next turn of a debate waiting for one. Returns whether it was waiting."""
+        if not self._paused or self._stopped:
+            return False
+        self.resume()
+        return True
+    
+    async def _wait_while_paused(self):
+        """Block until resumed or stopped, without waking up in between."""
+        while self._paused and not self._stopped:
+            self._control.clear()
+            await self._control.wait()
+    
+    async def _delay(self, seconds: float):
+        """Sleep between auto-mode turns, cut short by pause or stop."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + seconds
+        while not (self._paused or self._stopped):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            self._control.clear()
+            try:
+                await asyncio.wait_for(self._control.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
     
     def _build_system_prompt(self, debater: str) -> str:
         """Build the system prompt for a debater."""
@@ -67,124 +208,472 @@ Rules:
 
 You are Debater {debater}. Your opponent is Debater {opponent}."""
     
-    def _build_messages(self, debater: str) -> list[Message]:
-        """Build the message history for a debater's turn."""
-        messages = [Message(role="system", content=self._build_system_prompt(debater))]
+    def _new_view(self, debater: str) -> TranscriptView:
+        view = TranscriptView(self._build_system_prompt(debater))
+        if self._opens(debater):
+            # An opening debater's history always starts with the opening prompt
+            config = self.config.debater_a if debater == "A" else self.config.debater_b
+            view.append("user", f"Please begin the debate by presenting your opening argument for: {config.position}")
+        return view
+    
+    def _opens(self, debater: str) -> bool:
+        """Whether a debater gives an opening statement: A does, and in parallel mode both do."""
+        return debater == "A" or self.config.mode == DebateMode.PARALLEL
+    
+    def _record_round(self, turns: list[DebateTurn]):
+        """
+        Add the turns of a round to the state and to both debaters' views.
+
+        Each debater sees its own turn first, so in a parallel round its
+        next prompt ends with what the opponent said at the same time.
+        """
+        self.state.turns.extend(turns)
+        for debater, view in self._views.items():
+            # From each debater's perspective
+            for turn in sorted(turns, key=lambda turn: turn.debater != debater):
+                view.append("assistant" if turn.debater == debater else "user", turn.content)
+    
+    def _rounds(self, turns: list[DebateTurn]) -> list[list[DebateTurn]]:
+        """Recorded turns grouped the way they were generated: in pairs in parallel mode."""
+        if self.config.mode != DebateMode.PARALLEL:
+            return [[turn] for turn in turns]
+        return [list(group) for _, group in groupby(turns, key=lambda turn: (turn.turn_number - 1) // 2)]
+    
+    @classmethod
+    def restore(cls, state: DebateState) -> "DebateOrchestrator":
+        """Rebuild a debate from its saved state, e.g. after a restart, keeping its id and status."""
+        orchestrator = cls(state.config)
+        orchestrator.state.id = state.id
+        orchestrator.load_turns(state.turns, seed_response_cache=False)
+        if state.status == DebateStatus.PAUSED:
+            orchestrator.pause()
+        elif state.status == DebateStatus.COMPLETED:
+            orchestrator.stop()
+        return orchestrator
+    
+    def load_turns(self, turns: list[DebateTurn], seed_response_cache: bool = True):
+        """Restore previously recorded turns, e.g. from an imported debate."""
+        for round_turns in self._rounds(turns):
+            if self._use_response_cache and seed_response_cache:
+                # Seed the cache so replaying this debate doesn't call the providers
+                for turn in round_turns:
+                    cache_key = self._response_cache_key(turn.debater, self._build_messages(turn.debater))
+                    response_cache.put_nowait(cache_key, REPLAY_CHUNK.findall(turn.content))
+            self._record_round(round_turns)
+        self.state.current_turn = len(self.state.turns)
+        if self.config.mode == DebateMode.PARALLEL:
+            self.state.current_debater = "A"
+        elif self.state.turns:
+            last_debater = self.state.turns[-1].debater
+            self.state.current_debater = "B" if last_debater == "A" else "A"
+    
+    def _build_messages(self, debater: str) -> TranscriptView:
+        """Get the message history for a debater's turn, trimmed by the context policy."""
+        return self._windows[debater].select()
+    
+    def _cache_hints(self, debater: str, messages: TranscriptView) -> Optional[CacheHints]:
+        """Work out how much of this prompt the debater's previous request already sent."""
+        if not settings.prompt_caching:
+            return None
         
-        # Add conversation history
-        for turn in self.state.turns:
-            # From this debater's perspective
-            if turn.debater == debater:
-                messages.append(Message(role="assistant", content=turn.content))
-            else:
-                messages.append(Message(role="user", content=turn.content))
-        
-        # If this is not the first turn, add a prompt to respond
-        if self.state.turns:
-            last_turn = self.state.turns[-1]
-            if last_turn.debater != debater:
-                # The last message was from opponent, already added as user message
-                pass
+        chat = messages.chat_dicts()
+        prefix_messages = 0
+        previous = self._last_prompts.get(debater)
+        if previous is not None and chat:
+            previous_system, previous_head, previous_length = previous
+            # Windows share message dicts with the full transcript, so an
+            # unchanged prefix starts with the very same object
+            if previous_system == messages.base_system_prompt and previous_head is chat[0]:
+                prefix_messages = min(previous_length, len(chat))
+        if chat:
+            self._last_prompts[debater] = (messages.base_system_prompt, chat[0], len(chat))
+        return CacheHints(prefix_messages=prefix_messages, session_id=f"{self.state.id}:{debater}")
+    
+    def _response_cache_key(self, debater: str, messages: TranscriptView) -> str:
+        config = self.config.debater_a if debater == "A" else self.config.debater_b
+        return make_cache_key(
+            config.provider.value,
+            config.model,
+            messages.as_dicts(),
+            config.temperature,
+            config.max_tokens
+        )
+    
+    async def _replay_cached(self, chunks: list[str]) -> AsyncGenerator[str, None]:
+        """Re-emit cached chunks at the configured rate so clients see a normal stream."""
+        if not self.streaming:
+            yield "".join(chunks)
+            return
+        delay = 1 / settings.response_cache_replay_rate if settings.response_cache_replay_rate > 0 else 0
+        for chunk in chunks:
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+    
+    @staticmethod
+    def _backend_labels(config: DebaterConfig, fallback: bool = False) -> tuple[str, str]:
+        if not fallback:
+            return config.provider.value, config.model
+        provider = config.hedge.provider or config.provider
+        return provider.value, config.hedge.model or config.model
+    
+    @classmethod
+    def _backend(cls, config: DebaterConfig, fallback: bool = False) -> str:
+        return "/".join(cls._backend_labels(config, fallback))
+    
+    def _fallback_response(
+        self,
+        config: DebaterConfig,
+        messages: TranscriptView,
+        cache_hints: Optional[CacheHints],
+        stats: GenerationStats
+    ) -> AsyncGenerator[str, None]:
+        """The same request as the debater's, sent to its hedge backend."""
+        fallback = config.model_copy(
+            update={"provider": config.hedge.provider or config.provider, "model": config.hedge.model or config.model}
+        )
+        provider = ProviderFactory.get_provider(fallback.provider)
+        if self._wrap_provider is not None:
+            provider = self._wrap_provider(provider, fallback)
+        return provider.generate_response(
+            messages=messages,
+            model=fallback.model,
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            stream=self.streaming,
+            cache_hints=cache_hints,
+            stats=stats,
+            thinking_budget=config.thinking_budget
+        )
+    
+    def _count_error(self, timer: TurnTimer, kind: str):
+        ERRORS.inc(timer.provider, timer.model, kind)
+        self.metrics.errors += 1
+    
+    def _record_generation_stats(self, stats: GenerationStats):
+        if stats.cache_hit is None:
+            return
+        if stats.cache_hit:
+            self.prompt_cache_stats["hits"] += 1
+        else:
+            self.prompt_cache_stats["misses"] += 1
+        self.prompt_cache_stats["cached_tokens"] += stats.cached_tokens
+    
+    async def _generate_turn(self, debater: str, result: "_TurnResult") -> AsyncGenerator[dict[str, Any], None]:
+        """
+        Generate one debater's turn, yielding its events as they happen.
+
+        The finished turn is left in `result` instead of being recorded,
+        so the turns of a parallel round can be recorded together.
+        """
+        config = self.config.debater_a if debater == "A" else self.config.debater_b
+        provider = self.provider_a if debater == "A" else self.provider_b
+        
+        logger.info(f"Turn {result.number}: Debater {debater} using {config.model}")
+        
+        # Build messages and generate response
+        messages = self._build_messages(debater)
+        cache_hints = self._cache_hints(debater, messages)
+        stats = GenerationStats()
+        
+        yield {
+            "type": "turn_started",
+            "debater": debater,
+            "turn_number": result.number
+        }
+        
+        cache_key = None
+        cached_chunks = None
+        if self._use_response_cache:
+            cache_key = self._response_cache_key(debater, messages)
+            cached_chunks = await response_cache.get(cache_key)
+            self.response_cache_stats["hits" if cached_chunks is not None else "misses"] += 1
+        
+        hedge = None
+        timer = TurnTimer(config.provider.value, config.model)
+        if cached_chunks is not None:
+            source = self._replay_cached(cached_chunks)
         else:
-            # First turn - prompt to start the debate
-            if debater == "A":
-                messages.append(Message(
-                    role="user",
-                    content=f"Please begin the debate by presenting your opening argument for: {self.config.debater_a.position}"
-                ))
+            # Lets the rate limiter share waiting time fairly between debates
+            current_debate.set(self.state.id)
+            current_turn_number.set(result.number)
+            source = provider.generate_response(
+                messages=messages,
+                model=config.model,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                stream=self.streaming,
+                cache_hints=cache_hints,
+                stats=stats,
+                thinking_budget=config.thinking_budget
+            )
+            if config.hedge is not None:
+                fallback_stats = GenerationStats()
+                hedge = HedgedResponse(
+                    source,
+                    lambda: self._fallback_response(config, messages, cache_hints, fallback_stats),
+                    config.hedge.after_seconds,
+                    is_error=lambda chunk: isinstance(chunk, ProviderError)
+                )
+                source = hedge.stream()
+        
+        # Stream the response, joining the chunks once at the end
+        chunks: list[str] = []
+        chunk_times: list[float] = []  # Loop time of each content chunk, kept for replay
+        self._partials[debater] = chunks
+        queue = self._start_generation(debater, source)
+        truncated = False
+        try:
+            while (chunk := await queue.get()) is not _DONE:
+                if chunk is _CANCELLED:
+                    # Stopped or paused mid-turn
+                    truncated = True
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if isinstance(chunk, QueuedNotice):
+                    # Tell viewers why nothing is streaming yet
+                    yield {
+                        "type": "turn_queued",
+                        "debater": debater,
+                        "reason": chunk.reason,
+                        "retry_in": round(chunk.wait_seconds, 3),
+                        "attempt": chunk.attempt
+                    }
+                    continue
+                if timer.last is None and hedge is not None and hedge.winner == 1:
+                    timer.rebind(*self._backend_labels(config, fallback=True))
+                timer.chunk()
+                if isinstance(chunk, ThinkingChunk):
+                    # Reasoning is never part of the turn; viewers may opt in to see it
+                    if config.stream_thinking and self.streaming:
+                        yield {"type": "thinking_chunk", "debater": debater, "chunk": str(chunk)}
+                    continue
+                chunks.append(chunk)
+                chunk_times.append(timer.last)
+                yield {
+                    "type": "content_chunk",
+                    "debater": debater,
+                    "chunk": chunk
+                }
+        except RateLimitExceeded as e:
+            # Nothing was generated; pause so resuming retries this turn
+            logger.warning(f"Debate {self.state.id} paused: {e}")
+            self._count_error(timer, "rate_limited")
+            result.outcome = "rate_limited"
+            yield {"type": "error", "debater": debater, "error": str(e), "retryable": True}
+            return
+        except Exception as e:
+            logger.error(f"Error generating response: {e}")
+            self._count_error(timer, "exception")
+            result.outcome = "failed"
+            yield {"type": "error", "debater": debater, "error": str(e)}
+            return
+        finally:
+            # The consumer of this generator went away mid-turn
+            self._cancel_generation(debater)
+            if hedge is not None and hedge.hedged:
+                RETRIES.inc(config.provider.value, config.model, "hedged")
+        
+        if truncated and not chunks:
+            # Nothing to keep; a paused debate runs this turn again on resume
+            result.outcome = "discarded"
+            return
+        
+        fallback_won = hedge is not None and hedge.winner == 1
+        if fallback_won:
+            stats = fallback_stats
+        backend = self._backend(config, fallback_won) if config.hedge is not None else None
+        
+        full_response = "".join(chunks)
+        # Providers report some failures in-band as response text; never cache those
+        provider_error = any(isinstance(chunk, ProviderError) for chunk in chunks)
+        if not full_response:
+            logger.warning(f"Empty response from {config.model}")
+            full_response = NO_RESPONSE
+        elif (
+            cache_key is not None
+            and cached_chunks is None
+            and not truncated
+            # The cache key names the debater's own backend
+            and not fallback_won
+            and not provider_error
+        ):
+            await response_cache.put(cache_key, chunks)
+        if provider_error:
+            self._count_error(timer, "provider_error")
+        
+        chunk_timing = None
+        if settings.record_chunk_timing and chunks:
+            chunk_timing = [
+                (round(at - timer.started, 4), len(chunk)) for at, chunk in zip(chunk_times, chunks)
+            ]
+        
+        result.turn = DebateTurn(
+            debater=debater,
+            content=full_response,
+            timestamp=datetime.now(),
+            turn_number=result.number,
+            backend=backend,
+            truncated=truncated,
+            chunk_timing=chunk_timing
+        )
+        result.stats = stats
+        result.cached = cached_chunks is not None
+        result.provider_error = provider_error
+        result.outcome = "truncated" if truncated else "completed"
+        self._record_generation_stats(stats)
+        outcome = "cached" if cached_chunks is not None else "truncated" if truncated else "completed"
+        self.metrics.add_turn(debater, timer.finish(outcome, stats))
+    
+    async def _run_round(self, results: dict[str, "_TurnResult"]) -> AsyncGenerator[dict[str, Any], None]:
+        """Generate the turns of a parallel round, interleaving their events as they arrive."""
+        events: asyncio.Queue = asyncio.Queue()
+        
+        async def forward(debater: str, result: _TurnResult):
+            try:
+                async for event in self._generate_turn(debater, result):
+                    events.put_nowait(event)
+                if result.outcome in ("rate_limited", "failed"):
+                    # The round can't be recorded without this turn; stop the others
+                    self._cancel_generation()
+                events.put_nowait(_DONE)
+            except Exception as e:
+                events.put_nowait(e)
         
-        return messages
+        tasks = [asyncio.create_task(forward(debater, result)) for debater, result in results.items()]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await events.get()
+                if event is _DONE:
+                    remaining -= 1
+                    continue
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
     
     async def run_debate(self) -> AsyncGenerator[dict[str, Any], None]:
         """Run the debate and yield events for each turn."""
-        self.state.status = DebateStatus.RUNNING
+        self._set_status(DebateStatus.RUNNING)
         logger.info(f"Starting debate {self.state.id}")
         yield {"type": "debate_started", "debate_id": self.state.id}
         
+        parallel = self.config.mode == DebateMode.PARALLEL
         while (
             not self._stopped 
             and self.state.current_turn < self.config.max_turns
         ):
             if self._paused:
                 yield {"type": "debate_paused"}
-                while self._paused and not self._stopped:
-                    await asyncio.sleep(0.5)
+                await self._wait_while_paused()
                 if self._stopped:
                     break
                 yield {"type": "debate_resumed"}
             
-            # Determine current debater
-            debater = self.state.current_debater
-            config = self.config.debater_a if debater == "A" else self.config.debater_b
-            provider = self.provider_a if debater == "A" else self.provider_b
-            
-            logger.info(f"Turn {self.state.current_turn + 1}: Debater {debater} using {config.model}")
-            
-            # Build messages and generate response
-            messages = self._build_messages(debater)
-            
-            yield {
-                "type": "turn_started",
-                "debater": debater,
-                "turn_number": self.state.current_turn + 1
+            if parallel:
+                # Both debaters answer the previous round at the same time
+                debaters = ["A", "B"][:self.config.max_turns - self.state.current_turn]
+            else:
+                debaters = [self.state.current_debater]
+            results = {
+                debater: _TurnResult(self.state.current_turn + 1 + index)
+                for index, debater in enumerate(debaters)
             }
+            if len(results) > 1:
+                round_events = self._run_round(results)
+            else:
+                round_events = self._generate_turn(debaters[0], results[debaters[0]])
+            # Closed at once if our consumer goes away, so the round's streams are cancelled
+            async with aclosing(round_events) as events:
+                async for event in events:
+                    yield event
             
-            # Stream the response
-            full_response = ""
-            try:
-                async for chunk in provider.generate_response(
-                    messages=messages,
-                    model=config.model,
-                    temperature=config.temperature,
-                    max_tokens=config.max_tokens,
-                    stream=True
-                ):
-                    full_response += chunk
-                    yield {
-                        "type": "content_chunk",
-                        "debater": debater,
-                        "chunk": chunk
-                    }
-            except Exception as e:
-                logger.error(f"Error generating response: {e}")
-                yield {"type": "error", "error": str(e)}
+            outcomes = {result.outcome for result in results.values()}
+            if "rate_limited" in outcomes:
+                # Nothing is kept; resuming, or running the debate again, runs the round again
+                self._partials.clear()
+                if not self.pause_on_rate_limit:
+                    break
+                self.pause()
+                continue
+            if "failed" in outcomes:
                 break
+            if outcomes == {"discarded"}:
+                # Nothing to keep; a paused debate runs this round again on resume
+                self._partials.clear()
+                continue
             
-            if not full_response:
-                logger.warning(f"Empty response from {config.model}")
-                full_response = "[No response generated]"
+            for debater, result in results.items():
+                if result.turn is None:
+                    # Cut off before it said anything; a round is only recorded whole
+                    result.turn = DebateTurn(
+                        debater=debater,
+                        content=NO_RESPONSE,
+                        timestamp=datetime.now(),
+                        turn_number=result.number,
+                        truncated=True
+                    )
+            turns = [result.turn for result in results.values()]
+            self._record_round(turns)
+            self._partials.clear()
+            if self.store is not None:
+                for turn in turns:
+                    self.store.append_turn(self.state.id, turn)
             
-            # Record the turn
-            turn = DebateTurn(
-                debater=debater,
-                content=full_response,
-                timestamp=datetime.now(),
-                turn_number=self.state.current_turn + 1
-            )
-            self.state.turns.append(turn)
-            
-            yield {
-                "type": "turn_completed",
-                "debater": debater,
-                "turn_number": self.state.current_turn + 1,
-                "content": full_response
-            }
+            for debater, result in results.items():
+                yield {
+                    "type": "turn_completed",
+                    "debater": debater,
+                    "turn_number": result.number,
+                    "content": result.turn.content,
+                    "usage": result.stats.model_dump(),
+                    "cached": result.cached,
+                    "backend": result.turn.backend,
+                    "truncated": result.turn.truncated,
+                    "provider_error": result.provider_error
+                }
             
             # Update state for next turn
-            self.state.current_turn += 1
-            self.state.current_debater = "B" if debater == "A" else "A"
+            self.state.current_turn += len(turns)
+            if not parallel:
+                self.state.current_debater = "B" if debaters[0] == "A" else "A"
             
             # In manual mode, wait for trigger (handled by pause)
             if self.config.mode == DebateMode.MANUAL:
-                self._paused = True
+                self.pause()
                 yield {"type": "waiting_for_trigger", "next_debater": self.state.current_debater}
             else:
-                # Auto mode - wait before next turn
-                await asyncio.sleep(self.config.auto_delay_seconds)
+                # Auto and parallel modes - wait before the next turn
+                await self._delay(self.config.auto_delay_seconds)
         
-        self.state.status = DebateStatus.COMPLETED
+        self._partials.clear()
+        self._set_status(DebateStatus.COMPLETED)
         yield {
             "type": "debate_completed",
             "total_turns": self.state.current_turn,
-            "turns": [t.model_dump() for t in self.state.turns]
+            # Chunk timing is only for replay, which reads it from the store or an export
+            "turns": [t.model_dump(exclude={"chunk_timing"}) for t in self.state.turns],
+            "prompt_cache": self.prompt_cache_stats,
+            "response_cache": self.response_cache_stats,
+            "metrics": self.metrics.summary()
         }
+
+
+class _TurnResult:
+    """How one turn of a round ended, filled in by _generate_turn."""
+    
+    __slots__ = ("number", "outcome", "turn", "stats", "cached", "provider_error")
+    
+    def __init__(self, number: int):
+        self.number = number
+        # completed, truncated, discarded (cut off before any text), rate_limited or failed
+        self.outcome = "failed"
+        self.turn: Optional[DebateTurn] = None
+        self.stats = GenerationStats()
+        self.cached = False
+        self.provider_error = False  # The turn's text is a failure the provider reported
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.config import settings
+from app.models import ProviderType
+from app.providers.factory import ProviderFactory
+from app.services.catalog import model_catalog
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """Probes every provider in the background so request handlers never block on it."""
+    
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.provider_health_interval
+        self._task: Optional[asyncio.Task] = None
+        self._last: dict[ProviderType, bool] = {}
+    
+    async def probe(self, provider_type: ProviderType) -> bool:
+        """Run one health check for a provider and return the result."""
+        try:
+            provider = ProviderFactory.get_provider(provider_type)
+            healthy = await provider.check_health()
+        except Exception as e:
+            logger.warning(f"Health probe for {provider_type.value} failed: {e}")
+            healthy = False
+        
+        previous = self._last.get(provider_type)
+        self._last[provider_type] = healthy
+        if previous is not None and previous != healthy:
+            logger.info(f"Provider {provider_type.value} is now {'up' if healthy else 'down'}")
+            # A restarted backend may serve a different set of models
+            model_catalog.invalidate(provider_type)
+        return healthy
+    
+    async def probe_all(self) -> dict[ProviderType, bool]:
+        """Probe all providers concurrently."""
+        provider_types = list(ProviderType)
+        results = await asyncio.gather(*(self.probe(p) for p in provider_types))
+        return dict(zip(provider_types, results))
+    
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+health_prober = HealthProber()
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from app.providers.ratelimit import QueuedNotice
+
+logger = logging.getLogger(__name__)
+
+# Put on the queue by a backend whose stream has ended
+_END = object()
+
+
+class HedgedResponse:
+    """
+    Streams a response from a primary backend, or from a fallback raced against it.
+
+    The fallback starts when the primary has produced no chunk after
+    hedge_after seconds, or as soon as the primary fails before its first
+    chunk, including with an in-band error text that is_error recognises.
+    Whichever backend yields a chunk first is streamed to the end and
+    the other is cancelled. Rate limit notices pass through without counting
+    as an answer.
+
+    Each backend is read by its own task, so SDK stream contexts are always
+    entered and exited in the same task.
+    """
+    
+    def __init__(
+        self,
+        primary: AsyncGenerator[Any, None],
+        start_fallback: Callable[[], AsyncGenerator[Any, None]],
+        hedge_after: float,
+        is_error: Callable[[str], bool] = lambda chunk: False
+    ):
+        self.hedge_after = hedge_after
+        self.is_error = is_error
+        self.winner: Optional[int] = None  # 0 for the primary, 1 for the fallback
+        self.hedged = False  # Whether the fallback was started
+        self._start_fallback = start_fallback
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._pumps = [asyncio.create_task(self._pump(0, primary))]
+    
+    async def _pump(self, index: int, stream: AsyncGenerator[Any, None]):
+        try:
+            async for chunk in stream:
+                self._queue.put_nowait((index, chunk))
+            self._queue.put_nowait((index, _END))
+        except Exception as e:
+            self._queue.put_nowait((index, e))
+        finally:
+            await stream.aclose()
+    
+    def _hedge(self):
+        self.hedged = True
+        self._pumps.append(asyncio.create_task(self._pump(1, self._start_fallback())))
+    
+    async def _cancel(self, keep: Optional[int] = None):
+        """Stop every backend but the one being kept."""
+        for index, pump in enumerate(self._pumps):
+            if index != keep and not pump.done():
+                pump.cancel()
+                await asyncio.gather(pump, return_exceptions=True)
+    
+    async def stream(self) -> AsyncGenerator[Any, None]:
+        loop = asyncio.get_running_loop()
+        hedge_at = loop.time() + self.hedge_after
+        failed: dict[int, Exception] = {}
+        try:
+            while True:
+                timeout = None if self.hedged else max(hedge_at - loop.time(), 0)
+                try:
+                    index, item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    logger.info(f"No first chunk after {self.hedge_after}s, starting the fallback")
+                    self._hedge()
+                    continue
+                
+                if index in failed:
+                    continue
+                if self.winner is None:
+                    if isinstance(item, Exception) or (isinstance(item, str) and self.is_error(item)):
+                        failed[index] = item
+                        if len(failed) == len(self._pumps) and self.hedged:
+                            # Every backend failed before answering; report the primary's failure
+                            if isinstance(failed[0], Exception):
+                                raise failed[0]
+                            yield failed[0]
+                            return
+                        if not self.hedged:
+                            logger.info(f"Primary failed before answering, starting the fallback: {item}")
+                            self._hedge()
+                        continue
+                    if isinstance(item, QueuedNotice):
+                        yield item
+                        continue
+                    self.winner = index
+                    await self._cancel(keep=index)
+                elif index != self.winner:
+                    continue
+                
+                if item is _END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            await self._cancel()
@@ -0,0 +1,350 @@
+import asyncio
+import bisect
+import logging
+import math
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.config import settings
+from app.models import GenerationStats
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds, from a fast chunk gap to a cold model load
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _HistogramChild:
+    """One label combination of a histogram; observe() is cheap enough to call per chunk."""
+    
+    __slots__ = ("bounds", "counts", "total", "count")
+    
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Metric(ABC):
+    """A named family of series, one per combination of label values."""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = labels
+        self._children: dict[tuple[str, ...], object] = {}
+    
+    @abstractmethod
+    def _new_child(self):
+        """A fresh series for one combination of label values."""
+        pass
+    
+    def labels(self, *values: str):
+        """The series for these label values; hold on to it rather than looking it up per event."""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+    
+    @abstractmethod
+    def _render_child(self, values: tuple[str, ...], child) -> list[str]:
+        """Exposition lines for one series."""
+        pass
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+    
+    def inc(self, *values: str, amount: float = 1.0):
+        self.labels(*values).inc(amount)
+    
+    def _render_child(self, values: tuple[str, ...], child: _CounterChild) -> list[str]:
+        return [f"{self.name}{_label_text(self.label_names, values)} {_number(child.value)}"]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+    
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float, *values: str):
+        self.labels(*values).observe(value)
+    
+    def _render_child(self, values: tuple[str, ...], child: _HistogramChild) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), child.counts):
+            cumulative += count
+            le = f'le="{_number(bound)}"'
+            lines.append(f"{self.name}_bucket{_label_text(self.label_names, values, le)} {cumulative}")
+        labels = _label_text(self.label_names, values)
+        lines.append(f"{self.name}_sum{labels} {_number(child.total)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics of this process, rendered in the Prometheus text format."""
+    
+    def __init__(self):
+        self._metrics: list[Metric] = []
+    
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+    
+    def counter(self, name: str, documentation: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+BACKEND = ("provider", "model")
+
+TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "debate_time_to_first_token_seconds", "Time from requesting a turn to its first streamed chunk.", BACKEND
+)
+CHUNK_GAP = metrics.histogram(
+    "debate_chunk_gap_seconds", "Time between consecutive streamed chunks of a turn.", BACKEND
+)
+TOKENS_PER_SECOND = metrics.histogram(
+    "debate_tokens_per_second", "Completion tokens per second after the first chunk.", BACKEND, RATE_BUCKETS
+)
+TURN_DURATION = metrics.histogram(
+    "debate_turn_duration_seconds", "Time from requesting a turn to its last chunk.", BACKEND
+)
+QUEUE_WAIT = metrics.histogram(
+    "debate_queue_wait_seconds", "Time a request waited for rate limit capacity or a concurrency slot.", BACKEND
+)
+TURNS = metrics.counter(
+    "debate_turns_total", "Turns recorded, by outcome (completed, truncated or cached).", (*BACKEND, "outcome")
+)
+TOKENS = metrics.counter(
+    "debate_tokens_total", "Tokens reported by providers, by kind (prompt, completion, thinking, cached).",
+    (*BACKEND, "kind")
+)
+ERRORS = metrics.counter(
+    "debate_errors_total", "Failed turns, by kind (exception, provider_error or rate_limited).", (*BACKEND, "kind")
+)
+RETRIES = metrics.counter(
+    "debate_retries_total", "Provider requests sent again, by reason (rate_limited, rejected_params or hedged).",
+    (*BACKEND, "reason")
+)
+WS_SEND = metrics.histogram(
+    "debate_ws_send_seconds", "Time to encode and send one WebSocket frame.", ("encoding",)
+)
+EVENT_LOOP_LAG = metrics.histogram(
+    "debate_event_loop_lag_seconds", "How late the event loop woke a sleeping task."
+)
+
+
+class EventLoopLagMonitor:
+    """Sleeps on a fixed interval and records how late each wake-up was."""
+    
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else settings.metrics_loop_lag_interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        series = EVENT_LOOP_LAG.labels()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            series.observe(max(loop.time() - started - self.interval, 0.0))
+    
+    def start(self):
+        if self.interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = EventLoopLagMonitor()
+
+
+class TurnTimer:
+    """
+    Times one turn of one backend and records it when the turn ends.
+
+    chunk() runs for every streamed chunk, so it only takes a timestamp
+    and updates one histogram series.
+    """
+    
+    __slots__ = ("provider", "model", "started", "first", "last", "chunks", "_gaps", "_clock")
+    
+    def __init__(self, provider: str, model: str):
+        loop = asyncio.get_running_loop()
+        self._clock = loop.time
+        self.provider = provider
+        self.model = model
+        self.started = self._clock()
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.chunks = 0
+        self._gaps = CHUNK_GAP.labels(provider, model)
+    
+    def rebind(self, provider: str, model: str):
+        """Attribute the turn to another backend, e.g. a hedge fallback that answered first."""
+        self.provider = provider
+        self.model = model
+        self._gaps = CHUNK_GAP.labels(provider, model)
+    
+    def chunk(self):
+        now = self._clock()
+        if self.last is None:
+            self.first = now
+        else:
+            self._gaps.observe(now - self.last)
+        self.last = now
+        self.chunks += 1
+    
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.first - self.started if self.first is not None else None
+    
+    def tokens_per_second(self, completion_tokens: int) -> Optional[float]:
+        tokens = completion_tokens or self.chunks
+        if self.first is None or self.last is None or self.last <= self.first or tokens < 2:
+            return None
+        return tokens / (self.last - self.first)
+    
+    def finish(self, outcome: str, stats: Optional[GenerationStats] = None) -> dict:
+        """Record the turn and return its numbers for the debate summary."""
+        backend = (self.provider, self.model)
+        duration = (self.last if self.last is not None else self._clock()) - self.started
+        TURNS.inc(*backend, outcome)
+        completion_tokens = stats.completion_tokens if stats is not None else 0
+        rate = self.tokens_per_second(completion_tokens)
+        if outcome != "cached":
+            TURN_DURATION.observe(duration, *backend)
+            if self.ttft is not None:
+                TIME_TO_FIRST_TOKEN.observe(self.ttft, *backend)
+            if rate is not None:
+                TOKENS_PER_SECOND.observe(rate, *backend)
+            if stats is not None:
+                for kind in ("prompt", "completion", "thinking", "cached"):
+                    count = getattr(stats, f"{kind}_tokens")
+                    if count:
+                        TOKENS.inc(*backend, kind, amount=count)
+        return {
+            "ttft": self.ttft,
+            "duration": duration,
+            "tokens_per_second": rate,
+            "completion_tokens": completion_tokens,
+        }
+
+
+class DebateMetrics:
+    """Per-debate totals, attached to the debate_completed event."""
+    
+    def __init__(self):
+        self._debaters: dict[str, dict] = {}
+        self.errors = 0
+    
+    def add_turn(self, debater: str, turn: dict):
+        totals = self._debaters.setdefault(debater, {
+            "turns": 0, "ttft": [], "duration": 0.0, "tokens_per_second": [], "completion_tokens": 0
+        })
+        totals["turns"] += 1
+        totals["duration"] += turn["duration"]
+        totals["completion_tokens"] += turn["completion_tokens"]
+        if turn["ttft"] is not None:
+            totals["ttft"].append(turn["ttft"])
+        if turn["tokens_per_second"] is not None:
+            totals["tokens_per_second"].append(turn["tokens_per_second"])
+    
+    def summary(self) -> dict:
+        debaters = {}
+        for debater, totals in sorted(self._debaters.items()):
+            ttft = totals["ttft"]
+            rates = totals["tokens_per_second"]
+            debaters[debater] = {
+                "turns": totals["turns"],
+                "turn_seconds": round(totals["duration"], 3),
+                "completion_tokens": totals["completion_tokens"],
+                "ttft_mean_seconds": round(sum(ttft) / len(ttft), 3) if ttft else None,
+                "ttft_max_seconds": round(max(ttft), 3) if ttft else None,
+                "tokens_per_second": round(sum(rates) / len(rates), 1) if rates else None,
+            }
+        return {"debaters": debaters, "errors": self.errors}
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    messages: list[dict],
+    temperature: float,
+    max_tokens: int
+) -> str:
+    """Content address for a request: identical prompts and settings share a key."""
+    normalized = [[m["role"], m["content"].strip()] for m in messages]
+    payload = json.dumps(
+        [provider, model, normalized, round(temperature, 4), max_tokens],
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of streamed responses, stored as their original chunks.
+
+    The memory tier is a small LRU. The disk tier keeps one JSON file per
+    response and evicts the least recently used files once it grows past
+    its byte limit. Disk access runs in a worker thread.
+    """
+    
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        memory_entries: Optional[int] = None,
+        disk_max_bytes: Optional[int] = None
+    ):
+        self.directory = Path(directory or settings.response_cache_dir)
+        self.memory_entries = memory_entries or settings.response_cache_memory_entries
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else settings.response_cache_disk_max_bytes
+        self._memory: OrderedDict[str, list[str]] = OrderedDict()
+        # key -> file size, least recently used first; loaded on first disk access
+        self._disk_index: Optional[OrderedDict[str, int]] = None
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        # Background writes from put_nowait, kept until they finish
+        self._pending_writes: set[asyncio.Future] = set()
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+    
+    def _load_index(self):
+        if self._disk_index is not None:
+            return
+        entries = []
+        if self.directory.exists():
+            for path in self.directory.glob("*/*.json"):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        self._disk_index = OrderedDict((key, size) for _, key, size in entries)
+        self._disk_bytes = sum(size for _, _, size in entries)
+    
+    def _read_disk(self, key: str) -> Optional[list[str]]:
+        with self._disk_lock:
+            self._load_index()
+            if key not in self._disk_index:
+                return None
+            path = self._path(key)
+            try:
+                chunks = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._disk_bytes -= self._disk_index.pop(key)
+                return None
+            self._disk_index.move_to_end(key)
+            # Touch the file so recency survives a restart
+            os.utime(path)
+            return chunks
+    
+    def _write_disk(self, key: str, chunks: list[str]):
+        data = json.dumps(chunks, ensure_ascii=False).encode("utf-8")
+        with self._disk_lock:
+            self._load_index()
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            self._disk_bytes += len(data) - self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(data)
+            
+            while self._disk_bytes > self.disk_max_bytes and self._disk_index:
+                old_key, size = self._disk_index.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    self._path(old_key).unlink()
+                except OSError:
+                    pass
+    
+    def _remember(self, key: str, chunks: list[str]):
+        self._memory[key] = chunks
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+    
+    async def get(self, key: str) -> Optional[list[str]]:
+        chunks = self._memory.get(key)
+        if chunks is not None:
+            self._memory.move_to_end(key)
+            return chunks
+        
+        if self.disk_max_bytes <= 0:
+            return None
+        chunks = await asyncio.to_thread(self._read_disk, key)
+        if chunks is not None:
+            self._remember(key, chunks)
+        return chunks
+    
+    def put_nowait(self, key: str, chunks: list[str]):
+        """Cache in memory now and write to disk in the background."""
+        self._remember(key, chunks)
+        if self.disk_max_bytes > 0:
+            write = asyncio.get_running_loop().run_in_executor(None, self._write_disk, key, chunks)
+            self._pending_writes.add(write)
+            write.add_done_callback(self._write_done)
+    
+    def _write_done(self, write: asyncio.Future):
+        self._pending_writes.discard(write)
+        if not write.cancelled() and write.exception() is not None:
+            logger.warning(f"Failed to write response cache entry: {write.exception()}")
+    
+    async def put(self, key: str, chunks: list[str]):
+        self._remember(key, chunks)
+        if self.disk_max_bytes <= 0:
+            return
+        try:
+            await asyncio.to_thread(self._write_disk, key, chunks)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache entry: {e}")
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+from app.models import DebateStatus
+from app.services.broadcast import hubs
+from app.services.debate import DebateOrchestrator
+from app.services.store import DebateStore, debate_store
+
+logger = logging.getLogger(__name__)
+
+# Rough resident cost of an orchestrator before any turns, and per turn on top of its text
+SESSION_BASE_BYTES = 8 * 1024
+TURN_OVERHEAD_BYTES = 600
+# A recorded chunk timing entry: a tuple of a float and an int, plus its list slot
+CHUNK_TIMING_BYTES = 120
+
+
+def estimate_session_bytes(orchestrator: DebateOrchestrator) -> int:
+    """
+    Approximate memory held by a debate.
+
+    Each turn's text is referenced by the state and both debaters'
+    transcripts, and its streamed chunks stay in the hub's event log.
+    """
+    turns = orchestrator.state.turns
+    text = sum(len(turn.content) for turn in turns)
+    timing = sum(len(turn.chunk_timing) for turn in turns if turn.chunk_timing)
+    return SESSION_BASE_BYTES + len(turns) * TURN_OVERHEAD_BYTES + text * 4 + timing * CHUNK_TIMING_BYTES
+
+
+class _Session:
+    __slots__ = ("orchestrator", "last_access", "completed_at", "bytes")
+    
+    def __init__(self, orchestrator: DebateOrchestrator):
+        self.orchestrator = orchestrator
+        self.last_access = time.monotonic()
+        self.completed_at: Optional[float] = None
+        self.bytes = estimate_session_bytes(orchestrator)
+
+
+class SessionRegistry:
+    """
+    Holds the debates this server knows about, with bounded memory.
+
+    Every debate is written through to a DebateStore as it progresses.
+    Sessions idle past their TTL, or least recently used ones once the
+    count or byte cap is exceeded, are dropped from memory and the next
+    access reloads them from the store, including after a restart. A
+    debate that is generating or has viewers attached is never evicted.
+    """
+    
+    def __init__(self, store: Optional[DebateStore] = None):
+        self.store = store or debate_store
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._loading: dict[str, asyncio.Task] = {}
+        self._spilling: dict[str, asyncio.Event] = {}
+        # Concurrent callers would otherwise pick the same sessions to spill
+        self._limits_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.spilled = 0
+        self.reloaded = 0
+    
+    @property
+    def resident_sessions(self) -> int:
+        return len(self._sessions)
+    
+    @property
+    def resident_bytes(self) -> int:
+        return sum(session.bytes for session in self._sessions.values())
+    
+    def stats(self) -> dict[str, int]:
+        """Gauges for monitoring."""
+        return {
+            "resident_sessions": self.resident_sessions,
+            "resident_bytes": self.resident_bytes,
+            "spilled_total": self.spilled,
+            "reloaded_total": self.reloaded,
+        }
+    
+    async def add(self, orchestrator: DebateOrchestrator):
+        """Register a new or imported debate and record it in the store."""
+        orchestrator.store = self.store
+        await self.store.save_debate(orchestrator.get_state())
+        self._sessions[orchestrator.state.id] = _Session(orchestrator)
+        await self.enforce_limits()
+    
+    async def get(self, debate_id: str) -> Optional[DebateOrchestrator]:
+        """Look up a debate, reloading it from the store if it is not resident."""
+        session = self._sessions.get(debate_id)
+        if session is not None:
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(debate_id)
+            return session.orchestrator
+        
+        spilling = self._spilling.get(debate_id)
+        if spilling is not None:
+            await spilling.wait()
+        
+        # Concurrent requests for the same debate share one reload
+        task = self._loading.get(debate_id)
+        if task is None:
+            task = asyncio.create_task(self._reload(debate_id))
+            self._loading[debate_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(debate_id, None))
+        return await asyncio.shield(task)
+    
+    async def _reload(self, debate_id: str) -> Optional[DebateOrchestrator]:
+        try:
+            state = await self.store.load(debate_id)
+        except Exception as e:
+            logger.warning(f"Failed to reload debate {debate_id}: {e}")
+            return None
+        if state is None:
+            return None
+        
+        # Resumes from the last completed turn; a turn cut off by a restart is generated again
+        orchestrator = DebateOrchestrator.restore(state)
+        orchestrator.store = self.store
+        self._sessions[debate_id] = _Session(orchestrator)
+        self.reloaded += 1
+        await self.enforce_limits()
+        return orchestrator
+    
+    def _evictable(self, debate_id: str, session: _Session) -> bool:
+        if session.orchestrator.is_generating():
+            # Paused or stopped, but its provider stream hasn't wound down yet
+            return False
+        hub = hubs.get(debate_id)
+        if hub is not None and hub.subscribers:
+            return False
+        running = session.orchestrator.state.status == DebateStatus.RUNNING
+        return not (running and hub is not None and not hub.finished)
+    
+    async def _spill(self, debate_id: str):
+        session = self._sessions.pop(debate_id, None)
+        if session is None:
+            return
+        done = self._spilling[debate_id] = asyncio.Event()
+        try:
+            await self._write_spill(debate_id, session)
+        finally:
+            del self._spilling[debate_id]
+            done.set()
+    
+    async def _write_spill(self, debate_id: str, session: _Session):
+        hub = hubs.get(debate_id)
+        if hub is not None:
+            # A paused debate's run is parked waiting for resume; a reload starts a fresh one
+            await hub.stop()
+            hubs.remove(debate_id)
+        # Turns and status are already in the store; make sure they are durable
+        await self.store.flush()
+        self.spilled += 1
+    
+    async def enforce_limits(self):
+        """Spill expired sessions, then least recently used ones until under the caps."""
+        async with self._limits_lock:
+            await self._enforce_limits()
+    
+    async def _enforce_limits(self):
+        now = time.monotonic()
+        expired = []
+        for debate_id, session in self._sessions.items():
+            idle_since, ttl = session.last_access, settings.session_idle_ttl
+            if session.orchestrator.state.status == DebateStatus.COMPLETED:
+                if session.completed_at is None:
+                    session.completed_at = now
+                # Nobody may have looked at it while it ran; count from when it finished
+                idle_since, ttl = max(session.completed_at, session.last_access), settings.session_completed_ttl
+            if now - idle_since > ttl and self._evictable(debate_id, session):
+                expired.append(debate_id)
+        for debate_id in expired:
+            await self._spill(debate_id)
+        
+        for session in self._sessions.values():
+            session.bytes = estimate_session_bytes(session.orchestrator)
+        total = self.resident_bytes
+        # Least recently used first
+        for debate_id in list(self._sessions):
+            if len(self._sessions) <= settings.session_max_count and total <= settings.session_max_bytes:
+                break
+            session = self._sessions.get(debate_id)
+            if session is None:
+                # Dropped while an earlier spill was being written
+                continue
+            if self._evictable(debate_id, session):
+                total -= session.bytes
+                await self._spill(debate_id)
+    
+    async def purge_stored(self):
+        """Delete debates from the store once they are past the retention period."""
+        if settings.debate_retention > 0:
+            await self.store.purge(time.time() - settings.debate_retention)
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.session_sweep_interval)
+            try:
+                await self.enforce_limits()
+                await self.purge_stored()
+            except Exception as e:
+                logger.error(f"Session sweep failed: {e}")
+    
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+sessions = SessionRegistry()
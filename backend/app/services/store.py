@@ -0,0 +1,405 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from app.config import settings
+from app.models import DebateConfig, DebateState, DebateStatus, DebateTurn
+
+logger = logging.getLogger(__name__)
+
+
+def turn_dict(
+    debater: str,
+    number: int,
+    timestamp: str,
+    content: str,
+    backend: Optional[str],
+    truncated: bool,
+    chunk_timing: Optional[str]
+) -> dict[str, Any]:
+    """A stored turn row as the dict DebateTurn validates, leaving out fields at their defaults."""
+    turn = {"debater": debater, "content": content, "timestamp": timestamp, "turn_number": number}
+    if backend is not None:
+        turn["backend"] = backend
+    if truncated:
+        turn["truncated"] = True
+    if chunk_timing is not None:
+        turn["chunk_timing"] = json.loads(chunk_timing)
+    return turn
+
+
+def _export_json(config_json: str, turns: list[tuple]) -> bytes:
+    """
+    A DebateExport document built straight from stored rows.
+
+    The config is already JSON and is spliced in as is, so exporting a long
+    debate never round-trips it through Pydantic models.
+    """
+    turns_json = json.dumps([turn_dict(*turn) for turn in turns], ensure_ascii=False)
+    exported_at = json.dumps(datetime.now().isoformat())
+    return f'{{"config":{config_json},"turns":{turns_json},"exported_at":{exported_at}}}'.encode("utf-8")
+
+
+def _build_state(debate_id: str, config_json: str, status: str, turns: list[tuple]) -> DebateState:
+    debate_turns = [
+        DebateTurn(
+            debater=debater,
+            turn_number=number,
+            timestamp=timestamp,
+            content=content,
+            backend=backend,
+            truncated=bool(truncated),
+            chunk_timing=json.loads(chunk_timing) if chunk_timing is not None else None
+        )
+        for debater, number, timestamp, content, backend, truncated, chunk_timing in turns
+    ]
+    return DebateState(
+        id=debate_id,
+        config=DebateConfig.model_validate_json(config_json),
+        status=DebateStatus(status),
+        turns=debate_turns
+    )
+
+
+def _turn_row(turn: DebateTurn) -> tuple[str, int, str, str, Optional[str], bool, Optional[str]]:
+    # Chunk timing is only read back whole, so it is kept as JSON text
+    chunk_timing = json.dumps(turn.chunk_timing, separators=(",", ":")) if turn.chunk_timing is not None else None
+    return (
+        turn.debater, turn.turn_number, turn.timestamp.isoformat(), turn.content, turn.backend, turn.truncated,
+        chunk_timing
+    )
+
+
+class DebateStore(ABC):
+    """
+    Durable record of debates: their config, status and completed turns.
+
+    Turns are only ever appended. Write methods may return before the data
+    is durable; flush() waits until everything written so far is stored.
+    """
+    
+    @abstractmethod
+    async def save_debate(self, state: DebateState):
+        """Create or replace a debate, including any turns it already has."""
+        pass
+    
+    @abstractmethod
+    def append_turn(self, debate_id: str, turn: DebateTurn):
+        """Record a completed turn. Never blocks the event loop."""
+        pass
+    
+    @abstractmethod
+    def set_status(self, debate_id: str, status: DebateStatus):
+        """Record a status change. Never blocks the event loop."""
+        pass
+    
+    @abstractmethod
+    async def read_rows(self, debate_id: str) -> Optional[tuple[str, str, list[tuple]]]:
+        """A debate's config JSON, status and turn rows in order, or None if unknown."""
+        pass
+    
+    @abstractmethod
+    async def debate_ids(self) -> list[str]:
+        """Every stored debate, least recently updated first."""
+        pass
+    
+    async def load(self, debate_id: str) -> Optional[DebateState]:
+        """A debate as of its last completed turn, or None if unknown."""
+        found = await self.read_rows(debate_id)
+        if found is None:
+            return None
+        config_json, status, turns = found
+        return _build_state(debate_id, config_json, status, turns)
+    
+    async def export_json(self, debate_id: str) -> Optional[bytes]:
+        """The debate as a serialized DebateExport, or None if unknown."""
+        found = await self.read_rows(debate_id)
+        if found is None:
+            return None
+        config_json, _, turns = found
+        return _export_json(config_json, turns)
+    
+    @abstractmethod
+    async def purge(self, older_than: float):
+        """Delete debates not updated since the given Unix time."""
+        pass
+    
+    async def flush(self):
+        """Wait until every write so far is stored."""
+        pass
+    
+    async def close(self):
+        await self.flush()
+
+
+class MemoryDebateStore(DebateStore):
+    """Keeps debates as compact rows in process memory. Nothing survives a restart."""
+    
+    def __init__(self):
+        self._debates: dict[str, dict[str, Any]] = {}
+    
+    async def save_debate(self, state: DebateState):
+        self._debates[state.id] = {
+            "config": state.config.model_dump_json(),
+            "status": state.status.value,
+            "turns": [_turn_row(turn) for turn in state.turns],
+            "updated_at": time.time(),
+        }
+    
+    def append_turn(self, debate_id: str, turn: DebateTurn):
+        debate = self._debates.get(debate_id)
+        if debate is not None:
+            debate["turns"].append(_turn_row(turn))
+            debate["updated_at"] = time.time()
+    
+    def set_status(self, debate_id: str, status: DebateStatus):
+        debate = self._debates.get(debate_id)
+        if debate is not None:
+            debate["status"] = status.value
+            debate["updated_at"] = time.time()
+    
+    async def read_rows(self, debate_id: str) -> Optional[tuple[str, str, list[tuple]]]:
+        debate = self._debates.get(debate_id)
+        if debate is None:
+            return None
+        return debate["config"], debate["status"], list(debate["turns"])
+    
+    async def debate_ids(self) -> list[str]:
+        return sorted(self._debates, key=lambda debate_id: self._debates[debate_id]["updated_at"])
+    
+    async def purge(self, older_than: float):
+        for debate_id in [i for i, d in self._debates.items() if d["updated_at"] < older_than]:
+            del self._debates[debate_id]
+
+
+def _debate_groups(
+    batch: list[tuple[Optional[str], str, tuple]]
+) -> Iterator[list[tuple[Optional[str], str, tuple]]]:
+    """
+    A batch split into each debate's operations, in order. Writes across
+    debates, like a purge, stay in place between the groups around them.
+    """
+    groups: dict[str, list[tuple[Optional[str], str, tuple]]] = {}
+    for operation in batch:
+        debate_id = operation[0]
+        if debate_id is None:
+            yield from groups.values()
+            groups = {}
+            yield [operation]
+        else:
+            groups.setdefault(debate_id, []).append(operation)
+    yield from groups.values()
+
+
+class SqliteDebateStore(DebateStore):
+    """
+    Stores debates in a SQLite database in WAL mode.
+
+    Writes are queued and committed in batches by a worker thread, at most
+    flush_ms after they are made, so a crash loses at most that much. Each
+    turn is a row inserted once when it completes. If a batch fails, it is
+    written again one debate at a time, so only the failing debate's
+    writes are lost.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS debates (
+            id TEXT PRIMARY KEY,
+            config TEXT NOT NULL,
+            status TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS turns (
+            debate_id TEXT NOT NULL REFERENCES debates(id) ON DELETE CASCADE,
+            turn_number INTEGER NOT NULL,
+            debater TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            content TEXT NOT NULL,
+            backend TEXT,
+            truncated INTEGER NOT NULL DEFAULT 0,
+            chunk_timing TEXT,
+            PRIMARY KEY (debate_id, turn_number)
+        );
+    """
+    
+    ADDED_TURN_COLUMNS = {"backend": "TEXT", "truncated": "INTEGER NOT NULL DEFAULT 0", "chunk_timing": "TEXT"}
+    
+    def __init__(self, path: Optional[str] = None, flush_ms: Optional[float] = None):
+        self.path = Path(path or settings.debate_store_path)
+        self.flush_interval = (flush_ms if flush_ms is not None else settings.debate_store_flush_ms) / 1000
+        self._conn: Optional[sqlite3.Connection] = None
+        # One connection shared by the worker threads, used by one at a time
+        self._conn_lock = threading.Lock()
+        # (debate id, or None for writes across debates, SQL, parameters)
+        self._pending: list[tuple[Optional[str], str, tuple]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set[asyncio.Task] = set()
+        # Keeps batches committed in the order they were queued
+        self._write_lock: Optional[asyncio.Lock] = None
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(self.SCHEMA)
+            # Databases created before these turn columns existed
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(turns)")}
+            for column, definition in self.ADDED_TURN_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE turns ADD COLUMN {column} {definition}")
+            self._conn = conn
+        return self._conn
+    
+    def _run(self, fn, *args):
+        with self._conn_lock:
+            return fn(self._connect(), *args)
+    
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: list[tuple[Optional[str], str, tuple]]):
+        try:
+            SqliteDebateStore._write_all(conn, batch)
+        except sqlite3.Error as e:
+            # One debate's bad row must not drop the others' writes
+            logger.warning(f"Retrying {len(batch)} debate store operations one debate at a time: {e}")
+            SqliteDebateStore._write_per_debate(conn, batch)
+    
+    @staticmethod
+    def _write_all(conn: sqlite3.Connection, batch: list[tuple[Optional[str], str, tuple]]):
+        conn.execute("BEGIN")
+        try:
+            for _, sql, params in batch:
+                conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    @staticmethod
+    def _write_per_debate(conn: sqlite3.Connection, batch: list[tuple[Optional[str], str, tuple]]):
+        """Write each debate's operations under its own savepoint, skipping debates that fail."""
+        conn.execute("BEGIN")
+        try:
+            for group in _debate_groups(batch):
+                conn.execute("SAVEPOINT debate")
+                try:
+                    for _, sql, params in group:
+                        conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO debate")
+                    logger.error(f"Dropped {len(group)} debate store operations for debate {group[0][0]}: {e}")
+                conn.execute("RELEASE debate")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _enqueue(self, debate_id: Optional[str], sql: str, params: tuple):
+        self._pending.append((debate_id, sql, params))
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.flush_interval, self._start_flush)
+    
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def flush(self):
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        async with self._write_lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._run, self._write_batch, batch)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write {len(batch)} debate store operations: {e}")
+    
+    async def save_debate(self, state: DebateState):
+        self._enqueue(
+            state.id,
+            "INSERT INTO debates (id, config, status, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET config = excluded.config, status = excluded.status, "
+            "updated_at = excluded.updated_at",
+            (state.id, state.config.model_dump_json(), state.status.value, time.time())
+        )
+        for turn in state.turns:
+            self.append_turn(state.id, turn)
+    
+    def append_turn(self, debate_id: str, turn: DebateTurn):
+        self._enqueue(
+            debate_id,
+            "INSERT OR REPLACE INTO turns "
+            "(debate_id, debater, turn_number, timestamp, content, backend, truncated, chunk_timing) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (debate_id, *_turn_row(turn))
+        )
+        self._enqueue(debate_id, "UPDATE debates SET updated_at = ? WHERE id = ?", (time.time(), debate_id))
+    
+    def set_status(self, debate_id: str, status: DebateStatus):
+        self._enqueue(
+            debate_id,
+            "UPDATE debates SET status = ?, updated_at = ? WHERE id = ?",
+            (status.value, time.time(), debate_id)
+        )
+    
+    @staticmethod
+    def _read(conn: sqlite3.Connection, debate_id: str):
+        row = conn.execute("SELECT config, status FROM debates WHERE id = ?", (debate_id,)).fetchone()
+        if row is None:
+            return None
+        turns = conn.execute(
+            "SELECT debater, turn_number, timestamp, content, backend, truncated, chunk_timing FROM turns "
+            "WHERE debate_id = ? "
+            "ORDER BY turn_number",
+            (debate_id,)
+        ).fetchall()
+        return row[0], row[1], turns
+    
+    async def read_rows(self, debate_id: str) -> Optional[tuple[str, str, list[tuple]]]:
+        await self.flush()
+        return await asyncio.to_thread(self._run, self._read, debate_id)
+    
+    async def debate_ids(self) -> list[str]:
+        await self.flush()
+        rows = await asyncio.to_thread(
+            self._run, lambda conn: conn.execute("SELECT id FROM debates ORDER BY updated_at").fetchall()
+        )
+        return [row[0] for row in rows]
+    
+    async def purge(self, older_than: float):
+        self._enqueue(None, "DELETE FROM debates WHERE updated_at < ?", (older_than,))
+        await self.flush()
+    
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        await asyncio.gather(*self._flush_tasks)
+        await self.flush()
+        if self._conn is not None:
+            await asyncio.to_thread(self._run, lambda conn: conn.close())
+            self._conn = None
+
+
+def create_debate_store() -> DebateStore:
+    if settings.debate_store == "memory":
+        return MemoryDebateStore()
+    if settings.debate_store != "sqlite":
+        logger.warning(f"Unknown debate store '{settings.debate_store}', using sqlite")
+    return SqliteDebateStore()
+
+
+debate_store = create_debate_store()
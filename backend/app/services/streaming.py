@@ -0,0 +1,167 @@
+import asyncio
+import json
+from typing import Any, AsyncGenerator, Callable, Optional, Union
+
+from app.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Short codes used by the compact encodings
+EVENT_CODES = {
+    "debate_started": "ds",
+    "turn_started": "ts",
+    "turn_queued": "tq",
+    "content_chunk": "c",
+    "thinking_chunk": "th",
+    "turn_completed": "tc",
+    "debate_paused": "dp",
+    "debate_resumed": "dr",
+    "waiting_for_trigger": "wt",
+    "debate_completed": "dc",
+    "error": "e",
+    "resync": "rs",
+}
+KEY_CODES = {"type": "t", "debater": "d", "chunk": "c", "seq": "s"}
+# Events carrying a piece of streamed text, which may be merged
+CHUNK_EVENTS = {"content_chunk", "thinking_chunk"}
+
+
+def compact_event(event: dict[str, Any]) -> dict[str, Any]:
+    """Shorten the event type and the keys repeated on every chunk."""
+    compact = {}
+    for key, value in event.items():
+        if key == "type":
+            value = EVENT_CODES.get(value, value)
+        compact[KEY_CODES.get(key, key)] = value
+    return compact
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class EventEncoder:
+    """Serializes debate events into WebSocket frames."""
+    
+    def __init__(self, name: str, encode: Callable[[dict], Union[str, bytes]]):
+        self.name = name
+        self.encode = encode
+    
+    async def send(self, websocket, event: dict[str, Any]):
+        frame = self.encode(event)
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+
+def _encode_json(event: dict) -> str:
+    # Same output as WebSocket.send_json()
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+def _encode_compact_json(event: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(compact_event(event)).decode("utf-8")
+    return _encode_json(compact_event(event))
+
+
+def _encode_msgpack(event: dict) -> bytes:
+    return msgpack.packb(compact_event(event), default=_json_default)
+
+
+def get_encoder(name: str) -> Optional[EventEncoder]:
+    """
+    Look up an encoding negotiated by the client.
+
+    Returns None for unknown encodings and for msgpack when the optional
+    package is not installed.
+    """
+    if name == "json":
+        return EventEncoder(name, _encode_json)
+    if name == "compact-json":
+        return EventEncoder(name, _encode_compact_json)
+    if name == "msgpack" and msgpack is not None:
+        return EventEncoder(name, _encode_msgpack)
+    return None
+
+
+def merge_chunks(events: list[dict[str, Any]], max_bytes: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Merge runs of chunk events of one type from the same debater, up to max_bytes each.
+    
+    A merged chunk keeps the sequence number of the last chunk it contains,
+    so clients resuming from it never see a chunk twice.
+    """
+    merged: list[dict[str, Any]] = []
+    run: list[dict[str, Any]] = []
+    size = 0
+    
+    def flush():
+        nonlocal run, size
+        if len(run) == 1:
+            merged.append(run[0])
+        elif run:
+            merged.append({**run[-1], "chunk": "".join(e["chunk"] for e in run)})
+        run, size = [], 0
+    
+    for event in events:
+        if event.get("type") not in CHUNK_EVENTS:
+            flush()
+            merged.append(event)
+            continue
+        if run and (run[0].get("debater") != event.get("debater") or run[0]["type"] != event["type"]):
+            flush()
+        run.append(event)
+        if max_bytes is not None:
+            size += len(event["chunk"].encode("utf-8"))
+            if size >= max_bytes:
+                flush()
+    flush()
+    return merged
+
+
+async def coalesce_events(
+    subscriber,
+    window_ms: Optional[float] = None,
+    max_bytes: Optional[int] = None
+) -> AsyncGenerator[dict[str, Any], None]:
+    """
+    Read a subscriber's events, merging consecutive chunks from the same debater.
+    
+    The first chunk of a batch is held for window_ms; everything queued
+    meanwhile is then sent in order, with chunk runs merged up to max_bytes
+    per frame. A window of 0 passes every event through unchanged.
+    
+    Args:
+        subscriber: Event queue with async get() and non-blocking drain()
+        window_ms: How long a chunk may be held back
+        max_bytes: Largest merged chunk
+    """
+    if window_ms is None:
+        window_ms = settings.ws_coalesce_ms
+    if max_bytes is None:
+        max_bytes = settings.ws_coalesce_bytes
+    window = window_ms / 1000
+    
+    while True:
+        event = await subscriber.get()
+        if event is None:
+            return
+        if window <= 0 or event.get("type") not in CHUNK_EVENTS:
+            yield event
+            continue
+        
+        await asyncio.sleep(window)
+        for merged in merge_chunks([event, *subscriber.drain()], max_bytes):
+            yield merged
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from app.config import settings
+from app.models import (
+    DebateConfig, DebateMode, ModelInfo,
+    TournamentEntrant, TournamentSpec, TournamentProgress
+)
+from app.models.debate import DebaterConfig
+from app.providers.base import BaseProvider
+from app.services.debate import DebateOrchestrator
+from app.services.metrics import QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class GovernedProvider(BaseProvider):
+    """Wraps a provider so each request first takes a slot from its concurrency limits."""
+    
+    def __init__(self, provider: BaseProvider, slots: list[asyncio.Semaphore], labels: tuple[str, str] = ("", "")):
+        self.provider = provider
+        self.slots = slots
+        self.labels = labels  # provider and model, for the queue wait metric
+    
+    def is_available(self) -> bool:
+        return self.provider.is_available()
+    
+    async def list_models(self) -> list[ModelInfo]:
+        return await self.provider.list_models()
+    
+    async def generate_response(self, *args, **kwargs) -> AsyncGenerator[str, None]:
+        queued_at = time.monotonic()
+        for slot in self.slots:
+            await slot.acquire()
+        QUEUE_WAIT.observe(time.monotonic() - queued_at, *self.labels)
+        try:
+            async for chunk in self.provider.generate_response(*args, **kwargs):
+                yield chunk
+        finally:
+            for slot in reversed(self.slots):
+                slot.release()
+
+
+class ConcurrencyGovernor:
+    """Limits in-flight requests per provider and per provider/model."""
+    
+    def __init__(self, per_model: int, overrides: Optional[dict[str, int]] = None):
+        self.per_model = per_model
+        self.overrides = overrides or {}
+        self._slots: dict[str, asyncio.Semaphore] = {}
+    
+    def _slot(self, key: str, default: Optional[int]) -> Optional[asyncio.Semaphore]:
+        limit = self.overrides.get(key, default)
+        if limit is None:
+            return None
+        if key not in self._slots:
+            self._slots[key] = asyncio.Semaphore(limit)
+        return self._slots[key]
+    
+    def wrap(self, provider: BaseProvider, entrant: DebaterConfig) -> BaseProvider:
+        # Provider-wide limits only apply when configured, e.g. {"ollama": 1} for one local GPU
+        slots = [
+            self._slot(entrant.provider.value, None),
+            self._slot(f"{entrant.provider.value}/{entrant.model}", self.per_model),
+        ]
+        return GovernedProvider(
+            provider,
+            [slot for slot in slots if slot is not None],
+            (entrant.provider.value, entrant.model)
+        )
+
+
+def match_key(topic: str, a: TournamentEntrant, b: TournamentEntrant, repeat: int) -> str:
+    """Stable id of one debate in a tournament, used to resume it."""
+    payload = json.dumps([topic, a.model_dump(mode="json"), b.model_dump(mode="json"), repeat], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def build_matches(spec: TournamentSpec) -> list[tuple[str, DebateConfig]]:
+    """Every debate in the tournament, as (match key, config)."""
+    pairs = list(itertools.combinations(spec.entrants, 2))
+    if spec.both_sides:
+        pairs += [(b, a) for a, b in pairs]
+    
+    matches = []
+    for topic, (a, b), repeat in itertools.product(spec.topics, pairs, range(spec.repeats)):
+        config = DebateConfig(
+            topic=topic,
+            debater_a=DebaterConfig(position=spec.position_a, **a.model_dump()),
+            debater_b=DebaterConfig(position=spec.position_b, **b.model_dump()),
+            mode=DebateMode.AUTO,
+            max_turns=spec.max_turns,
+            auto_delay_seconds=0,
+            context_policy=spec.context_policy
+        )
+        matches.append((match_key(topic, a, b, repeat), config))
+    return matches
+
+
+def read_finished(path: Path) -> set[str]:
+    """Keys of debates already completed in a results file."""
+    finished = set()
+    if not path.exists():
+        return finished
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                # A line cut short by a crash; that debate runs again
+                continue
+            if result.get("status") == "completed":
+                finished.add(result["key"])
+    return finished
+
+
+class TournamentRunner:
+    """
+    Runs every debate of a tournament and appends each result to a JSONL file.
+
+    Debates run without streaming, since nobody watches them, and with at
+    most max_concurrency at once and per_model_concurrency requests per
+    model. Rerunning a tournament skips debates already in the file.
+    """
+    
+    def __init__(
+        self,
+        spec: TournamentSpec,
+        output: Optional[Path] = None,
+        on_progress: Optional[Callable[[TournamentProgress], None]] = None
+    ):
+        self.spec = spec
+        self.output = output or Path(settings.tournament_dir) / f"{spec.name}.jsonl"
+        self.on_progress = on_progress
+        self.matches = build_matches(spec)
+        self.progress = TournamentProgress(name=spec.name, total=len(self.matches))
+        self.governor = ConcurrencyGovernor(
+            spec.per_model_concurrency or settings.tournament_per_model_concurrency,
+            spec.concurrency_overrides
+        )
+        self._started_at = 0.0
+        self._write_lock = asyncio.Lock()
+    
+    def _report(self):
+        progress = self.progress
+        progress.elapsed_seconds = time.monotonic() - self._started_at
+        if progress.elapsed_seconds > 0:
+            progress.debates_per_minute = (progress.completed + progress.failed) * 60 / progress.elapsed_seconds
+            progress.tokens_per_second = progress.completion_tokens / progress.elapsed_seconds
+        if self.on_progress is not None:
+            self.on_progress(progress)
+    
+    async def _write(self, result: dict[str, Any]):
+        line = json.dumps(result, ensure_ascii=False, default=str) + "\n"
+        
+        def append():
+            with self.output.open("a", encoding="utf-8") as f:
+                f.write(line)
+        
+        async with self._write_lock:
+            await asyncio.to_thread(append)
+    
+    async def _run_match(self, key: str, config: DebateConfig, slots: asyncio.Semaphore):
+        orchestrator = DebateOrchestrator(config)
+        orchestrator.streaming = False
+        # Nobody could resume a paused match; it stops, and is resumed here
+        orchestrator.pause_on_rate_limit = False
+        # Hedge fallbacks take their slots too
+        orchestrator.wrap_providers(self.governor.wrap)
+        
+        started = time.monotonic()
+        usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        attempts = 0
+        while True:
+            attempts += 1
+            errors = []
+            rate_limited = False
+            async with slots:
+                self.progress.running += 1
+                try:
+                    # Carries on from the last completed turn on a retry
+                    async for event in orchestrator.run_debate():
+                        if event["type"] == "turn_completed":
+                            if event["provider_error"]:
+                                # Providers report some failures as the response text
+                                errors.append(event["content"])
+                            self.progress.turns += 1
+                            for field in usage:
+                                usage[field] += event["usage"][field]
+                            self.progress.completion_tokens += event["usage"]["completion_tokens"]
+                        elif event["type"] == "error":
+                            errors.append(event["error"])
+                            rate_limited = event.get("retryable", False)
+                except Exception as e:
+                    errors.append(str(e))
+                finally:
+                    self.progress.running -= 1
+            if not rate_limited or attempts > settings.tournament_rate_limit_retries:
+                break
+            logger.warning(f"Match {key} stopped by rate limits, resuming in {settings.tournament_retry_delay}s")
+            # Waits without holding a slot, so other matches can run meanwhile
+            await asyncio.sleep(settings.tournament_retry_delay)
+        
+        state = orchestrator.get_state()
+        await self._write({
+            "key": key,
+            "status": "failed" if errors else "completed",
+            "errors": errors,
+            "attempts": attempts,
+            "topic": config.topic,
+            "debater_a": config.debater_a.model_dump(mode="json"),
+            "debater_b": config.debater_b.model_dump(mode="json"),
+            "turns": [turn.model_dump(mode="json") for turn in state.turns],
+            "usage": usage,
+            "duration_seconds": round(time.monotonic() - started, 3),
+            "finished_at": datetime.now().isoformat(),
+        })
+        if errors:
+            self.progress.failed += 1
+        else:
+            self.progress.completed += 1
+        self._report()
+    
+    async def run(self) -> TournamentProgress:
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        finished = await asyncio.to_thread(read_finished, self.output)
+        pending = [(key, config) for key, config in self.matches if key not in finished]
+        self.progress.skipped = len(self.matches) - len(pending)
+        logger.info(
+            f"Tournament {self.spec.name}: {len(pending)} debates to run, "
+            f"{self.progress.skipped} already done"
+        )
+        
+        self._started_at = time.monotonic()
+        slots = asyncio.Semaphore(self.spec.max_concurrency or settings.tournament_max_concurrency)
+        await asyncio.gather(*(self._run_match(key, config, slots) for key, config in pending))
+        self.progress.finished = True
+        self._report()
+        return self.progress
+
+
+class TournamentRegistry:
+    """Tournaments started through the API, by name."""
+    
+    def __init__(self):
+        self._runners: dict[str, TournamentRunner] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+    
+    def start(self, spec: TournamentSpec) -> TournamentRunner:
+        task = self._tasks.get(spec.name)
+        if task is not None and not task.done():
+            return self._runners[spec.name]
+        runner = TournamentRunner(spec)
+        self._runners[spec.name] = runner
+        self._tasks[spec.name] = asyncio.create_task(runner.run())
+        return runner
+    
+    def get(self, name: str) -> Optional[TournamentRunner]:
+        return self._runners.get(name)
+    
+    async def cancel(self, name: str) -> bool:
+        task = self._tasks.get(name)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+    
+    async def shutdown(self):
+        for name in list(self._tasks):
+            await self.cancel(name)
+
+
+tournaments = TournamentRegistry()
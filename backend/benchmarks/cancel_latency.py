@@ -0,0 +1,157 @@
+"""
+Measure cancel-to-idle latency: how long after stop or pause a debate is idle
+and its upstream stream is closed.
+
+Starts the fake LLM server, points every provider at it, stops (or pauses)
+each debate part way through a turn and reports how long the orchestrator
+took to settle, how long until the server saw the stream closed, and how
+many tokens the server sent after the stop.
+Run from backend directory: python -m benchmarks.cancel_latency
+"""
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.config import settings
+from app.models import DebateConfig, ProviderType
+from app.providers.factory import ProviderFactory
+from app.providers.http import close_http_client
+from app.services.debate import DebateOrchestrator
+
+# Providers that stream from the fake server; replay reads files instead
+NETWORK_PROVIDERS = (ProviderType.OPENAI, ProviderType.ANTHROPIC, ProviderType.OLLAMA)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _server_stats(base_url: str) -> dict:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{base_url}/stats")).json()
+
+
+async def start_fake_server(token_rate: float) -> tuple[subprocess.Popen, str]:
+    """Start a fake LLM server that streams practically without end; returns it and its URL."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_llm",
+        "--port", str(port), "--tokens", "100000", "--token-rate", str(token_rate), "--ttft", "0"
+    ])
+    for _ in range(100):
+        try:
+            await _server_stats(base_url)
+            break
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+    return server, base_url
+
+
+def point_providers_at(base_url: str):
+    """Send every provider's requests to the fake server. Call before the providers are created."""
+    settings.openai_api_key = settings.anthropic_api_key = "fake"
+    settings.openai_base_url = f"{base_url}/v1"
+    settings.anthropic_base_url = settings.ollama_base_url = base_url
+    settings.response_cache_enabled = False
+
+
+async def run_case(provider: ProviderType, action: str, base_url: str, chunks_before: int) -> dict:
+    config = DebateConfig(
+        topic="Cancellation",
+        debater_a={"provider": provider.value, "model": "fake", "position": "For"},
+        debater_b={"provider": provider.value, "model": "fake", "position": "Against"},
+        mode="auto",
+        max_turns=2,
+        auto_delay_seconds=0
+    )
+    orchestrator = DebateOrchestrator(config)
+    received = 0
+    first_chunks = asyncio.Event()
+    idle = asyncio.Event()
+    
+    async def consume():
+        nonlocal received
+        async for event in orchestrator.run_debate():
+            if event["type"] == "content_chunk":
+                received += 1
+                if received >= chunks_before:
+                    first_chunks.set()
+            elif event["type"] == "turn_completed" and event.get("truncated"):
+                idle.set()
+            elif event["type"] in ("debate_paused", "debate_completed", "error"):
+                idle.set()
+    
+    task = asyncio.create_task(consume())
+    await asyncio.wait_for(first_chunks.wait(), 30)
+    before = await _server_stats(base_url)
+    
+    cancelled_at = time.time()
+    started = time.perf_counter()
+    orchestrator.stop() if action == "stop" else orchestrator.pause()
+    await asyncio.wait_for(idle.wait(), 30)
+    client_ms = (time.perf_counter() - started) * 1000
+    
+    # The server notices the hang-up on its next write
+    deadline = time.monotonic() + 5
+    while (stats := await _server_stats(base_url))["open_streams"] and time.monotonic() < deadline:
+        await asyncio.sleep(0.005)
+    
+    if action == "pause":
+        orchestrator.stop()
+    await asyncio.wait_for(task, 30)
+    
+    turn = orchestrator.state.turns[0] if orchestrator.state.turns else None
+    return {
+        "provider": provider.value,
+        "action": action,
+        "client_idle_ms": round(client_ms, 2),
+        "upstream_closed_ms": round((stats["last_closed_at"] - cancelled_at) * 1000, 2) if not stats["open_streams"] else None,
+        "tokens_after_cancel": stats["tokens_sent"] - before["tokens_sent"],
+        "open_streams": stats["open_streams"],
+        "truncated_turn": turn is not None and turn.truncated,
+        "generating": orchestrator.is_generating(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Words per second from the fake server")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks to receive before cancelling")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+    
+    server, base_url = await start_fake_server(args.token_rate)
+    try:
+        point_providers_at(base_url)
+        
+        if not args.json:
+            print(f"{'provider':<11}{'action':<8}{'idle ms':>9}{'upstream ms':>13}{'tokens after':>14}{'truncated':>11}")
+        for provider in NETWORK_PROVIDERS:
+            for action in ("stop", "pause"):
+                result = await run_case(provider, action, base_url, args.chunks)
+                if args.json:
+                    print(json.dumps(result))
+                    continue
+                upstream = f"{result['upstream_closed_ms']:.1f}" if result["upstream_closed_ms"] is not None else "open"
+                print(
+                    f"{result['provider']:<11}{result['action']:<8}{result['client_idle_ms']:>9.1f}"
+                    f"{upstream:>13}{result['tokens_after_cancel']:>14}{str(result['truncated_turn']):>11}"
+                )
+        await ProviderFactory.close_all()
+        await close_http_client()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
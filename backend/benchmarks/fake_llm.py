@@ -0,0 +1,342 @@
+"""
+Fake LLM server speaking the OpenAI, Anthropic and Ollama streaming APIs.
+
+Streams a fixed number of words per response at a fixed rate, with optional
+jitter and injected failures, so provider code can be exercised end to end
+without a real backend. /stats reports open streams and when the last one
+was closed, by either side. /requests returns the bodies and headers of
+recent requests, so tests can check the request shape providers send.
+Run from backend directory: python -m benchmarks.fake_llm [--port 9100]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Callable, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+# Requests kept for /requests
+REQUESTS_KEPT = 100
+
+
+class FakeLLM:
+    """Generates responses and keeps count of the streams in flight."""
+    
+    def __init__(
+        self,
+        tokens: int = 200,
+        token_rate: float = 50.0,
+        ttft: float = 0.2,
+        thinking: int = 0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        drop_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        self.tokens = tokens
+        self.thinking = thinking  # Reasoning words Ollama responses stream before the answer
+        self.token_rate = token_rate
+        self.ttft = ttft
+        self.jitter = jitter  # Each delay varies by up to this fraction either way
+        self.error_rate = error_rate  # Share of requests refused with error_status
+        self.error_status = error_status
+        self.drop_rate = drop_rate  # Share of streams cut off half way, without closing frames
+        self.random = random.Random(seed)
+        self.errors_injected = 0
+        self.streams_dropped = 0
+        self.open_streams = 0
+        self.completed_streams = 0
+        self.aborted_streams = 0
+        self.tokens_sent = 0
+        self.last_closed_at = 0.0
+        self.requests: deque[dict] = deque(maxlen=REQUESTS_KEPT)
+    
+    def record(self, request: Request, body: dict):
+        """Keep a request as the provider sent it."""
+        self.requests.append({"path": request.url.path, "headers": dict(request.headers), "body": body})
+    
+    def words(self, limit: Optional[int] = None) -> list[str]:
+        count = self.tokens if limit is None else min(self.tokens, limit)
+        return [f" word{i}" for i in range(count)]
+    
+    def delay(self, seconds: float) -> float:
+        if self.jitter and seconds > 0:
+            return seconds * self.random.uniform(1 - self.jitter, 1 + self.jitter)
+        return seconds
+    
+    def inject_error(self) -> bool:
+        """Whether this request should be refused."""
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors_injected += 1
+            return True
+        return False
+    
+    async def wait(self, words: list[str]):
+        """Take as long as streaming the words would, for non-streaming responses."""
+        await asyncio.sleep(self.delay(self.ttft + (len(words) / self.token_rate if self.token_rate > 0 else 0)))
+    
+    def thoughts(self) -> list[str]:
+        return [f" thought{i}" for i in range(self.thinking)]
+    
+    async def stream(
+        self,
+        frames: Callable[[str], list[str]],
+        head: list[str],
+        tail: list[str],
+        words: Optional[list[str]] = None
+    ) -> AsyncIterator[str]:
+        """Yield head frames, one or more frames per word at the token rate, then tail frames."""
+        self.open_streams += 1
+        completed = False
+        words = self.words() if words is None else words
+        drop_at = len(words) // 2 if self.drop_rate and self.random.random() < self.drop_rate else None
+        try:
+            await asyncio.sleep(self.delay(self.ttft))
+            for frame in head:
+                yield frame
+            interval = 1 / self.token_rate if self.token_rate > 0 else 0
+            for index, word in enumerate(words):
+                if index == drop_at:
+                    self.streams_dropped += 1
+                    return
+                if interval:
+                    await asyncio.sleep(self.delay(interval))
+                for frame in frames(word):
+                    yield frame
+                self.tokens_sent += 1
+            for frame in tail:
+                yield frame
+            completed = True
+        finally:
+            # Runs when the client hangs up too, since the response task is cancelled
+            self.open_streams -= 1
+            if completed:
+                self.completed_streams += 1
+            else:
+                self.aborted_streams += 1
+            self.last_closed_at = time.time()
+    
+    def stats(self) -> dict:
+        return {
+            "open_streams": self.open_streams,
+            "completed_streams": self.completed_streams,
+            "aborted_streams": self.aborted_streams,
+            "tokens_sent": self.tokens_sent,
+            "errors_injected": self.errors_injected,
+            "streams_dropped": self.streams_dropped,
+            "last_closed_at": self.last_closed_at,
+        }
+
+
+def _sse(data: dict, event: str = "") -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def create_app(llm: FakeLLM) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    
+    @app.get("/stats")
+    async def stats():
+        return llm.stats()
+    
+    @app.get("/requests")
+    async def requests():
+        return list(llm.requests)
+    
+    def error_headers() -> dict:
+        return {"retry-after": "1"} if llm.error_status == 429 else {}
+    
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        body = await request.json()
+        llm.record(request, body)
+        if llm.inject_error():
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "server_error", "param": None, "code": None}},
+                status_code=llm.error_status,
+                headers=error_headers()
+            )
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        
+        def chunk(delta: dict, finish_reason=None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+        
+        usage = {"prompt_tokens": 10, "completion_tokens": llm.tokens, "total_tokens": 10 + llm.tokens}
+        if not body.get("stream"):
+            words = llm.words(body.get("max_completion_tokens") or body.get("max_tokens"))
+            await llm.wait(words)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {**usage, "completion_tokens": len(words), "total_tokens": 10 + len(words)},
+            }
+        
+        tail = [_sse(chunk({}, "stop"))]
+        if (body.get("stream_options") or {}).get("include_usage"):
+            tail.append(_sse({**chunk({}), "choices": [], "usage": usage}))
+        tail.append("data: [DONE]\n\n")
+        return StreamingResponse(
+            llm.stream(lambda word: [_sse(chunk({"content": word}))], [_sse(chunk({"role": "assistant"}))], tail),
+            media_type="text/event-stream"
+        )
+    
+    @app.post("/v1/messages")
+    async def anthropic_messages(request: Request):
+        body = await request.json()
+        llm.record(request, body)
+        if llm.inject_error():
+            error_type = "rate_limit_error" if llm.error_status == 429 else "api_error"
+            return JSONResponse(
+                {"type": "error", "error": {"type": error_type, "message": "Injected failure"}},
+                status_code=llm.error_status,
+                headers=error_headers()
+            )
+        model = body.get("model", "fake")
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 0},
+        }
+        if not body.get("stream"):
+            words = llm.words(body.get("max_tokens"))
+            await llm.wait(words)
+            return {
+                **message,
+                "content": [{"type": "text", "text": "".join(words)}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": 10, "output_tokens": len(words)},
+            }
+        
+        head = [
+            _sse({"type": "message_start", "message": {**message, "content": []}}, "message_start"),
+            _sse({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}}, "content_block_start"),
+        ]
+        tail = [
+            _sse({"type": "content_block_stop", "index": 0}, "content_block_stop"),
+            _sse({
+                "type": "message_delta",
+                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                "usage": {"output_tokens": llm.tokens},
+            }, "message_delta"),
+            _sse({"type": "message_stop"}, "message_stop"),
+        ]
+        
+        def frames(word: str) -> list[str]:
+            delta = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": word}}
+            return [_sse(delta, "content_block_delta")]
+        
+        return StreamingResponse(llm.stream(frames, head, tail), media_type="text/event-stream")
+    
+    @app.get("/api/tags")
+    async def ollama_tags():
+        return {"models": [{"name": "fake", "size": 0}]}
+    
+    @app.post("/api/show")
+    async def ollama_show(request: Request):
+        capabilities = ["completion", "thinking"] if llm.thinking else ["completion"]
+        return {"model_info": {"fake.context_length": 8192}, "capabilities": capabilities}
+    
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        llm.record(request, body)
+        if llm.inject_error():
+            return JSONResponse({"error": "Injected failure"}, status_code=llm.error_status)
+        model = body.get("model", "fake")
+        done = {
+            "model": model,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "prompt_eval_count": 10,
+            "eval_count": llm.tokens,
+        }
+        if not body.get("stream", True):
+            words = llm.words((body.get("options") or {}).get("num_predict"))
+            await llm.wait(words)
+            return JSONResponse({
+                **done,
+                "message": {"role": "assistant", "content": "".join(words)},
+                "eval_count": len(words),
+            })
+        
+        thoughts = llm.thoughts() if body.get("think", True) else []
+        
+        def frames(word: str) -> list[str]:
+            field = "thinking" if word.startswith(" thought") else "content"
+            return [json.dumps({"model": model, "message": {"role": "assistant", field: word}, "done": False}) + "\n"]
+        
+        return StreamingResponse(
+            llm.stream(frames, [], [json.dumps(done) + "\n"], thoughts + llm.words()),
+            media_type="application/x-ndjson"
+        )
+    
+    return app
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    """Jitter and failure options, shared with the load test that starts this server."""
+    parser.add_argument("--jitter", type=float, default=0.0, help="Vary each delay by up to this fraction, e.g. 0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests refused, 0 to 1")
+    parser.add_argument("--error-status", type=int, default=500, help="Status of refused requests, e.g. 429 or 529")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Share of streams cut off half way, 0 to 1")
+    parser.add_argument("--seed", type=int, help="Seed for jitter and failures, for repeatable runs")
+
+
+def fault_arguments(args: argparse.Namespace) -> list[str]:
+    """The command line options add_fault_arguments parsed, to pass on to a server process."""
+    options = [
+        "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+        "--error-status", str(args.error_status), "--drop-rate", str(args.drop_rate),
+    ]
+    if args.seed is not None:
+        options += ["--seed", str(args.seed)]
+    return options
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--tokens", type=int, default=200, help="Words per response")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Words per second, 0 for no delay")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Seconds before the first word")
+    parser.add_argument("--thinking", type=int, default=0, help="Reasoning words before each Ollama answer")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    
+    llm = FakeLLM(
+        args.tokens, args.token_rate, args.ttft, args.thinking,
+        args.jitter, args.error_rate, args.error_status, args.drop_rate, args.seed
+    )
+    uvicorn.run(create_app(llm), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
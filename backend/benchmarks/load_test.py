@@ -0,0 +1,417 @@
+"""
+Load test: run many debates at once through the API and WebSocket.
+
+Starts the fake LLM server and the app (under uvicorn) with every provider
+pointed at the fake server, unless --url names an app that is already
+running. Opens N debates through /api/debate/start and their WebSockets,
+then reports debate throughput, event latency percentiles and the app's
+CPU and RSS. --output writes the results as JSON for comparison between
+releases; with --record it also keeps every debate, chunk timing
+included, so --providers replay can run the same traffic again.
+Run from backend directory: python -m benchmarks.load_test --debates 50 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+import websockets
+
+from benchmarks.fake_llm import add_fault_arguments, fault_arguments
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROVIDERS = ("openai", "anthropic", "ollama")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def summarize(values: list[float], scale: float = 1000.0) -> Optional[dict]:
+    """Count, mean and nearest-rank percentiles, scaled (to milliseconds by default)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    
+    def rank(p: float) -> float:
+        return round(ordered[min(int(p / 100 * len(ordered)), len(ordered) - 1)] * scale, 3)
+    
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * scale, 3),
+        "p50": rank(50),
+        "p90": rank(90),
+        "p99": rank(99),
+        "max": round(ordered[-1] * scale, 3),
+    }
+
+
+class ResourceSampler:
+    """Samples a process's CPU time and resident memory, with psutil or /proc."""
+    
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.rss_samples: list[int] = []
+        self.cpu_percent_samples: list[float] = []
+        self._start_cpu: Optional[float] = None
+        self._start_time = 0.0
+        self._task: Optional[asyncio.Task] = None
+    
+    def _read(self) -> Optional[tuple[float, int]]:
+        """CPU seconds used so far and current RSS in bytes."""
+        try:
+            if psutil is not None:
+                process = psutil.Process(self.pid)
+                times = process.cpu_times()
+                return times.user + times.system, process.memory_info().rss
+            with open(f"/proc/{self.pid}/stat") as f:
+                # Fields after the command name, which may itself contain spaces
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            with open(f"/proc/{self.pid}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+            return (int(fields[11]) + int(fields[12])) / ticks, resident_pages * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            # The process is gone, or there is neither psutil nor /proc here
+            return None
+    
+    async def _run(self):
+        last = self._read()
+        last_time = time.monotonic()
+        while last is not None:
+            await asyncio.sleep(self.interval)
+            sample = self._read()
+            if sample is None:
+                return
+            now = time.monotonic()
+            self.cpu_percent_samples.append((sample[0] - last[0]) / (now - last_time) * 100)
+            self.rss_samples.append(sample[1])
+            last, last_time = sample, now
+    
+    def start(self):
+        reading = self._read()
+        self._start_cpu = reading[0] if reading else None
+        self._start_time = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> Optional[dict]:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        reading = self._read()
+        if reading is None or self._start_cpu is None:
+            return None
+        elapsed = time.monotonic() - self._start_time
+        cpu_seconds = reading[0] - self._start_cpu
+        rss = self.rss_samples or [reading[1]]
+        return {
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_percent_mean": round(cpu_seconds / elapsed * 100, 1) if elapsed > 0 else None,
+            "cpu_percent_max": round(max(self.cpu_percent_samples), 1) if self.cpu_percent_samples else None,
+            "rss_mb_max": round(max(rss) / 2**20, 1),
+            "rss_mb_end": round(reading[1] / 2**20, 1),
+        }
+
+
+class LoadStats:
+    """Client-side timings collected across every debate."""
+    
+    def __init__(self):
+        self.start_request: list[float] = []  # POST /api/debate/start
+        self.first_event: list[float] = []  # WebSocket connect to debate_started
+        self.ttft: list[float] = []  # turn_started to the turn's first content_chunk
+        self.event_gap: list[float] = []  # Between consecutive content_chunk events
+        self.turn_duration: list[float] = []  # turn_started to turn_completed
+        self.debate_duration: list[float] = []
+        self.completed = 0
+        self.failed = 0
+        self.turns = 0
+        self.events = 0
+        self.completion_tokens = 0
+        self.error_events = 0
+        self.resumes = 0
+        self.recordings: list[dict] = []  # Completed debates, kept with --record
+
+
+def debate_config(index: int, args: argparse.Namespace) -> dict:
+    providers = args.providers
+    debater = {"model": args.model, "max_tokens": args.max_tokens}
+    return {
+        "topic": f"Load test debate {index}",
+        "debater_a": {**debater, "provider": providers[index % len(providers)], "position": "For"},
+        "debater_b": {**debater, "provider": providers[(index + 1) % len(providers)], "position": "Against"},
+        "mode": "auto",
+        "max_turns": args.turns,
+        "auto_delay_seconds": 0,
+    }
+
+
+async def run_debate(index: int, args: argparse.Namespace, client: httpx.AsyncClient, stats: LoadStats):
+    started = time.perf_counter()
+    config = debate_config(index, args)
+    response = await client.post("/api/debate/start", json=config)
+    response.raise_for_status()
+    stats.start_request.append(time.perf_counter() - started)
+    debate_id = response.json()["id"]
+    
+    ws_url = args.url.replace("http", "ws", 1) + f"/api/debate/{debate_id}/ws"
+    connected = time.perf_counter()
+    turn_started = last_chunk = None
+    first_chunk_seen = False
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        async for message in ws:
+            now = time.perf_counter()
+            event = json.loads(message)
+            stats.events += 1
+            kind = event.get("type")
+            if kind == "debate_started":
+                stats.first_event.append(now - connected)
+            elif kind == "turn_started":
+                turn_started, last_chunk, first_chunk_seen = now, None, False
+            elif kind == "content_chunk":
+                if not first_chunk_seen and turn_started is not None:
+                    stats.ttft.append(now - turn_started)
+                    first_chunk_seen = True
+                if last_chunk is not None:
+                    stats.event_gap.append(now - last_chunk)
+                last_chunk = now
+            elif kind == "turn_completed":
+                stats.turns += 1
+                stats.completion_tokens += (event.get("usage") or {}).get("completion_tokens", 0)
+                if turn_started is not None:
+                    stats.turn_duration.append(now - turn_started)
+            elif kind == "debate_paused":
+                # Rate limited past the turn deadline; carry on as a viewer would
+                stats.resumes += 1
+                await client.post(f"/api/debate/{debate_id}/resume")
+            elif kind == "error":
+                stats.error_events += 1
+            elif kind is None and "error" in event:
+                # Refused by the endpoint itself, e.g. an unknown debate or encoding
+                raise RuntimeError(event["error"])
+            elif kind == "debate_completed":
+                if args.record:
+                    # Turns carry their chunk timing, so the replay provider can serve this run again
+                    stats.recordings.append({"config": config, "turns": event["turns"]})
+                break
+    stats.debate_duration.append(time.perf_counter() - started)
+
+
+async def run_load(args: argparse.Namespace, stats: LoadStats) -> float:
+    """Run every debate, at most args.concurrency at a time; returns the wall time."""
+    slots = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        async def one(index: int):
+            async with slots:
+                try:
+                    await asyncio.wait_for(run_debate(index, args, client, stats), args.timeout)
+                    stats.completed += 1
+                except Exception as e:
+                    stats.failed += 1
+                    print(f"Debate {index} failed: {e!r}", file=sys.stderr)
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(args.debates)))
+        return time.perf_counter() - started
+
+
+async def _wait_until_up(url: str, path: str, ready=lambda response: True, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                response = await client.get(url + path)
+                if response.status_code == 200 and ready(response):
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url}{path} did not come up within {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percent(value: Optional[float]) -> str:
+    # None when the run was too short for the sampler to take a reading
+    return "n/a" if value is None else f"{value}%"
+
+
+def print_report(report: dict):
+    results = report["results"]
+    print(
+        f"{results['completed']}/{report['parameters']['debates']} debates in {results['wall_seconds']:.1f}s "
+        f"({results['failed']} failed, {results['error_events']} error events)"
+    )
+    print(
+        f"{results['debates_per_second']:.2f} debates/s, {results['turns_per_second']:.1f} turns/s, "
+        f"{results['tokens_per_second']:.0f} tokens/s, {results['events_per_second']:.0f} events/s"
+    )
+    print(f"{'latency (ms)':<18}{'count':>8}{'mean':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for name, summary in results["latency_ms"].items():
+        if summary is None:
+            continue
+        print(
+            f"{name:<18}{summary['count']:>8}{summary['mean']:>10.1f}{summary['p50']:>10.1f}"
+            f"{summary['p90']:>10.1f}{summary['p99']:>10.1f}{summary['max']:>10.1f}"
+        )
+    server = results["server"]
+    if server:
+        print(
+            f"server: {server['cpu_seconds']:.1f} CPU s, {_percent(server['cpu_percent_mean'])} mean / "
+            f"{_percent(server['cpu_percent_max'])} max CPU, {server['rss_mb_max']} MB max RSS"
+        )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Base URL of a running app; by default one is started against the fake server")
+    parser.add_argument("--pid", type=int, help="Process id of the app given by --url, to sample its CPU and RSS")
+    parser.add_argument("--debates", type=int, default=20, help="Debates to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="Debates at once")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per debate")
+    parser.add_argument("--max-tokens", type=int, default=100, help="Token limit per turn")
+    parser.add_argument("--model", default="fake", help="Model for every debater, e.g. a recording with --providers replay")
+    parser.add_argument("--replay-dir", help="Recordings directory for the started app's replay provider")
+    parser.add_argument(
+        "--providers", type=lambda value: value.split(","), default=list(PROVIDERS),
+        help="Comma-separated providers, assigned to debaters in turn"
+    )
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds before a debate counts as failed")
+    parser.add_argument("--tokens", type=int, default=100, help="Words per fake response")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Fake words per second, 0 for no delay")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Fake seconds before the first word")
+    add_fault_arguments(parser)
+    parser.add_argument("--app-log", help="File for the started app's log output (default: discarded)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--record", action="store_true",
+        help="Include every completed debate in --output, for replay with --providers replay"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+    
+    processes: list[subprocess.Popen] = []
+    fake_url = None
+    try:
+        pid = args.pid
+        if args.url is None:
+            fake_url = f"http://127.0.0.1:{_free_port()}"
+            processes.append(subprocess.Popen([
+                sys.executable, "-m", "benchmarks.fake_llm", "--port", fake_url.rsplit(":", 1)[1],
+                "--tokens", str(args.tokens), "--token-rate", str(args.token_rate), "--ttft", str(args.ttft),
+                *fault_arguments(args)
+            ]))
+            await _wait_until_up(fake_url, "/stats")
+            
+            port = _free_port()
+            args.url = f"http://127.0.0.1:{port}"
+            env = {
+                **os.environ,
+                "OPENAI_API_KEY": "fake",
+                "ANTHROPIC_API_KEY": "fake",
+                "OPENAI_BASE_URL": f"{fake_url}/v1",
+                "ANTHROPIC_BASE_URL": fake_url,
+                "OLLAMA_BASE_URL": fake_url,
+                "DEBATE_STORE": "memory",
+                "RESPONSE_CACHE_ENABLED": "false",
+                "CAPABILITY_PROBE_ENABLED": "false",
+                "CLUSTER_ENABLED": "false",
+            }
+            if args.replay_dir:
+                env["REPLAY_DIR"] = args.replay_dir
+            log = open(args.app_log, "w") if args.app_log else subprocess.DEVNULL
+            app = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+                env=env,
+                stdout=log,
+                stderr=log
+            )
+            processes.append(app)
+            pid = app.pid
+            # Ollama counts as available once the background health probe has seen it
+            await _wait_until_up(
+                args.url, "/api/providers/available",
+                lambda response: all(response.json()[p]["available"] for p in args.providers)
+            )
+        
+        sampler = ResourceSampler(pid) if pid else None
+        if sampler:
+            sampler.start()
+        stats = LoadStats()
+        wall = await run_load(args, stats)
+        server = await sampler.stop() if sampler else None
+        
+        fake_stats = None
+        if fake_url:
+            async with httpx.AsyncClient() as client:
+                fake_stats = (await client.get(f"{fake_url}/stats")).json()
+        
+        report = {
+            "benchmark": "load_test",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "json", "app_log", "record")},
+            "results": {
+                "completed": stats.completed,
+                "failed": stats.failed,
+                "error_events": stats.error_events,
+                "resumes": stats.resumes,
+                "wall_seconds": round(wall, 3),
+                "debates_per_second": round(stats.completed / wall, 3) if wall else 0.0,
+                "turns_per_second": round(stats.turns / wall, 3) if wall else 0.0,
+                "tokens_per_second": round(stats.completion_tokens / wall, 1) if wall else 0.0,
+                "events_per_second": round(stats.events / wall, 1) if wall else 0.0,
+                "latency_ms": {
+                    "start_request": summarize(stats.start_request),
+                    "first_event": summarize(stats.first_event),
+                    "ttft": summarize(stats.ttft),
+                    "chunk_gap": summarize(stats.event_gap),
+                    "turn": summarize(stats.turn_duration),
+                    "debate": summarize(stats.debate_duration),
+                },
+                "server": server,
+                "fake_llm": fake_stats,
+            },
+        }
+        if args.record:
+            report["recordings"] = stats.recordings
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if args.json:
+            print(json.dumps(report))
+        else:
+            print_report(report)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,345 @@
+"""
+Microbenchmarks for the code that runs every turn or every chunk.
+
+Each benchmark is timed as the best of several repeats, and is also
+expressed relative to a fixed pure-Python reference workload timed in the
+same run. Comparing those relative numbers keeps baselines usable on a
+faster or slower machine. --save stores the current run as the baseline;
+--check compares against it and exits with status 1 when a benchmark got
+slower than its baseline by more than the threshold.
+Run from backend directory: python -m benchmarks.micro [--check | --save] [--filter build_messages]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from app.config import settings
+from app.models import (
+    CacheHints, DebateConfig, DebateExport, DebateTurn, ModelInfo, ProviderType
+)
+from app.providers.anthropic import AnthropicProvider
+from app.providers.base import BaseProvider
+from app.providers.capabilities import bundled_capabilities
+from app.providers.factory import ProviderFactory
+from app.providers.openai import OpenAIProvider
+from app.services.debate import DebateOrchestrator
+from app.services.streaming import get_encoder
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+DEFAULT_THRESHOLD = 0.25  # Allowed slowdown relative to the baseline, as a fraction
+
+# name -> setup function returning the operation to time
+BENCHMARKS: dict[str, Callable[[], Callable[[], Any]]] = {}
+
+TURN_TEXT = (
+    "I maintain that the evidence favours my position. The studies my opponent cites "
+    "measure a different population, and their own authors caution against generalising. "
+)
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class InstantProvider(BaseProvider):
+    """Streams a fixed reply with no latency, so only the orchestrator is measured."""
+    
+    def __init__(self, chunks: int = 50):
+        self.chunks = [f" word{i}" for i in range(chunks)]
+    
+    def is_available(self) -> bool:
+        return True
+    
+    async def list_models(self) -> list[ModelInfo]:
+        return []
+    
+    async def generate_response(self, messages, model, temperature=0.7, max_tokens=350, stream=True, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _config(**overrides) -> DebateConfig:
+    return DebateConfig(
+        topic="Microbenchmark",
+        debater_a={"provider": "openai", "model": "gpt-4o", "position": "For"},
+        debater_b={"provider": "anthropic", "model": "claude-3-5-sonnet-latest", "position": "Against"},
+        mode="auto",
+        max_turns=10,
+        auto_delay_seconds=0,
+        use_response_cache=False,
+        **overrides
+    )
+
+
+def _turns(count: int) -> list[DebateTurn]:
+    start = datetime(2024, 1, 1)
+    return [
+        DebateTurn(
+            debater="A" if i % 2 == 0 else "B",
+            content=f"Turn {i + 1}. " + TURN_TEXT * 3,
+            timestamp=start + timedelta(seconds=i),
+            turn_number=i + 1
+        )
+        for i in range(count)
+    ]
+
+
+def _orchestrator(turns: int, **overrides) -> DebateOrchestrator:
+    orchestrator = DebateOrchestrator(_config(**overrides))
+    orchestrator.load_turns(_turns(turns))
+    return orchestrator
+
+
+def _turn_step(orchestrator: DebateOrchestrator) -> Callable[[], Any]:
+    """
+    One turn of a debate of fixed length: record A's turn, then build and
+    format B's next request. The turn is taken back out after each call so
+    the transcript doesn't grow across calls.
+    """
+    number = len(orchestrator.state.turns) + 1
+    turn = DebateTurn(
+        debater="A",
+        content=f"Turn {number}. " + TURN_TEXT * 3,
+        timestamp=datetime(2024, 1, 1),
+        turn_number=number
+    )
+    for debater in ("A", "B"):
+        # As a running debate would have, so only this turn's share of the window work is timed
+        orchestrator._build_messages(debater)
+    views = list(orchestrator._views.values())
+    windows = list(orchestrator._windows.values())
+    
+    def step():
+        saved = [
+            (window, len(window._prefix_tokens), list(window._summary_lines), window._summary_chars, window._summarized)
+            for window in windows
+        ]
+        orchestrator._record_round([turn])
+        messages = orchestrator._build_messages("B")
+        request = AnthropicProvider.split_system(messages)
+        
+        del orchestrator.state.turns[-1]
+        for view in views:
+            del view._chat[-1]
+            del view._dicts[-1]
+        for window, counted, lines, chars, summarized in saved:
+            del window._prefix_tokens[counted:]
+            window._summary_lines, window._summary_chars, window._summarized = lines, chars, summarized
+        return request
+    return step
+
+
+for _policy in ("full", "token_budget", "rolling_summary"):
+    for _size in (10, 100, 1000):
+        def _setup(policy=_policy, size=_size):
+            return _turn_step(_orchestrator(size, context_policy=policy))
+        benchmark(f"build_messages_{_policy}_{_size}")(_setup)
+
+
+@benchmark("run_debate_10_turns_50_chunks")
+def _run_debate():
+    provider = InstantProvider(50)
+    for provider_type in ProviderType:
+        ProviderFactory._instances[provider_type] = provider
+    loop = asyncio.new_event_loop()
+    
+    async def run():
+        async for _ in DebateOrchestrator(_config()).run_debate():
+            pass
+    
+    return lambda: loop.run_until_complete(run())
+
+
+@benchmark("anthropic_request_100_turns")
+def _anthropic_request():
+    view = _orchestrator(100)._build_messages("B")
+    hints = CacheHints(prefix_messages=98, session_id="bench:B")
+    
+    def build():
+        system, chat = AnthropicProvider.split_system(view)
+        return AnthropicProvider._mark_cacheable(view, system, chat, hints)
+    return build
+
+
+@benchmark("openai_request_100_turns")
+def _openai_request():
+    view = _orchestrator(100)._build_messages("A")
+    capabilities = bundled_capabilities("openai", "gpt-4o")
+    
+    def build():
+        return {
+            "model": "gpt-4o",
+            "messages": OpenAIProvider.format_messages(view, stable_prefix_first=True),
+            "stream": True,
+            **OpenAIProvider._sampling_params(capabilities, 0.7, 350, None),
+        }
+    return build
+
+
+@benchmark("debate_state_json_100_turns")
+def _state_json():
+    state = _orchestrator(100).get_state()
+    return state.model_dump_json
+
+
+@benchmark("debate_export_json_100_turns")
+def _export_json():
+    state = _orchestrator(100).get_state()
+    export = DebateExport(config=state.config, turns=state.turns, exported_at=datetime(2024, 1, 1))
+    return export.model_dump_json
+
+
+@benchmark("debate_export_validate_100_turns")
+def _export_validate():
+    state = _orchestrator(100).get_state()
+    data = DebateExport(config=state.config, turns=state.turns, exported_at=datetime(2024, 1, 1)).model_dump_json()
+    return lambda: DebateExport.model_validate_json(data)
+
+
+for _encoding in ("json", "compact-json", "msgpack"):
+    def _setup(encoding=_encoding):
+        encoder = get_encoder(encoding)
+        if encoder is None:
+            return None
+        event = {"type": "content_chunk", "debater": "A", "chunk": " word", "seq": 1234}
+        return lambda: encoder.encode(event)
+    benchmark(f"ws_encode_chunk_{_encoding}")(_setup)
+
+
+def reference_workload():
+    """Fixed pure-Python work that scales with the machine like the benchmarks do."""
+    data = {"turns": [{"debater": "A", "content": TURN_TEXT, "n": i} for i in range(20)]}
+    for _ in range(5):
+        json.loads(json.dumps(data))
+    sum(len(turn["content"]) for turn in data["turns"])
+
+
+def measure(operation: Callable[[], Any], min_time: float, repeat: int) -> float:
+    """Best seconds per call over the repeats, each long enough to time reliably."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 4:
+            break
+        number *= 4 if elapsed < min_time / 40 else 2
+    
+    best = elapsed / number
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best
+
+
+def run(names: list[str], min_time: float, repeat: int) -> dict[str, Any]:
+    # Benchmarks measure in-process work only
+    settings.response_cache_enabled = False
+    settings.prompt_caching = True
+    
+    reference = measure(reference_workload, min_time, repeat)
+    results = {}
+    for name in names:
+        operation = BENCHMARKS[name]()
+        if operation is None:
+            # Optional package not installed
+            continue
+        seconds = measure(operation, min_time, repeat)
+        results[name] = {"ns": round(seconds * 1e9, 1), "relative": round(seconds / reference, 6)}
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "reference_ns": round(reference * 1e9, 1),
+        "benchmarks": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Per benchmark: relative change against the baseline and whether it regressed."""
+    thresholds = baseline.get("thresholds", {})
+    rows = []
+    for name, result in current["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None:
+            rows.append({"name": name, "change": None, "regressed": False})
+            continue
+        change = result["relative"] / base["relative"] - 1
+        limit = thresholds.get(name, threshold)
+        rows.append({"name": name, "change": round(change, 4), "limit": limit, "regressed": change > limit})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="Exit with status 1 if a benchmark regressed")
+    mode.add_argument("--save", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown, e.g. 0.25")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed repeat")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    
+    names = [name for name in BENCHMARKS if args.filter in name]
+    current = run(names, args.min_time, args.repeat)
+    
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    
+    if args.save:
+        if baseline is not None:
+            # Keep baselines of benchmarks this run skipped, and any per-benchmark thresholds
+            current["benchmarks"] = {**baseline["benchmarks"], **current["benchmarks"]}
+            if "thresholds" in baseline:
+                current["thresholds"] = baseline["thresholds"]
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+    
+    rows = compare(current, baseline, args.threshold) if baseline is not None and not args.save else []
+    changes = {row["name"]: row for row in rows}
+    if args.json:
+        print(json.dumps({**current, "comparison": rows}))
+    else:
+        print(f"reference workload: {current['reference_ns'] / 1000:.1f} us")
+        print(f"{'benchmark':<40}{'time':>12}{'relative':>10}{'vs baseline':>13}")
+        for name, result in current["benchmarks"].items():
+            row = changes.get(name)
+            versus = ""
+            if row is not None:
+                versus = "new" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+                if row["regressed"]:
+                    versus += " !"
+            print(f"{name:<40}{result['ns'] / 1000:>10.2f}us{result['relative']:>10.3f}{versus:>13}")
+        if args.save:
+            print(f"Saved baseline to {args.baseline}")
+    
+    if args.check:
+        if baseline is None:
+            print(f"No baseline at {args.baseline}; run with --save first", file=sys.stderr)
+            sys.exit(2)
+        regressed = [row for row in rows if row["regressed"]]
+        for row in regressed:
+            print(
+                f"REGRESSION {row['name']}: {row['change'] * 100:+.1f}% (limit {row['limit'] * 100:.0f}%)",
+                file=sys.stderr
+            )
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
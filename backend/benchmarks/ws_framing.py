@@ -0,0 +1,125 @@
+"""
+Benchmark WebSocket framing: frames per turn and server CPU per encoding
+and coalescing window.
+
+Drives the debate WebSocket handler in-process against a scripted provider
+and a recording socket, so only server-side work is measured.
+Run from backend directory: python -m benchmarks.ws_framing
+"""
+import argparse
+import asyncio
+import time
+
+from app.models import DebateConfig, ProviderType, ModelInfo
+from app.providers.base import BaseProvider
+from app.providers.factory import ProviderFactory
+from app.routers import debate as debate_router
+from app.services.debate import DebateOrchestrator
+from app.services.sessions import sessions
+
+
+class ScriptedProvider(BaseProvider):
+    """Streams a fixed number of short tokens at a fixed interval."""
+    
+    def __init__(self, tokens: int, interval: float):
+        self.tokens = tokens
+        self.interval = interval
+    
+    def is_available(self) -> bool:
+        return True
+    
+    async def list_models(self) -> list[ModelInfo]:
+        return []
+    
+    async def generate_response(self, messages, model, temperature=0.7, max_tokens=350, stream=True, **kwargs):
+        for i in range(self.tokens):
+            await asyncio.sleep(self.interval)
+            yield f" tok{i}"
+
+
+class RecordingWebSocket:
+    """Just enough of starlette's WebSocket for the debate handler."""
+    
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+    
+    async def accept(self):
+        pass
+    
+    async def receive(self) -> dict:
+        # The benchmark client never sends anything or hangs up
+        await asyncio.Event().wait()
+    
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data.encode("utf-8"))
+    
+    async def send_bytes(self, data: bytes):
+        self.frames += 1
+        self.bytes += len(data)
+    
+    async def send_json(self, data):
+        self.frames += 1
+    
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def run_case(encoding: str, coalesce_ms: float, turns: int) -> dict:
+    config = DebateConfig(
+        topic="Benchmark",
+        debater_a={"provider": "ollama", "model": "bench", "position": "For"},
+        debater_b={"provider": "ollama", "model": "bench", "position": "Against"},
+        mode="auto",
+        max_turns=turns,
+        auto_delay_seconds=0
+    )
+    orchestrator = DebateOrchestrator(config)
+    await sessions.add(orchestrator)
+    websocket = RecordingWebSocket()
+    
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    await debate_router.debate_websocket(
+        websocket, orchestrator.state.id, encoding=encoding, coalesce_ms=coalesce_ms
+    )
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    
+    return {
+        "encoding": encoding,
+        "coalesce_ms": coalesce_ms,
+        "frames_per_turn": websocket.frames / turns,
+        "bytes_per_turn": websocket.bytes / turns,
+        "cpu_ms_per_turn": cpu * 1000 / turns,
+        "wall_s": wall,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--tokens", type=int, default=300, help="Tokens per turn")
+    parser.add_argument("--interval", type=float, default=0.002, help="Seconds between tokens")
+    args = parser.parse_args()
+    
+    provider = ScriptedProvider(args.tokens, args.interval)
+    for provider_type in ProviderType:
+        ProviderFactory._instances[provider_type] = provider
+    
+    cases = [("json", 0), ("json", 25), ("json", 100), ("compact-json", 0), ("compact-json", 25), ("msgpack", 25)]
+    print(f"{'encoding':<14}{'window':>8}{'frames/turn':>14}{'bytes/turn':>12}{'cpu ms/turn':>13}")
+    for encoding, window in cases:
+        result = await run_case(encoding, window, args.turns)
+        if result["frames_per_turn"] <= 1:
+            print(f"{encoding:<14}{window:>8}  (encoding not available)")
+            continue
+        print(
+            f"{encoding:<14}{window:>8}{result['frames_per_turn']:>14.1f}"
+            f"{result['bytes_per_turn']:>12.0f}{result['cpu_ms_per_turn']:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
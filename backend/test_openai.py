@@ -104,6 +104,21 @@ async def test_provider(model: str = "gpt-5-nano"):
         return False
 
 
+async def test_capabilities(model: str = "gpt-5-nano"):
+    """Show what the capability registry will send for this model, probing it if needed."""
+    print(f"\n{'='*60}")
+    print(f"Capabilities for model: {model}")
+    print(f"{'='*60}")
+    
+    from app.providers.openai import OpenAIProvider
+    from app.providers.capabilities import capability_registry
+    
+    provider = OpenAIProvider()
+    capabilities = await capability_registry.ensure("openai", model, provider.probe_capabilities)
+    print(capabilities.model_dump_json(indent=2))
+    return True
+
+
 async def main():
     import openai
     print(f"OpenAI library version: {openai.__version__}")
@@ -112,6 +127,7 @@ async def main():
     
     await test_raw_api(model)
     await test_provider(model)
+    await test_capabilities(model)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from anthropic import AsyncAnthropic
+from openai import AsyncOpenAI
+
+from app.models import DebateConfig, ProviderType
+from app.providers import http
+from app.providers.anthropic import AnthropicProvider
+from app.providers.capabilities import capability_registry
+from app.providers.factory import ProviderFactory
+from app.providers.ollama import OllamaProvider
+from app.providers.openai import OpenAIProvider
+from benchmarks.fake_llm import FakeLLM, create_app
+
+FAKE_URL = "http://fake-llm"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def llm() -> FakeLLM:
+    """A fake LLM that answers at once."""
+    return FakeLLM(tokens=5, token_rate=0, ttft=0)
+
+
+@pytest.fixture
+def providers(llm, monkeypatch, tmp_path) -> dict[ProviderType, object]:
+    """Every provider pointed at the fake LLM in-process, without rate limiting."""
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(llm)))
+    openai = OpenAIProvider()
+    openai.client = AsyncOpenAI(api_key="test", base_url=f"{FAKE_URL}/v1", http_client=client, max_retries=0)
+    anthropic = AnthropicProvider()
+    anthropic.client = AsyncAnthropic(api_key="test", base_url=FAKE_URL, http_client=client, max_retries=0)
+    ollama = OllamaProvider()
+    ollama.base_url = FAKE_URL
+    ollama.health.record_success(probe=True)
+    instances = {ProviderType.OPENAI: openai, ProviderType.ANTHROPIC: anthropic, ProviderType.OLLAMA: ollama}
+    
+    monkeypatch.setattr(http, "_client", client)
+    monkeypatch.setattr(ProviderFactory, "_instances", dict(instances))
+    # Probed capabilities stay out of the real capabilities file
+    monkeypatch.setattr(capability_registry, "path", tmp_path / "capabilities.json")
+    return instances
+
+
+def debate_config(provider: ProviderType, model: str, **overrides) -> DebateConfig:
+    fields = {
+        "topic": "Remote work is better than office work",
+        "debater_a": {"provider": provider.value, "model": model, "position": "For"},
+        "debater_b": {"provider": provider.value, "model": model, "position": "Against"},
+        "mode": "auto",
+        "max_turns": 4,
+        "auto_delay_seconds": 0,
+        "use_response_cache": False,
+    }
+    fields.update(overrides)
+    return DebateConfig(**fields)
@@ -0,0 +1,116 @@
+"""Bulk export and import of debate archives, against the in-memory store."""
+import json
+from datetime import datetime
+
+import pytest
+
+from app.models import DebateExport, DebateState, DebateStatus, DebateTurn, ProviderType
+from app.services.archive import ARCHIVE_FORMAT, ARCHIVE_VERSION, ArchiveError, ArchiveImport, export_archive
+from app.services.store import MemoryDebateStore
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+HEADER = {"format": ARCHIVE_FORMAT, "version": ARCHIVE_VERSION}
+
+
+def turn(number: int) -> DebateTurn:
+    return DebateTurn(
+        debater="A" if number % 2 else "B",
+        content=f"turn {number}",
+        timestamp=datetime(2024, 1, 1),
+        turn_number=number
+    )
+
+
+def lines(*records) -> bytes:
+    return b"".join(json.dumps(record).encode() + b"\n" for record in (HEADER, *records))
+
+
+async def chunks(data: bytes, size: int):
+    """A request body arriving in pieces of the given size."""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def store_with(statuses: dict[str, DebateStatus], turns: int = 3) -> MemoryDebateStore:
+    store = MemoryDebateStore()
+    for debate_id, status in statuses.items():
+        state = DebateState(id=debate_id, config=debate_config(ProviderType.OLLAMA, "fake"), status=status)
+        state.turns = [turn(number) for number in range(1, turns + 1)]
+        await store.save_debate(state)
+    return store
+
+
+async def export(store: MemoryDebateStore, compression: str) -> bytes:
+    return b"".join([data async for data in export_archive(store, await store.debate_ids(), compression)])
+
+
+@pytest.mark.parametrize("compression", ["none", "gzip"])
+async def test_round_trip_with_body_split_across_chunks(compression):
+    source = await store_with({"one": DebateStatus.COMPLETED, "two": DebateStatus.PAUSED})
+    data = await export(source, compression)
+    
+    target = MemoryDebateStore()
+    # Small pieces split gzip members and lines alike
+    result = await ArchiveImport(target).run(chunks(data, 7))
+    
+    assert result == {"imported": 2, "skipped": 0, "turns": 6}
+    for debate_id in ("one", "two"):
+        assert await target.read_rows(debate_id) == await source.read_rows(debate_id)
+
+
+async def test_reimport_skips_stored_debates():
+    source = await store_with({"one": DebateStatus.COMPLETED, "two": DebateStatus.COMPLETED})
+    data = await export(source, "gzip")
+    target = await store_with({"one": DebateStatus.COMPLETED}, turns=1)
+    
+    result = await ArchiveImport(target).run(chunks(data, 1024))
+    
+    assert result == {"imported": 1, "skipped": 1, "turns": 3}
+    # The stored copy is left as it was
+    assert len((await target.read_rows("one"))[2]) == 1
+    assert len((await target.read_rows("two"))[2]) == 3
+
+
+async def test_out_of_order_turn_names_its_line():
+    config = json.loads(debate_config(ProviderType.OLLAMA, "fake").model_dump_json())
+    data = lines(
+        {"debate": "one", "status": "completed", "config": config},
+        {"turn": json.loads(turn(1).model_dump_json())},
+        {"turn": json.loads(turn(3).model_dump_json())},
+    )
+    archive_import = ArchiveImport(MemoryDebateStore())
+    
+    with pytest.raises(ArchiveError) as raised:
+        await archive_import.run(chunks(data, 1024))
+    
+    assert raised.value.line == 4
+    assert "Expected turn 2, got 3" in str(raised.value)
+    # Lines before the failing one are kept
+    assert archive_import.result() == {"imported": 1, "skipped": 0, "turns": 1}
+
+
+async def test_running_debate_is_imported_paused():
+    source = await store_with({"one": DebateStatus.RUNNING})
+    target = MemoryDebateStore()
+    
+    await ArchiveImport(target).run(chunks(await export(source, "none"), 1024))
+    
+    assert (await target.read_rows("one"))[1] == DebateStatus.PAUSED.value
+
+
+async def test_plain_debate_export_lines_are_accepted():
+    export_record = DebateExport(
+        config=debate_config(ProviderType.OLLAMA, "fake"),
+        turns=[turn(1), turn(2)],
+        exported_at=datetime(2024, 1, 1)
+    )
+    target = MemoryDebateStore()
+    
+    result = await ArchiveImport(target).run(chunks(lines(json.loads(export_record.model_dump_json())), 1024))
+    
+    assert result == {"imported": 1, "skipped": 0, "turns": 2}
+    (debate_id,) = await target.debate_ids()
+    state = await target.load(debate_id)
+    assert [t.content for t in state.turns] == ["turn 1", "turn 2"]
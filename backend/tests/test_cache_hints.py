@@ -0,0 +1,117 @@
+"""Where each provider puts its prompt cache hints, checked on the requests the fake LLM receives."""
+import pytest
+
+from app.config import settings
+from app.models import CacheHints, ProviderType, TranscriptView
+from app.services.debate import DebateOrchestrator
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+async def run(provider: ProviderType, model: str, **overrides) -> DebateOrchestrator:
+    orchestrator = DebateOrchestrator(debate_config(provider, model, **overrides))
+    async for event in orchestrator.run_debate():
+        assert event["type"] != "error", event
+    return orchestrator
+
+
+def bodies(llm, path: str) -> list[dict]:
+    return [request["body"] for request in llm.requests if request["path"] == path]
+
+
+def marked(messages: list[dict]) -> list[int]:
+    """Indexes of chat messages carrying a cache breakpoint."""
+    return [
+        index for index, message in enumerate(messages)
+        if isinstance(message["content"], list) and message["content"][-1].get("cache_control") == CACHE_CONTROL
+    ]
+
+
+async def test_anthropic_marks_system_prompt_and_transcript_prefix(llm, providers):
+    await run(ProviderType.ANTHROPIC, "claude-3-5-haiku-latest")
+    
+    requests = bodies(llm, "/v1/messages")
+    assert len(requests) == 4
+    for body in requests:
+        assert body["system"][0]["cache_control"] == CACHE_CONTROL
+    # A's first turn: only the opening prompt, which is also the end of the request
+    assert marked(requests[0]["messages"]) == [0]
+    # A's second turn reads the cache up to its previous request and writes it up to this one
+    assert len(requests[2]["messages"]) == 3
+    assert marked(requests[2]["messages"]) == [0, 2]
+    # B's second turn: its previous request ended after one message
+    assert marked(requests[3]["messages"]) == [0, 2]
+    assert all(
+        request["headers"].get("anthropic-beta") == "prompt-caching-2024-07-31"
+        for request in llm.requests if request["path"] == "/v1/messages"
+    )
+
+
+async def test_anthropic_keeps_context_note_out_of_cached_block(llm, providers):
+    view = TranscriptView("You argue for.", context_note="\n\nSummary so far: both sides agree on costs.")
+    view.append("user", "Your turn.")
+    async for _ in providers[ProviderType.ANTHROPIC].generate_response(
+        view, "claude-3-5-haiku-latest", cache_hints=CacheHints(prefix_messages=0, session_id="d:A")
+    ):
+        pass
+    
+    [body] = bodies(llm, "/v1/messages")
+    assert body["system"] == [
+        {"type": "text", "text": "You argue for.", "cache_control": CACHE_CONTROL},
+        {"type": "text", "text": "Summary so far: both sides agree on costs."},
+    ]
+
+
+async def test_anthropic_sends_no_markers_without_prompt_caching(llm, providers, monkeypatch):
+    monkeypatch.setattr(settings, "prompt_caching", False)
+    await run(ProviderType.ANTHROPIC, "claude-3-5-haiku-latest", max_turns=2)
+    
+    for request in llm.requests:
+        assert isinstance(request["body"]["system"], str)
+        assert marked(request["body"]["messages"]) == []
+        assert "anthropic-beta" not in request["headers"]
+
+
+async def test_openai_sends_cache_key_and_stable_prefix_first(llm, providers):
+    orchestrator = await run(ProviderType.OPENAI, "gpt-4o-mini")
+    
+    requests = bodies(llm, "/v1/chat/completions")
+    assert [body["prompt_cache_key"] for body in requests] == [
+        f"{orchestrator.state.id}:{debater}" for debater in "ABAB"
+    ]
+    first, _, second, _ = requests
+    assert first["messages"][0]["role"] == "system"
+    # Each request starts with everything the debater's previous one sent
+    assert second["messages"][:len(first["messages"])] == first["messages"]
+
+
+async def test_openai_moves_context_note_behind_system_prompt(llm, providers):
+    view = TranscriptView("You argue for.", context_note="\n\nSummary so far: both sides agree on costs.")
+    view.append("user", "Your turn.")
+    async for _ in providers[ProviderType.OPENAI].generate_response(
+        view, "gpt-4o-mini", cache_hints=CacheHints(session_id="d:A")
+    ):
+        pass
+    
+    [body] = bodies(llm, "/v1/chat/completions")
+    assert body["messages"] == [
+        {"role": "system", "content": "You argue for."},
+        {"role": "system", "content": "Summary so far: both sides agree on costs."},
+        {"role": "user", "content": "Your turn."},
+    ]
+
+
+async def test_ollama_keeps_model_loaded_with_reusable_prefix(llm, providers):
+    await run(ProviderType.OLLAMA, "fake")
+    
+    requests = bodies(llm, "/api/chat")
+    assert len(requests) == 4
+    for body in requests:
+        assert body["keep_alive"] == settings.ollama_keep_alive
+    first, _, second, _ = requests
+    # Ollama only reuses its KV cache when the options match and the prompt extends the last one
+    assert second["options"] == first["options"]
+    assert second["messages"][:len(first["messages"])] == first["messages"]
@@ -0,0 +1,50 @@
+"""Stop and pause cut a turn off at once and close its upstream stream, against a real fake LLM server."""
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.providers.capabilities import capability_registry
+from app.providers.factory import ProviderFactory
+from app.providers.http import close_http_client
+from benchmarks.cancel_latency import NETWORK_PROVIDERS, point_providers_at, run_case, start_fake_server
+
+pytestmark = pytest.mark.anyio
+
+# Generous bounds for a loaded CI machine; locally both are a few milliseconds
+IDLE_BOUND_MS = 500
+UPSTREAM_BOUND_MS = 1000
+
+
+@pytest.fixture(scope="module")
+def fake_server():
+    server, base_url = asyncio.run(start_fake_server(token_rate=200))
+    yield base_url
+    server.terminate()
+    server.wait()
+
+
+@pytest.fixture
+async def base_url(fake_server, monkeypatch, tmp_path):
+    for name in ("openai_api_key", "anthropic_api_key", "openai_base_url", "anthropic_base_url",
+                 "ollama_base_url", "response_cache_enabled"):
+        # Restored after the test
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+    point_providers_at(fake_server)
+    monkeypatch.setattr(ProviderFactory, "_instances", {})
+    monkeypatch.setattr(capability_registry, "path", tmp_path / "capabilities.json")
+    yield fake_server
+    await ProviderFactory.close_all()
+    await close_http_client()
+
+
+@pytest.mark.parametrize("action", ["stop", "pause"])
+@pytest.mark.parametrize("provider", NETWORK_PROVIDERS, ids=lambda provider: provider.value)
+async def test_cancel_goes_idle_and_closes_upstream(base_url, provider, action):
+    result = await run_case(provider, action, base_url, chunks_before=5)
+    
+    assert result["truncated_turn"]
+    assert result["client_idle_ms"] < IDLE_BOUND_MS
+    assert result["open_streams"] == 0
+    assert result["upstream_closed_ms"] is not None and result["upstream_closed_ms"] < UPSTREAM_BOUND_MS
+    assert not result["generating"]
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from app.models import DebateState, ProviderType
+from app.services.cluster import ClusterNode, OwnerUnreachable
+from app.services.sessions import sessions
+from app.services.store import MemoryDebateStore
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+DEBATE_ID = "debate-1"
+
+
+@pytest.fixture
+async def node(tmp_path, monkeypatch):
+    store = MemoryDebateStore()
+    monkeypatch.setattr(sessions, "store", store)
+    node = ClusterNode(enabled=True, directory=str(tmp_path))
+    yield node
+    node.owners.close()
+    sessions._sessions.pop(DEBATE_ID, None)
+
+
+async def owned_by_dead_worker(node: ClusterNode, tmp_path) -> str:
+    """A stored debate whose owner heartbeated recently but whose socket is gone."""
+    state = DebateState(id=DEBATE_ID, config=debate_config(ProviderType.OLLAMA, "fake"))
+    await sessions.store.save_debate(state)
+    conn = node.owners._connect()
+    conn.execute(
+        "INSERT INTO workers (worker_id, address, heartbeat) VALUES (?, ?, ?)",
+        ("dead-worker", str(tmp_path / "dead-worker.sock"), time.time())
+    )
+    conn.execute("INSERT INTO owners (debate_id, worker_id) VALUES (?, ?)", (state.id, "dead-worker"))
+    return state.id
+
+
+async def test_unreachable_owner_is_taken_over(node, tmp_path):
+    debate_id = await owned_by_dead_worker(node, tmp_path)
+    
+    state = await node.control(debate_id, "state")
+    
+    assert state["id"] == debate_id
+    assert await node.locate(debate_id) is None
+
+
+async def test_owner_that_stays_unreachable_raises(node, tmp_path, monkeypatch):
+    debate_id = await owned_by_dead_worker(node, tmp_path)
+    
+    async def still_alive(worker_id: str):
+        pass
+    
+    monkeypatch.setattr(node.owners, "expire", still_alive)
+    with pytest.raises(OwnerUnreachable):
+        await node.control(debate_id, "state")
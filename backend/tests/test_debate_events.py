@@ -0,0 +1,20 @@
+"""What a debate's events carry to viewers."""
+import pytest
+
+from app.models import ProviderType
+from app.services.debate import DebateOrchestrator
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_completed_event_leaves_out_chunk_timing(providers):
+    orchestrator = DebateOrchestrator(debate_config(ProviderType.OLLAMA, "fake", max_turns=2))
+    events = [event async for event in orchestrator.run_debate()]
+    
+    completed = events[-1]
+    assert completed["type"] == "debate_completed"
+    assert len(completed["turns"]) == 2
+    assert all("chunk_timing" not in turn for turn in completed["turns"])
+    # Still kept on the debate itself for the store and exports
+    assert all(turn.chunk_timing for turn in orchestrator.state.turns)
@@ -0,0 +1,43 @@
+import pytest
+
+from app.models import ProviderType
+from app.providers.health import CircuitState, ProviderHealth
+from app.services.catalog import ModelCatalog
+from tests.conftest import FAKE_URL
+
+pytestmark = pytest.mark.anyio
+
+
+def test_request_failures_open_the_circuit_only_at_the_threshold():
+    health = ProviderHealth(failure_threshold=3, reset_timeout=15)
+    health.record_success(probe=True)
+    
+    health.record_failure()
+    health.record_failure()
+    assert health.state == CircuitState.CLOSED
+    assert health.is_available()
+    
+    health.record_failure()
+    assert health.state == CircuitState.OPEN
+    assert not health.is_available()
+
+
+def test_failed_probe_marks_the_provider_down():
+    health = ProviderHealth(failure_threshold=3, reset_timeout=15)
+    health.record_failure(probe=True)
+    assert health.state == CircuitState.CLOSED
+    assert not health.is_available()
+    
+    health.record_success(probe=True)
+    assert health.is_available()
+
+
+async def test_catalog_keeps_models_when_listing_fails(providers):
+    catalog = ModelCatalog(ttl=300)
+    assert [m.id for m in await catalog.get_models(ProviderType.OLLAMA)] == ["fake"]
+    
+    # /api/tags now answers 404
+    providers[ProviderType.OLLAMA].base_url = f"{FAKE_URL}/missing"
+    catalog.invalidate(ProviderType.OLLAMA)
+    assert [m.id for m in await catalog.refresh(ProviderType.OLLAMA)] == ["fake"]
+    assert [m.id for m in await catalog.get_models(ProviderType.OLLAMA)] == ["fake"]
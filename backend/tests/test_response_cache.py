@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+
+from app.models import ProviderType
+from app.providers.base import BaseProvider, ProviderError
+from app.providers.factory import ProviderFactory
+from app.services.debate import DebateOrchestrator
+from app.services.response_cache import ResponseCache
+from app.services import debate as debate_module
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+
+class ScriptedProvider(BaseProvider):
+    """Answers every request with the same chunks."""
+    
+    def __init__(self, *chunks: str):
+        self.chunks = chunks
+    
+    def is_available(self) -> bool:
+        return True
+    
+    async def list_models(self):
+        return []
+    
+    async def generate_response(self, messages, model, **kwargs):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path) -> ResponseCache:
+    cache = ResponseCache(str(tmp_path / "responses"), memory_entries=10, disk_max_bytes=0)
+    monkeypatch.setattr(debate_module, "response_cache", cache)
+    return cache
+
+
+async def run_turn(monkeypatch, provider: BaseProvider) -> dict:
+    monkeypatch.setattr(ProviderFactory, "_instances", {ProviderType.OLLAMA: provider})
+    orchestrator = DebateOrchestrator(debate_config(ProviderType.OLLAMA, "fake", max_turns=1, use_response_cache=True))
+    return [event async for event in orchestrator.run_debate() if event["type"] == "turn_completed"][0]
+
+
+async def test_answer_starting_with_error_is_cached(monkeypatch, cache):
+    event = await run_turn(monkeypatch, ScriptedProvider("Errors in the premise", " sink it."))
+    
+    assert not event["provider_error"]
+    assert list(cache._memory.values()) == [["Errors in the premise", " sink it."]]
+
+
+async def test_provider_error_is_not_cached(monkeypatch, cache):
+    event = await run_turn(monkeypatch, ScriptedProvider(ProviderError("Error calling Ollama: refused")))
+    
+    assert event["provider_error"]
+    assert event["content"] == "Error calling Ollama: refused"
+    assert not cache._memory
+
+
+async def test_background_write_failure_is_logged(tmp_path, caplog):
+    # A file where the cache directory should be makes every write fail
+    blocker = tmp_path / "responses"
+    blocker.write_text("")
+    cache = ResponseCache(str(blocker), memory_entries=10, disk_max_bytes=1024)
+    
+    with caplog.at_level(logging.WARNING, logger="app.services.response_cache"):
+        cache.put_nowait("ab" * 32, ["chunk"])
+        for write in list(cache._pending_writes):
+            with pytest.raises(OSError):
+                await write
+    
+    assert not cache._pending_writes
+    assert "Failed to write response cache entry" in caplog.text
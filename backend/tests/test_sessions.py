@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.models import ProviderType
+from app.services.debate import DebateOrchestrator
+from app.services.sessions import SessionRegistry
+from app.services.store import MemoryDebateStore
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowFlushStore(MemoryDebateStore):
+    """Yields while flushing, as a real store's disk write does."""
+    
+    async def flush(self):
+        await asyncio.sleep(0.01)
+
+
+def orchestrator() -> DebateOrchestrator:
+    return DebateOrchestrator(debate_config(ProviderType.OLLAMA, "fake"))
+
+
+async def test_concurrent_enforcement_spills_each_session_once(monkeypatch):
+    registry = SessionRegistry(SlowFlushStore())
+    for _ in range(4):
+        await registry.add(orchestrator())
+    
+    monkeypatch.setattr(settings, "session_max_count", 1)
+    await asyncio.gather(registry.enforce_limits(), registry.enforce_limits())
+    
+    assert registry.resident_sessions == 1
+    assert registry.spilled == 3
+
+
+async def test_session_still_generating_is_not_spilled(monkeypatch):
+    monkeypatch.setattr(settings, "session_max_count", 1)
+    registry = SessionRegistry(MemoryDebateStore())
+    generating = orchestrator()
+    # A paused debate whose provider stream is still being wound down
+    stream = asyncio.create_task(asyncio.sleep(10))
+    generating._generations["A"] = stream
+    
+    await registry.add(generating)
+    await registry.add(orchestrator())
+    
+    assert await registry.get(generating.state.id) is generating
+    assert registry.spilled == 1
+    stream.cancel()
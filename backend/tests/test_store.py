@@ -0,0 +1,28 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import DebateState, DebateTurn, ProviderType
+from app.services.store import SqliteDebateStore
+from tests.conftest import debate_config
+
+pytestmark = pytest.mark.anyio
+
+
+def turn(number: int) -> DebateTurn:
+    return DebateTurn(debater="A", content=f"turn {number}", timestamp=datetime.now(), turn_number=number)
+
+
+async def test_failing_debate_does_not_drop_other_debates_writes(tmp_path):
+    store = SqliteDebateStore(str(tmp_path / "debates.db"), flush_ms=60_000)
+    kept = DebateState(id="kept", config=debate_config(ProviderType.OLLAMA, "fake"))
+    await store.save_debate(kept)
+    # A turn for a debate that was never saved breaks the foreign key
+    store.append_turn("missing", turn(1))
+    store.append_turn("kept", turn(1))
+    await store.flush()
+    
+    state = await store.load("kept")
+    assert [t.content for t in state.turns] == ["turn 1"]
+    assert await store.load("missing") is None
+    await store.close()
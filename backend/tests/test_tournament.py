@@ -0,0 +1,125 @@
+import asyncio
+import json
+
+import pytest
+
+from app.config import settings
+from app.models import DebateConfig, ProviderType, TournamentSpec
+from app.models.debate import DebaterConfig
+from app.providers.base import BaseProvider
+from app.providers.factory import ProviderFactory
+from app.providers.ratelimit import RateLimitExceeded
+from app.services.debate import DebateOrchestrator
+from app.services.metrics import QUEUE_WAIT
+from app.services.tournament import ConcurrencyGovernor, TournamentRunner
+
+pytestmark = pytest.mark.anyio
+
+
+class RateLimitedFor(BaseProvider):
+    """Refuses the first requests as a rate limiter that ran out of time would, then answers."""
+    
+    def __init__(self, refusals: int):
+        self.refusals = refusals
+    
+    def is_available(self) -> bool:
+        return True
+    
+    async def list_models(self):
+        return []
+    
+    async def generate_response(self, messages, model, **kwargs):
+        if self.refusals > 0:
+            self.refusals -= 1
+            raise RateLimitExceeded("No capacity within the turn deadline")
+        yield "An argument."
+
+
+def spec() -> TournamentSpec:
+    return TournamentSpec(
+        name="rate-limited",
+        topics=["Remote work is better than office work"],
+        entrants=[{"provider": "ollama", "model": "a"}, {"provider": "ollama", "model": "b"}],
+        both_sides=False,
+        max_turns=2,
+        max_concurrency=1
+    )
+
+
+async def run(monkeypatch, tmp_path, refusals: int) -> dict:
+    monkeypatch.setattr(ProviderFactory, "_instances", {ProviderType.OLLAMA: RateLimitedFor(refusals)})
+    monkeypatch.setattr(settings, "tournament_retry_delay", 0)
+    monkeypatch.setattr(settings, "tournament_rate_limit_retries", 1)
+    output = tmp_path / "results.jsonl"
+    runner = TournamentRunner(spec(), output=output)
+    progress = await asyncio.wait_for(runner.run(), timeout=5)
+    assert progress.running == 0
+    [result] = [json.loads(line) for line in output.read_text().splitlines()]
+    return result
+
+
+async def test_rate_limited_match_resumes_instead_of_hanging(monkeypatch, tmp_path):
+    result = await run(monkeypatch, tmp_path, refusals=1)
+    
+    assert result["status"] == "completed"
+    assert result["attempts"] == 2
+    assert [turn["turn_number"] for turn in result["turns"]] == [1, 2]
+
+
+async def test_match_rate_limited_past_its_retries_fails(monkeypatch, tmp_path):
+    result = await run(monkeypatch, tmp_path, refusals=5)
+    
+    assert result["status"] == "failed"
+    assert result["attempts"] == 2
+    assert "turn deadline" in result["errors"][0]
+
+
+class Answers(BaseProvider):
+    """Answers after a delay, naming the model."""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+    
+    def is_available(self) -> bool:
+        return True
+    
+    async def list_models(self):
+        return []
+    
+    async def generate_response(self, messages, model, **kwargs):
+        await asyncio.sleep(self.delay)
+        yield f"From {model}."
+
+
+async def collect(stream) -> list[str]:
+    return [chunk async for chunk in stream]
+
+
+async def test_hedge_fallback_goes_through_the_governor(monkeypatch):
+    monkeypatch.setattr(ProviderFactory, "_instances", {ProviderType.OLLAMA: Answers(0.5), ProviderType.OPENAI: Answers(0)})
+    config = DebateConfig(
+        topic="Remote work is better than office work",
+        debater_a={
+            "provider": "ollama", "model": "slow", "position": "For",
+            "hedge": {"after_seconds": 0.01, "provider": "openai", "model": "fast"}
+        },
+        debater_b={"provider": "ollama", "model": "slow", "position": "Against"},
+        mode="auto",
+        max_turns=1,
+        auto_delay_seconds=0
+    )
+    governor = ConcurrencyGovernor(per_model=1)
+    orchestrator = DebateOrchestrator(config)
+    orchestrator.wrap_providers(governor.wrap)
+    fallback_waits = QUEUE_WAIT.labels("openai", "fast")
+    waited_before = fallback_waits.count
+    
+    turns = [event async for event in orchestrator.run_debate() if event["type"] == "turn_completed"]
+    
+    assert turns[0]["backend"] == "openai/fast"
+    # The fallback queued for its own model's slot
+    assert fallback_waits.count == waited_before + 1
+    # and gave it back: the next request for that model gets it at once
+    fast = governor.wrap(Answers(0), DebaterConfig(provider="openai", model="fast", position="For"))
+    chunks = await asyncio.wait_for(collect(fast.generate_response([], "fast")), 1)
+    assert chunks == ["From fast."]
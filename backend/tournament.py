@@ -0,0 +1,55 @@
+"""
+Run a tournament of debates from a spec file and write results as JSONL.
+Run from backend directory: python tournament.py spec.json [--output results.jsonl]
+
+Rerunning with the same output file resumes the tournament: debates that
+already completed are skipped.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from app.models import TournamentSpec, TournamentProgress
+from app.providers.factory import ProviderFactory
+from app.services.tournament import TournamentRunner
+
+
+def print_progress(progress: TournamentProgress):
+    done = progress.completed + progress.failed + progress.skipped
+    print(
+        f"\r{done}/{progress.total} done ({progress.failed} failed, {progress.running} running) "
+        f"| {progress.debates_per_minute:.1f} debates/min | {progress.tokens_per_second:.0f} tokens/s",
+        end="",
+        file=sys.stderr,
+        flush=True
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("spec", type=Path, help="JSON file with a TournamentSpec")
+    parser.add_argument("--output", type=Path, help="Results file (default: TOURNAMENT_DIR/<name>.jsonl)")
+    parser.add_argument("--max-concurrency", type=int, help="Debates at once")
+    parser.add_argument("--per-model-concurrency", type=int, help="Requests at once per provider/model")
+    args = parser.parse_args()
+    
+    spec = TournamentSpec.model_validate(json.loads(args.spec.read_text(encoding="utf-8")))
+    if args.max_concurrency:
+        spec.max_concurrency = args.max_concurrency
+    if args.per_model_concurrency:
+        spec.per_model_concurrency = args.per_model_concurrency
+    
+    runner = TournamentRunner(spec, output=args.output, on_progress=print_progress)
+    try:
+        progress = await runner.run()
+    finally:
+        await ProviderFactory.close_all()
+    print(file=sys.stderr)
+    print(f"Results in {runner.output}")
+    print(progress.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
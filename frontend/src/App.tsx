@@ -13,6 +13,8 @@ function App() {
     debateState,
     isConnected,
     streamingContent,
+    queuedTurn,
+    thinkingContent,
     error,
     startNewDebate,
     triggerNextTurn,
@@ -53,6 +55,7 @@ function App() {
           ...status.openai.models,
           ...status.anthropic.models,
           ...status.ollama.models,
+          ...status.replay.models,
         ];
         setAvailableModels(allModels);
         // OpenAI and Anthropic now require manual model input
@@ -348,6 +351,8 @@ function App() {
             <DebateArena
               turns={debateState.turns}
               streamingContent={streamingContent}
+              queuedTurn={queuedTurn}
+              thinkingContent={thinkingContent}
               currentDebater={debateState.current_debater}
               isRunning={debateState.status === 'running'}
               isCompleted={debateState.status === 'completed'}
@@ -12,6 +12,19 @@ interface ControlBarProps {
   disabled?: boolean;
 }
 
+// The mode button cycles through the modes
+const NEXT_MODE: Record<DebateMode, DebateMode> = {
+  manual: 'auto',
+  auto: 'parallel',
+  parallel: 'manual',
+};
+
+const MODE_LABELS: Record<DebateMode, string> = {
+  manual: 'Manual',
+  auto: 'Auto',
+  parallel: 'Parallel',
+};
+
 export const ControlBar: React.FC<ControlBarProps> = ({
   status,
   mode,
@@ -33,15 +46,17 @@ export const ControlBar: React.FC<ControlBarProps> = ({
       <div className="flex items-center gap-2">
         <span className="text-sm font-medium text-gray-700">Mode:</span>
         <button
-          onClick={() => onModeChange(mode === 'auto' ? 'manual' : 'auto')}
+          onClick={() => onModeChange(NEXT_MODE[mode])}
           disabled={!isIdle || disabled}
           className={`px-3 py-1 rounded-full text-sm font-medium transition-colors ${
-            mode === 'auto'
-              ? 'bg-green-500 text-white'
-              : 'bg-blue-500 text-white'
+            mode === 'manual'
+              ? 'bg-blue-500 text-white'
+              : mode === 'auto'
+                ? 'bg-green-500 text-white'
+                : 'bg-purple-500 text-white'
           } disabled:opacity-50 disabled:cursor-not-allowed`}
         >
-          {mode === 'auto' ? 'Auto' : 'Manual'}
+          {MODE_LABELS[mode]}
         </button>
       </div>
 
@@ -58,7 +73,7 @@ export const ControlBar: React.FC<ControlBarProps> = ({
         </button>
       )}
 
-      {isRunning && mode === 'auto' && (
+      {isRunning && mode !== 'manual' && (
         <button
           onClick={onPause}
           className="px-6 py-2 bg-yellow-500 text-white rounded-lg font-medium hover:bg-yellow-600 transition-colors"
@@ -67,7 +82,7 @@ export const ControlBar: React.FC<ControlBarProps> = ({
         </button>
       )}
 
-      {isPaused && mode === 'auto' && (
+      {isPaused && mode !== 'manual' && (
         <button
           onClick={onResume}
           className="px-6 py-2 bg-green-600 text-white rounded-lg font-medium hover:bg-green-700 transition-colors"
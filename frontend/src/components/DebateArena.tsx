@@ -1,12 +1,15 @@
 import React, { useState } from 'react';
 import { DebatePanel } from './DebatePanel';
 import type { DebateTurn } from '../types/debate';
+import type { QueuedTurn } from '../hooks/useDebate';
 
 type ViewMode = 'chat' | 'side-by-side';
 
 interface DebateArenaProps {
   turns: DebateTurn[];
   streamingContent: { A: string; B: string };
+  queuedTurn?: QueuedTurn | null;
+  thinkingContent?: { A: string; B: string };
   currentDebater: 'A' | 'B';
   isRunning: boolean;
   isCompleted: boolean;
@@ -21,6 +24,8 @@ interface DebateArenaProps {
 export const DebateArena: React.FC<DebateArenaProps> = ({
   turns,
   streamingContent,
+  queuedTurn,
+  thinkingContent,
   currentDebater,
   isRunning,
   isCompleted,
@@ -79,7 +84,7 @@ export const DebateArena: React.FC<DebateArenaProps> = ({
                 modelName={debaterAModel}
                 turns={turns}
                 streamingContent={streamingContent.A}
-                isActive={isRunning && currentDebater === 'A'}
+                isActive={isRunning && (currentDebater === 'A' || !!streamingContent.A)}
               />
             </div>
 
@@ -94,7 +99,7 @@ export const DebateArena: React.FC<DebateArenaProps> = ({
                 modelName={debaterBModel}
                 turns={turns}
                 streamingContent={streamingContent.B}
-                isActive={isRunning && currentDebater === 'B'}
+                isActive={isRunning && (currentDebater === 'B' || !!streamingContent.B)}
               />
             </div>
           </div>
@@ -149,34 +154,35 @@ export const DebateArena: React.FC<DebateArenaProps> = ({
             );
           })}
 
-          {/* Streaming content for current debater */}
-          {(streamingContent.A || streamingContent.B) && (
+          {/* Streaming content; both debaters stream at once in parallel mode */}
+          {(['A', 'B'] as const).filter((debater) => streamingContent[debater]).map((debater) => (
             <div
+              key={`streaming-${debater}`}
               className={`max-w-[70%] mb-4 ${
-                currentDebater === 'A' ? 'mr-auto' : 'ml-auto'
+                debater === 'A' ? 'mr-auto' : 'ml-auto'
               }`}
             >
               <div
                 className={`p-4 rounded-lg border ${
-                  currentDebater === 'A'
+                  debater === 'A'
                     ? 'bg-blue-100 border-blue-300'
                     : 'bg-green-100 border-green-300'
                 }`}
               >
                 <div className="flex items-center justify-between mb-2">
                   <span className="text-xs font-semibold text-gray-600">
-                    Debater {currentDebater} • {currentDebater === 'A' ? debaterAModel : debaterBModel} • Turn {turns.filter(t => t.debater === currentDebater).length + 1}
+                    Debater {debater} • {debater === 'A' ? debaterAModel : debaterBModel} • Turn {turns.filter(t => t.debater === debater).length + 1}
                   </span>
                   <span className="flex items-center text-xs text-gray-500">
                     <span className="animate-pulse mr-1">●</span> Thinking...
                   </span>
                 </div>
                 <p className="text-gray-800 whitespace-pre-wrap">
-                  {currentDebater === 'A' ? streamingContent.A : streamingContent.B}
+                  {streamingContent[debater]}
                 </p>
               </div>
             </div>
-          )}
+          ))}
 
           {/* Thinking indicator when running but no streaming yet */}
           {isRunning && !streamingContent.A && !streamingContent.B && (
@@ -194,8 +200,19 @@ export const DebateArena: React.FC<DebateArenaProps> = ({
               >
                 <div className="flex items-center gap-2 text-sm text-gray-600">
                   <span className="animate-pulse">●</span>
-                  <span>Debater {currentDebater} is thinking...</span>
+                  <span>
+                    {queuedTurn
+                      ? `Debater ${currentDebater} is waiting for the provider's rate limit` +
+                        (queuedTurn.retryIn >= 1 ? ` (about ${Math.ceil(queuedTurn.retryIn)}s)` : '') +
+                        '...'
+                      : `Debater ${currentDebater} is thinking...`}
+                  </span>
                 </div>
+                {thinkingContent?.[currentDebater] && (
+                  <p className="mt-2 text-sm italic text-gray-500 whitespace-pre-wrap">
+                    {thinkingContent[currentDebater]}
+                  </p>
+                )}
               </div>
             </div>
           )}
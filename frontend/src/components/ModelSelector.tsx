@@ -28,7 +28,7 @@ export const ModelSelector: React.FC<ModelSelectorProps> = ({
   onMaxTokensChange,
   disabled = false,
 }) => {
-  const providers: ProviderType[] = ['openai', 'anthropic', 'ollama'];
+  const providers: ProviderType[] = ['openai', 'anthropic', 'ollama', 'replay'];
   const filteredModels = availableModels.filter((m) => m.provider === selectedProvider);
   
   // Format provider name for display
@@ -8,10 +8,19 @@ import type {
 } from '../types/debate';
 import { startDebate, createDebateWebSocket } from '../services/api';
 
+// A turn held back by provider rate limits
+export interface QueuedTurn {
+  debater: 'A' | 'B';
+  reason: string;
+  retryIn: number;
+}
+
 interface UseDebateReturn {
   debateState: DebateState | null;
   isConnected: boolean;
   streamingContent: { A: string; B: string };
+  queuedTurn: QueuedTurn | null;
+  thinkingContent: { A: string; B: string };
   error: string | null;
   startNewDebate: (config: DebateConfig) => Promise<void>;
   triggerNextTurn: () => void;
@@ -27,16 +36,44 @@ export function useDebate(): UseDebateReturn {
     A: '',
     B: '',
   });
+  const [queuedTurn, setQueuedTurn] = useState<QueuedTurn | null>(null);
+  // Reasoning streamed by debaters with stream_thinking, for the turn in progress
+  const [thinkingContent, setThinkingContent] = useState<{ A: string; B: string }>({
+    A: '',
+    B: '',
+  });
   const [error, setError] = useState<string | null>(null);
   
   const wsRef = useRef<WebSocket | null>(null);
   const debateIdRef = useRef<string | null>(null);
+  // Last event sequence number seen, so a reconnect only receives what was missed
+  const lastSeqRef = useRef(0);
+  const finishedRef = useRef(false);
+  const reconnectTimerRef = useRef<number | null>(null);
 
   const handleWebSocketMessage = useCallback((event: MessageEvent) => {
     try {
       const data: DebateEvent = JSON.parse(event.data);
+      if (data.seq !== undefined) {
+        lastSeqRef.current = data.seq;
+      }
       
       switch (data.type) {
+        case 'resync':
+          // Missed events are gone from the server's log; take its snapshot instead
+          if (data.state) {
+            setDebateState(data.state);
+          }
+          {
+            // A parallel round has a partial turn for each debater
+            const partials = data.partial_turns ?? (data.partial_turn ? [data.partial_turn] : []);
+            setStreamingContent({
+              A: partials.find((p) => p.debater === 'A')?.content ?? '',
+              B: partials.find((p) => p.debater === 'B')?.content ?? '',
+            });
+          }
+          break;
+
         case 'debate_started':
           setDebateState((prev) =>
             prev ? { ...prev, status: 'running' as DebateStatus } : prev
@@ -47,10 +84,32 @@ export function useDebate(): UseDebateReturn {
           // Clear streaming content for this debater
           if (data.debater) {
             setStreamingContent((prev) => ({ ...prev, [data.debater!]: '' }));
+            setThinkingContent((prev) => ({ ...prev, [data.debater!]: '' }));
+          }
+          break;
+
+        case 'turn_queued':
+          if (data.debater) {
+            setQueuedTurn({
+              debater: data.debater,
+              reason: data.reason || 'rate_limit',
+              retryIn: data.retry_in || 0,
+            });
+          }
+          break;
+
+        case 'thinking_chunk':
+          setQueuedTurn(null);
+          if (data.debater && data.chunk) {
+            setThinkingContent((prev) => ({
+              ...prev,
+              [data.debater!]: prev[data.debater!] + data.chunk,
+            }));
           }
           break;
 
         case 'content_chunk':
+          setQueuedTurn(null);
           if (data.debater && data.chunk) {
             setStreamingContent((prev) => ({
               ...prev,
@@ -60,12 +119,15 @@ export function useDebate(): UseDebateReturn {
           break;
 
         case 'turn_completed':
+          setQueuedTurn(null);
           if (data.debater && data.content) {
             const newTurn: DebateTurn = {
               debater: data.debater,
               content: data.content,
               timestamp: new Date().toISOString(),
               turn_number: data.turn_number || 0,
+              backend: data.backend || undefined,
+              truncated: data.truncated,
             };
             setDebateState((prev) =>
               prev
@@ -107,12 +169,14 @@ export function useDebate(): UseDebateReturn {
           break;
 
         case 'debate_completed':
+          finishedRef.current = true;
           setDebateState((prev) =>
             prev ? { ...prev, status: 'completed' as DebateStatus } : prev
           );
           break;
 
         case 'error':
+          setQueuedTurn(null);
           setError(data.error || 'Unknown error occurred');
           break;
       }
@@ -121,6 +185,42 @@ export function useDebate(): UseDebateReturn {
     }
   }, []);
 
+  const connect = useCallback((debateId: string) => {
+    const ws = createDebateWebSocket(debateId, lastSeqRef.current);
+    wsRef.current = ws;
+
+    ws.onopen = () => {
+      setIsConnected(true);
+    };
+
+    ws.onmessage = handleWebSocketMessage;
+
+    ws.onerror = () => {
+      setError('WebSocket connection error');
+      setIsConnected(false);
+    };
+
+    ws.onclose = () => {
+      setIsConnected(false);
+      // The debate keeps running on the server; pick up where we left off
+      if (wsRef.current === ws && !finishedRef.current) {
+        reconnectTimerRef.current = window.setTimeout(() => connect(debateId), 1000);
+      }
+    };
+  }, [handleWebSocketMessage]);
+
+  const disconnect = useCallback(() => {
+    if (reconnectTimerRef.current !== null) {
+      window.clearTimeout(reconnectTimerRef.current);
+      reconnectTimerRef.current = null;
+    }
+    const ws = wsRef.current;
+    wsRef.current = null;
+    if (ws) {
+      ws.close();
+    }
+  }, []);
+
   const startNewDebate = useCallback(async (config: DebateConfig) => {
     try {
       setError(null);
@@ -132,36 +232,20 @@ export function useDebate(): UseDebateReturn {
       debateIdRef.current = state.id;
 
       // Close existing WebSocket if any
-      if (wsRef.current) {
-        wsRef.current.close();
-      }
+      disconnect();
+      lastSeqRef.current = 0;
+      finishedRef.current = false;
 
       // Connect via WebSocket for streaming
-      const ws = createDebateWebSocket(state.id);
-      wsRef.current = ws;
-
-      ws.onopen = () => {
-        setIsConnected(true);
-      };
-
-      ws.onmessage = handleWebSocketMessage;
-
-      ws.onerror = () => {
-        setError('WebSocket connection error');
-        setIsConnected(false);
-      };
-
-      ws.onclose = () => {
-        setIsConnected(false);
-      };
+      connect(state.id);
     } catch (e) {
       setError(e instanceof Error ? e.message : 'Failed to start debate');
     }
-  }, [handleWebSocketMessage]);
+  }, [connect, disconnect]);
 
   const triggerNextTurn = useCallback(() => {
     if (debateIdRef.current) {
-      fetch(`/api/debate/${debateIdRef.current}/resume`, { method: 'POST' });
+      fetch(`/api/debate/${debateIdRef.current}/next-turn`, { method: 'POST' });
     }
   }, []);
 
@@ -187,16 +271,16 @@ export function useDebate(): UseDebateReturn {
   // Cleanup on unmount
   useEffect(() => {
     return () => {
-      if (wsRef.current) {
-        wsRef.current.close();
-      }
+      disconnect();
     };
-  }, []);
+  }, [disconnect]);
 
   return {
     debateState,
     isConnected,
     streamingContent,
+    queuedTurn,
+    thinkingContent,
     error,
     startNewDebate,
     triggerNextTurn,
@@ -83,8 +83,9 @@ export async function resumeDebate(debateId: string): Promise<DebateState> {
   return response.json();
 }
 
-export function createDebateWebSocket(debateId: string): WebSocket {
+export function createDebateWebSocket(debateId: string, since = 0): WebSocket {
   const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
   const host = window.location.host;
-  return new WebSocket(`${protocol}//${host}/api/debate/${debateId}/ws`);
+  const query = since > 0 ? `?since=${since}` : '';
+  return new WebSocket(`${protocol}//${host}/api/debate/${debateId}/ws${query}`);
 }
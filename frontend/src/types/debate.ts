@@ -1,6 +1,8 @@
-export type ProviderType = 'openai' | 'anthropic' | 'ollama';
+export type ProviderType = 'openai' | 'anthropic' | 'ollama' | 'replay';
 
-export type DebateMode = 'manual' | 'auto';
+export type DebateMode = 'manual' | 'auto' | 'parallel';
+
+export type ContextPolicy = 'full' | 'sliding_window' | 'token_budget' | 'rolling_summary';
 
 export type DebateStatus = 'idle' | 'running' | 'paused' | 'completed';
 
@@ -13,12 +15,22 @@ export interface ModelInfo {
   description: string;
 }
 
+// Race a fallback backend against the debater's own when it is slow to start answering
+export interface HedgePolicy {
+  after_seconds?: number;
+  provider?: ProviderType;
+  model?: string;
+}
+
 export interface DebaterConfig {
   provider: ProviderType;
   model: string;
   position: string;
   temperature?: number;
   max_tokens?: number;
+  hedge?: HedgePolicy;
+  thinking_budget?: number;
+  stream_thinking?: boolean;
 }
 
 export interface DebateConfig {
@@ -28,6 +40,10 @@ export interface DebateConfig {
   mode: DebateMode;
   max_turns?: number;
   auto_delay_seconds?: number;
+  context_policy?: ContextPolicy;
+  context_window_turns?: number;
+  context_token_budget?: number;
+  token_estimator?: string;
 }
 
 export interface DebateTurn {
@@ -35,6 +51,9 @@ export interface DebateTurn {
   content: string;
   timestamp: string;
   turn_number: number;
+  backend?: string;
+  truncated?: boolean;
+  chunk_timing?: [number, number][];
 }
 
 export interface DebateState {
@@ -56,16 +75,20 @@ export interface DebateExport {
 export type DebateEventType =
   | 'debate_started'
   | 'turn_started'
+  | 'turn_queued'
   | 'content_chunk'
+  | 'thinking_chunk'
   | 'turn_completed'
   | 'debate_paused'
   | 'debate_resumed'
   | 'waiting_for_trigger'
   | 'debate_completed'
+  | 'resync'
   | 'error';
 
 export interface DebateEvent {
   type: DebateEventType;
+  seq?: number;
   debater?: Debater;
   chunk?: string;
   content?: string;
@@ -75,6 +98,15 @@ export interface DebateEvent {
   total_turns?: number;
   turns?: DebateTurn[];
   error?: string;
+  state?: DebateState;
+  partial_turn?: { debater: Debater; content: string } | null;
+  partial_turns?: { debater: Debater; content: string }[];
+  backend?: string | null;
+  truncated?: boolean;
+  provider_error?: boolean;
+  reason?: string;
+  retry_in?: number;
+  attempt?: number;
 }
 
 export interface ProviderAvailability {
@@ -86,4 +118,5 @@ export interface ProvidersStatus {
   openai: ProviderAvailability;
   anthropic: ProviderAvailability;
   ollama: ProviderAvailability;
+  replay: ProviderAvailability;
 }